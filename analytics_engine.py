@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Agregační engine pro analýzy a reporty.
+
+Příjmy, výdaje a zisk po obdobích (týden, měsíc, čtvrtletí, rok) se počítají
+jedním dotazem s GROUP BY na každý zdroj dat; prázdná období se doplní
+v Pythonu. Celé měsíce rozsahu se čtou z rollup tabulek (viz `database.ROLLUPS`),
+ze zdrojových tabulek jen neúplné měsíce na okrajích rozsahu. Modul nezávisí
+na GUI, lze ho použít i v exportech.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from database import connect, register_query
+
+# Typy dokladů - GUI ukládá hodnoty s velkým písmenem, starší záznamy malým
+ISSUED_INVOICE_TYPES = ('Vydaná', 'vydaná')
+RECEIVED_INVOICE_TYPES = ('Přijatá', 'přijatá')
+CASH_INCOME_TYPES = ('Příjem', 'příjem')
+CASH_EXPENSE_TYPES = ('Výdaj', 'výdaj')
+
+# SQL výraz období pro sloupec s datem ve formátu YYYY-MM-DD
+_PERIOD_SQL = {
+    'week': "strftime('%Y-W%W', {col})",
+    'month': "substr({col}, 1, 7)",
+    'quarter': "substr({col}, 1, 4) || '-Q' || ((CAST(substr({col}, 6, 2) AS INTEGER) + 2) / 3)",
+    'year': "substr({col}, 1, 4)",
+}
+
+# Stejné označení období v Pythonu (pro doplnění prázdných období)
+_PERIOD_LABEL = {
+    'week': lambda d: d.strftime('%Y-W%W'),
+    'month': lambda d: d.strftime('%Y-%m'),
+    'quarter': lambda d: f"{d.year}-Q{(d.month + 2) // 3}",
+    'year': lambda d: str(d.year),
+}
+
+GRANULARITIES = tuple(_PERIOD_SQL)
+
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
+
+
+def period_labels(date_from, date_to, granularity='month'):
+    """Vrátí seřazený seznam období v rozsahu (včetně prázdných)."""
+    label = _PERIOD_LABEL[granularity]
+    start = datetime.strptime(date_from, "%Y-%m-%d").date()
+    end = datetime.strptime(date_to, "%Y-%m-%d").date()
+
+    labels = []
+    current = start
+    while current <= end:
+        value = label(current)
+        if not labels or labels[-1] != value:
+            labels.append(value)
+        current += timedelta(days=1)
+    return labels
+
+
+def _month_span(date_from, date_to):
+    """Rozdělí rozsah na celé měsíce a neúplné okraje.
+
+    Vrací `(první_měsíc, poslední_měsíc)` celých měsíců (nebo None)
+    a seznam okrajových rozsahů `(od, do)`, které se musí číst ze zdroje.
+    """
+    start = datetime.strptime(date_from, "%Y-%m-%d").date()
+    end = datetime.strptime(date_to, "%Y-%m-%d").date()
+    if start > end:
+        return None, []
+
+    first_full = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    last_day = calendar.monthrange(end.year, end.month)[1]
+    last_full = end.replace(day=1) if end.day == last_day else (end.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    if first_full > last_full:
+        return None, [(date_from, date_to)]
+
+    edges = []
+    if start < first_full:
+        edges.append((date_from, (first_full - timedelta(days=1)).isoformat()))
+    if end.day != last_day:
+        edges.append((end.replace(day=1).isoformat(), date_to))
+    return (first_full.strftime("%Y-%m"), last_full.strftime("%Y-%m")), edges
+
+
+def _period_sums_sql(table, date_col, amount_col, types, granularity):
+    """Agregace zdrojové tabulky po obdobích (parametry: typy, od, do)."""
+    period = _PERIOD_SQL[granularity].format(col=date_col)
+    return f"""
+        SELECT {period} AS period, COALESCE(SUM({amount_col}), 0)
+        FROM {table}
+        WHERE type IN ({_placeholders(types)}) AND {date_col} BETWEEN ? AND ?
+        GROUP BY period
+    """
+
+
+def _rollup_sums_sql(rollup, amount_col, types):
+    """Součty celých měsíců z rollupu (parametry: typy, první a poslední měsíc)."""
+    return f"""
+        SELECT month, SUM({amount_col}) FROM {rollup}
+        WHERE type IN ({_placeholders(types)}) AND month BETWEEN ? AND ?
+        GROUP BY month
+    """
+
+
+# Dotazy zdrojů; týdny jen ze zdrojové tabulky, měsíce z rollupu a okrajů
+REVENUE_WEEK_SQL = register_query("analytics.revenue_by_week", _period_sums_sql(
+    "invoices", "issue_date", "total", ISSUED_INVOICE_TYPES, 'week'))
+REVENUE_MONTH_SQL = register_query("analytics.revenue_by_month", _period_sums_sql(
+    "invoices", "issue_date", "total", ISSUED_INVOICE_TYPES, 'month'))
+REVENUE_ROLLUP_SQL = register_query("analytics.rollup_revenue", _rollup_sums_sql(
+    "monthly_revenue", "total", ISSUED_INVOICE_TYPES))
+EXPENSES_WEEK_SQL = register_query("analytics.expenses_by_week", _period_sums_sql(
+    "cash_journal", "date", "amount", CASH_EXPENSE_TYPES, 'week'))
+EXPENSES_MONTH_SQL = register_query("analytics.expenses_by_month", _period_sums_sql(
+    "cash_journal", "date", "amount", CASH_EXPENSE_TYPES, 'month'))
+EXPENSES_ROLLUP_SQL = register_query("analytics.rollup_expenses", _rollup_sums_sql(
+    "monthly_cash", "amount", CASH_EXPENSE_TYPES))
+
+CATEGORY_ROLLUP_SQL = register_query("analytics.rollup_categories", """
+    SELECT 'invoices', type, SUM(invoice_count), SUM(total)
+    FROM monthly_revenue WHERE month BETWEEN ? AND ?
+    GROUP BY type
+    UNION ALL
+    SELECT 'cash_journal', type, SUM(entry_count), SUM(amount)
+    FROM monthly_cash WHERE month BETWEEN ? AND ?
+    GROUP BY type
+""")
+CATEGORY_SQL = register_query("analytics.category_summary", """
+    SELECT 'invoices', type, COUNT(*), COALESCE(SUM(total), 0)
+    FROM invoices WHERE issue_date BETWEEN ? AND ?
+    GROUP BY type
+    UNION ALL
+    SELECT 'cash_journal', type, COUNT(*), COALESCE(SUM(amount), 0)
+    FROM cash_journal WHERE date BETWEEN ? AND ?
+    GROUP BY type
+""")
+
+TOP_CLIENTS_ROLLUP_SQL = register_query("analytics.rollup_top_clients", f"""
+    SELECT recipient, SUM(invoice_count), SUM(total) FROM client_monthly_totals
+    WHERE type IN ({_placeholders(ISSUED_INVOICE_TYPES)}) AND month BETWEEN ? AND ?
+    GROUP BY recipient
+""")
+TOP_CLIENTS_SQL = register_query("analytics.top_clients", f"""
+    SELECT COALESCE(recipient, ''), COUNT(*), COALESCE(SUM(total), 0) FROM invoices
+    WHERE type IN ({_placeholders(ISSUED_INVOICE_TYPES)}) AND issue_date BETWEEN ? AND ?
+    GROUP BY 1
+""")
+
+
+def _grouped_sums(cursor, sql, types, date_from, date_to):
+    """Jedna agregace zdroje po obdobích - vrací slovník období -> součet."""
+    cursor.execute(sql, (*types, date_from, date_to))
+    return dict(cursor.fetchall())
+
+
+def _monthly_sums(cursor, rollup_sql, month_sql, types, date_from, date_to):
+    """Součty po měsících: celé měsíce z rollupu, okraje ze zdrojové tabulky."""
+    full, edges = _month_span(date_from, date_to)
+    sums = {}
+    if full:
+        cursor.execute(rollup_sql, (*types, *full))
+        sums.update(cursor.fetchall())
+    for edge_from, edge_to in edges:
+        for month, amount in _grouped_sums(cursor, month_sql, types, edge_from, edge_to).items():
+            sums[month] = sums.get(month, 0) + amount
+    return sums
+
+
+def _to_periods(monthly, granularity):
+    """Přeskupí měsíční součty na čtvrtletí nebo roky."""
+    label = _PERIOD_LABEL[granularity]
+    result = {}
+    for month, amount in monthly.items():
+        period = label(date(int(month[:4]), int(month[5:7]), 1))
+        result[period] = result.get(period, 0) + amount
+    return result
+
+
+def aggregate_periods(date_from, date_to, granularity='month', conn=None):
+    """Příjmy, výdaje a zisk po obdobích.
+
+    Příjmy jsou vydané faktury, výdaje výdaje z pokladny. Vrací seznam
+    `(období, příjmy, výdaje, zisk)` včetně období bez pohybů. Týdny
+    se do měsíců nevejdou, proto se počítají přímo ze zdrojových tabulek.
+    """
+    if granularity not in _PERIOD_SQL:
+        raise ValueError(f"Neznámá granularita: {granularity}")
+
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        cursor = conn.cursor()
+        if granularity == 'week':
+            revenue = _grouped_sums(cursor, REVENUE_WEEK_SQL, ISSUED_INVOICE_TYPES, date_from, date_to)
+            expenses = _grouped_sums(cursor, EXPENSES_WEEK_SQL, CASH_EXPENSE_TYPES, date_from, date_to)
+        else:
+            revenue = _to_periods(_monthly_sums(cursor, REVENUE_ROLLUP_SQL, REVENUE_MONTH_SQL,
+                                                ISSUED_INVOICE_TYPES, date_from, date_to), granularity)
+            expenses = _to_periods(_monthly_sums(cursor, EXPENSES_ROLLUP_SQL, EXPENSES_MONTH_SQL,
+                                                 CASH_EXPENSE_TYPES, date_from, date_to), granularity)
+    finally:
+        if own_connection:
+            conn.close()
+
+    result = []
+    for label in period_labels(date_from, date_to, granularity):
+        period_revenue = revenue.get(label, 0)
+        period_expenses = expenses.get(label, 0)
+        result.append((label, period_revenue, period_expenses, period_revenue - period_expenses))
+    return result
+
+
+def category_summary(date_from, date_to, conn=None):
+    """Souhrn podle kategorií z rollupů (okraje rozsahu ze zdrojových tabulek).
+
+    Vrací seznam `(kategorie, počet, částka, podíl v %)`; podíl je
+    vztažen k celkovému objemu všech čtyř kategorií.
+    """
+    full, edges = _month_span(date_from, date_to)
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        cursor = conn.cursor()
+        rows = []
+        if full:
+            cursor.execute(CATEGORY_ROLLUP_SQL, (*full, *full))
+            rows.extend(cursor.fetchall())
+        for edge_from, edge_to in edges:
+            cursor.execute(CATEGORY_SQL, (edge_from, edge_to, edge_from, edge_to))
+            rows.extend(cursor.fetchall())
+    finally:
+        if own_connection:
+            conn.close()
+
+    categories = [
+        ("Vydané faktury", "invoices", ISSUED_INVOICE_TYPES),
+        ("Přijaté faktury", "invoices", RECEIVED_INVOICE_TYPES),
+        ("Příjmy pokladna", "cash_journal", CASH_INCOME_TYPES),
+        ("Výdaje pokladna", "cash_journal", CASH_EXPENSE_TYPES),
+    ]
+    totals = {name: [0, 0] for name, _, _ in categories}
+    for source, row_type, count, amount in rows:
+        for name, table, types in categories:
+            if source == table and row_type in types:
+                totals[name][0] += count
+                totals[name][1] += amount
+
+    grand_total = sum(abs(amount) for _, amount in totals.values())
+    summary = []
+    for name, _, _ in categories:
+        count, amount = totals[name]
+        share = abs(amount) / grand_total * 100 if grand_total else 0.0
+        summary.append((name, count, amount, share))
+    return summary
+
+
+def top_clients(date_from, date_to, limit=10, conn=None):
+    """Nejvýznamnější odběratelé podle vydaných faktur.
+
+    Vrací seznam `(odběratel, počet faktur, částka)` seřazený sestupně
+    podle částky.
+    """
+    full, edges = _month_span(date_from, date_to)
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        cursor = conn.cursor()
+        clients = {}
+        queries = []
+        if full:
+            queries.append((TOP_CLIENTS_ROLLUP_SQL, (*ISSUED_INVOICE_TYPES, *full)))
+        for edge_from, edge_to in edges:
+            queries.append((TOP_CLIENTS_SQL, (*ISSUED_INVOICE_TYPES, edge_from, edge_to)))
+        for sql, params in queries:
+            cursor.execute(sql, params)
+            for recipient, count, amount in cursor.fetchall():
+                totals = clients.setdefault(recipient, [0, 0])
+                totals[0] += count
+                totals[1] += amount
+    finally:
+        if own_connection:
+            conn.close()
+
+    ranked = sorted(clients.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [(recipient, count, amount) for recipient, (count, amount) in ranked]
+
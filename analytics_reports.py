@@ -4,11 +4,51 @@ from PyQt6.QtWidgets import (
     QTableWidgetItem, QMessageBox, QGroupBox, QTextEdit
 )
 from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QFont, QPainter
 from database import connect
+from analytics_engine import aggregate_periods, category_summary, top_clients
+from async_loader import AsyncLoader, bind_loading_indicator
+from report_engine import render_financial_report
+from xlsx_export import XlsxWorkbook, XlsxColumn, TABLE_EXPORTS, table_rows
 import sqlite3
 from datetime import datetime, timedelta
 
+def query_analytics(conn, date_from, date_to, granularity):
+    """Všechna data okna analýz (běží ve vlákně AsyncLoaderu)"""
+    return {
+        'summary': category_summary(date_from, date_to, conn),
+        'clients': top_clients(date_from, date_to, 10, conn),
+        'periods': aggregate_periods(date_from, date_to, granularity, conn),
+    }
+
+
+def export_analytics_workbook(conn, filename, date_from, date_to, granularity):
+    """Sešit XLSX s analýzou období; faktury a pokladna se streamují z databáze."""
+    summary = category_summary(date_from, date_to, conn)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT 'Majetek', COUNT(*), COALESCE(SUM(purchase_price), 0), NULL
+        FROM assets WHERE status = 'Aktivní'
+    """)
+    summary.extend(cursor.fetchall())
+
+    with XlsxWorkbook(filename) as workbook:
+        workbook.add_sheet("Souhrn", [
+            XlsxColumn("Kategorie", width=28), XlsxColumn("Počet", 'int'),
+            XlsxColumn("Částka", 'money'), XlsxColumn("Podíl", 'percent'),
+        ], summary)
+        workbook.add_sheet("Období", [
+            XlsxColumn("Období", width=12), XlsxColumn("Příjmy", 'money'),
+            XlsxColumn("Výdaje", 'money'), XlsxColumn("Zisk", 'money'),
+        ], aggregate_periods(date_from, date_to, granularity, conn))
+        workbook.add_sheet("Klienti", [
+            XlsxColumn("Klient", width=36), XlsxColumn("Faktur", 'int'), XlsxColumn("Obrat", 'money'),
+        ], top_clients(date_from, date_to, 50, conn))
+        for name in ('invoices', 'cash_journal'):
+            sheet, columns, _, _ = TABLE_EXPORTS[name]
+            workbook.add_sheet(sheet, columns, table_rows(conn, name, date_from, date_to))
+    return {'filename': filename}
+
+
 class AnalyticsReportsWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -44,6 +84,13 @@ class AnalyticsReportsWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
         
+        # Načítání dat na pozadí - změna filtrů zruší rozběhnutý výpočet
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self)
+        self.date_from.dateChanged.connect(self.load_analytics)
+        self.date_to.dateChanged.connect(self.load_analytics)
+        self.granularity_combo.currentIndexChanged.connect(self.load_analytics)
+
         # Načtení dat
         self.load_analytics()
 
@@ -110,6 +157,14 @@ class AnalyticsReportsWindow(QMainWindow):
         self.date_to.setCalendarPopup(True)
         filter_layout.addWidget(self.date_to)
         
+        # Granularita časového vývoje
+        filter_layout.addWidget(QLabel("Období:"))
+        self.granularity_combo = QComboBox()
+        for label, granularity in [("Měsíčně", "month"), ("Týdně", "week"),
+                                   ("Čtvrtletně", "quarter"), ("Ročně", "year")]:
+            self.granularity_combo.addItem(label, granularity)
+        filter_layout.addWidget(self.granularity_combo)
+        
         # Tlačítka
         refresh_btn = QPushButton("🔄 Aktualizovat")
         refresh_btn.clicked.connect(self.load_analytics)
@@ -160,7 +215,7 @@ class AnalyticsReportsWindow(QMainWindow):
         # Měsíční přehled
         self.monthly_table = QTableWidget(0, 4)
         self.monthly_table.setObjectName("dataTable")
-        self.monthly_table.setHorizontalHeaderLabels(["Měsíc", "Příjmy", "Výdaje", "Zisk"])
+        self.monthly_table.setHorizontalHeaderLabels(["Období", "Příjmy", "Výdaje", "Zisk"])
         right_layout.addWidget(QLabel("📅 Měsíční vývoj:"))
         right_layout.addWidget(self.monthly_table)
         
@@ -388,33 +443,26 @@ class AnalyticsReportsWindow(QMainWindow):
         """)
 
     def load_analytics(self):
-        """Načte analytická data"""
+        """Spustí načtení analytických dat na pozadí"""
+        date_from = self.date_from.date().toString("yyyy-MM-dd")
+        date_to = self.date_to.date().toString("yyyy-MM-dd")
+        granularity = self.granularity_combo.currentData() or "month"
+        self.loader.submit("analytics", query_analytics, date_from, date_to, granularity,
+                           on_done=self.show_analytics, on_error=self.show_load_error)
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání analýz: {str(error)}")
+
+    def show_analytics(self, data):
+        """Zobrazí načtená analytická data"""
         try:
-            date_from = self.date_from.date().toString("yyyy-MM-dd")
-            date_to = self.date_to.date().toString("yyyy-MM-dd")
+            # Souhrn podle kategorií slouží pro karty metrik i pro tabulku kategorií
+            summary = data['summary']
+            categories = {name: (count, amount) for name, count, amount, _ in summary}
             
-            cursor = self.db.cursor()
-            
-            # Celkové příjmy z faktur
-            cursor.execute("""
-                SELECT COALESCE(SUM(total), 0) FROM invoices 
-                WHERE issue_date BETWEEN ? AND ? AND type = 'vydaná'
-            """, (date_from, date_to))
-            total_revenue = cursor.fetchone()[0]
-            
-            # Celkové výdaje z pokladny
-            cursor.execute("""
-                SELECT COALESCE(SUM(amount), 0) FROM cash_journal 
-                WHERE date BETWEEN ? AND ? AND type = 'výdaj'
-            """, (date_from, date_to))
-            total_expenses = cursor.fetchone()[0]
-            
-            # Počet faktur
-            cursor.execute("""
-                SELECT COUNT(*) FROM invoices 
-                WHERE issue_date BETWEEN ? AND ?
-            """, (date_from, date_to))
-            invoice_count = cursor.fetchone()[0]
+            total_revenue = categories["Vydané faktury"][1]
+            total_expenses = categories["Výdaje pokladna"][1]
+            invoice_count = categories["Vydané faktury"][0] + categories["Přijaté faktury"][0]
             
             # Aktualizace karet
             profit = total_revenue - total_expenses
@@ -424,13 +472,13 @@ class AnalyticsReportsWindow(QMainWindow):
             self.update_metric_card(self.profit_card, f"{profit:,.2f} Kč")
             self.update_metric_card(self.invoices_card, str(invoice_count))
             
-            # Načtení detailních dat
-            self.load_summary_data(date_from, date_to)
-            self.load_top_clients(date_from, date_to)
-            self.load_monthly_data(date_from, date_to)
+            # Detailní tabulky
+            self.load_summary_data(None, None, summary)
+            self.load_top_clients(None, None, data['clients'])
+            self.load_monthly_data(None, None, data['periods'])
             
         except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při načítání analýz: {str(e)}")
+            QMessageBox.critical(self, "Chyba", f"Chyba při zobrazení analýz: {str(e)}")
     
     def update_metric_card(self, card, value):
         """Aktualizuje hodnotu v metrické kartě"""
@@ -444,40 +492,24 @@ class AnalyticsReportsWindow(QMainWindow):
         if value_label:
             value_label.setText(value)
     
-    def load_summary_data(self, date_from, date_to):
+    def load_summary_data(self, date_from, date_to, summary=None):
         """Načte souhrnná data podle kategorií"""
         try:
             # Blokujeme signály pro zabránění varování dataChanged
             self.summary_table.blockSignals(True)
             
-            cursor = self.db.cursor()
-            
-            # Data pro souhrn
-            summary_data = [
-                ("Vydané faktury", "invoices", "type = 'vydaná'", "total"),
-                ("Přijaté faktury", "invoices", "type = 'přijatá'", "total"),
-                ("Příjmy pokladna", "cash_journal", "type = 'příjem'", "amount"),
-                ("Výdaje pokladna", "cash_journal", "type = 'výdaj'", "amount"),
-            ]
+            if summary is None:
+                summary = category_summary(date_from, date_to, self.db)
             
             # Vyčistíme tabulku a nastavíme počet řádků
             self.summary_table.clearContents()
-            self.summary_table.setRowCount(len(summary_data))
-            
-            for row, (category, table, condition, amount_col) in enumerate(summary_data):
-                # Počet záznamů
-                cursor.execute(f"""
-                    SELECT COUNT(*), COALESCE(SUM({amount_col}), 0) 
-                    FROM {table} 
-                    WHERE date BETWEEN ? AND ? AND {condition}
-                """, (date_from, date_to))
-                
-                count, total = cursor.fetchone()
-                
+            self.summary_table.setRowCount(len(summary))
+            
+            for row, (category, count, total, share) in enumerate(summary):
                 self.summary_table.setItem(row, 0, QTableWidgetItem(category))
                 self.summary_table.setItem(row, 1, QTableWidgetItem(str(count)))
                 self.summary_table.setItem(row, 2, QTableWidgetItem(f"{total:,.2f} Kč"))
-                self.summary_table.setItem(row, 3, QTableWidgetItem("100%"))  # TODO: Vypočítat podíl
+                self.summary_table.setItem(row, 3, QTableWidgetItem(f"{share:.1f} %"))
             
         except Exception as e:
             print(f"Chyba při načítání souhrnu: {e}")
@@ -485,23 +517,14 @@ class AnalyticsReportsWindow(QMainWindow):
             # Obnovíme signály
             self.summary_table.blockSignals(False)
     
-    def load_top_clients(self, date_from, date_to):
+    def load_top_clients(self, date_from, date_to, clients=None):
         """Načte top klienty"""
         try:
             # Blokujeme signály pro zabránění varování dataChanged
             self.clients_table.blockSignals(True)
             
-            cursor = self.db.cursor()
-            cursor.execute("""
-                SELECT recipient, COUNT(*) as count, SUM(total) as total_amount
-                FROM invoices 
-                WHERE issue_date BETWEEN ? AND ? AND type = 'vydaná'
-                GROUP BY recipient 
-                ORDER BY total_amount DESC 
-                LIMIT 10
-            """, (date_from, date_to))
-            
-            clients = cursor.fetchall()
+            if clients is None:
+                clients = top_clients(date_from, date_to, 10, self.db)
             
             # Vyčistíme tabulku a nastavíme počet řádků
             self.clients_table.clearContents()
@@ -518,52 +541,12 @@ class AnalyticsReportsWindow(QMainWindow):
             # Obnovíme signály
             self.clients_table.blockSignals(False)
     
-    def load_monthly_data(self, date_from, date_to):
-        """Načte měsíční data"""
+    def load_monthly_data(self, date_from, date_to, months=None):
+        """Načte vývoj po obdobích (jeden seskupený dotaz na zdroj)"""
         try:
-            cursor = self.db.cursor()
-            
-            # Generování měsíců v rozsahu
-            from datetime import datetime
-            start_date = datetime.strptime(date_from, "%Y-%m-%d")
-            end_date = datetime.strptime(date_to, "%Y-%m-%d")
-            
-            months = []
-            current = start_date.replace(day=1)
-            
-            while current <= end_date:
-                month_start = current.strftime("%Y-%m-01")
-                if current.month == 12:
-                    month_end = current.replace(year=current.year + 1, month=1, day=1) - timedelta(days=1)
-                else:
-                    month_end = current.replace(month=current.month + 1) - timedelta(days=1)
-                month_end_str = month_end.strftime("%Y-%m-%d")
-                
-                # Příjmy
-                cursor.execute("""
-                    SELECT COALESCE(SUM(total), 0) FROM invoices 
-                    WHERE issue_date BETWEEN ? AND ? AND type = 'vydaná'
-                """, (month_start, month_end_str))
-                revenue = cursor.fetchone()[0]
-                
-                # Výdaje
-                cursor.execute("""
-                    SELECT COALESCE(SUM(amount), 0) FROM cash_journal 
-                    WHERE date BETWEEN ? AND ? AND type = 'výdaj'
-                """, (month_start, month_end_str))
-                expenses = cursor.fetchone()[0]
-                
-                months.append((
-                    current.strftime("%Y-%m"),
-                    revenue,
-                    expenses,
-                    revenue - expenses
-                ))
-                
-                if current.month == 12:
-                    current = current.replace(year=current.year + 1, month=1)
-                else:
-                    current = current.replace(month=current.month + 1)
+            if months is None:
+                granularity = self.granularity_combo.currentData() or "month"
+                months = aggregate_periods(date_from, date_to, granularity, self.db)
             
             # Zobrazení v tabulce
             # Blokujeme signály pro zabránění varování dataChanged
@@ -586,136 +569,61 @@ class AnalyticsReportsWindow(QMainWindow):
             print(f"Chyba při načítání měsíčních dat: {e}")
     
     def export_to_excel(self):
-        """Export do Excel"""
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            import csv
-            from datetime import datetime
-            
-            # Výběr souboru
-            filename, _ = QFileDialog.getSaveFileName(
-                self, 
-                "Uložit Excel export",
-                f"analyza_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                "CSV soubory (*.csv)"
-            )
-            
-            if filename:
-                cursor = self.db.cursor()
-                
-                # Získání dat pro export
-                cursor.execute("""
-                    SELECT 'Faktury' as typ, COUNT(*) as pocet, SUM(total) as suma
-                    FROM invoices
-                    UNION ALL
-                    SELECT 'Příjmy', COUNT(*), SUM(amount) 
-                    FROM cash_journal WHERE type = 'Příjem'
-                    UNION ALL  
-                    SELECT 'Výdaje', COUNT(*), SUM(amount)
-                    FROM cash_journal WHERE type = 'Výdaj'
-                    UNION ALL
-                    SELECT 'Majetek', COUNT(*), SUM(purchase_price)
-                    FROM assets WHERE status = 'Aktivní'
-                """)
-                data = cursor.fetchall()
-                
-                # Zápis do CSV
-                with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile, delimiter=';')
-                    writer.writerow(['Typ', 'Počet', 'Celková částka'])
-                    writer.writerows(data)
-                    
-                    # Prázdný řádek a datum exportu
-                    writer.writerow([])
-                    writer.writerow(['Export vytvořen:', datetime.now().strftime('%d.%m.%Y %H:%M')])
-                
-                QMessageBox.information(self, "✅ Úspěch", f"Data byla exportována do:\n{filename}")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při exportu: {str(e)}")
+        """Export do Excel - sešit XLSX za zvolené období se vytváří na pozadí"""
+        from PyQt6.QtWidgets import QFileDialog
+        
+        # Výběr souboru
+        filename, _ = QFileDialog.getSaveFileName(
+            self, 
+            "Uložit Excel export",
+            f"analyza_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            "Excel sešity (*.xlsx)"
+        )
+        
+        if filename:
+            date_from = self.date_from.date().toString("yyyy-MM-dd")
+            date_to = self.date_to.date().toString("yyyy-MM-dd")
+            granularity = self.granularity_combo.currentData() or "month"
+            self.loader.submit("excel_export", export_analytics_workbook, filename, date_from, date_to, granularity,
+                               on_done=self.excel_export_finished, on_error=self.show_export_error)
+
+    def excel_export_finished(self, stats):
+        QMessageBox.information(self, "✅ Úspěch", f"Data byla exportována do:\n{stats['filename']}")
+
+    def show_export_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při exportu: {str(error)}")
     
     def export_to_pdf(self):
-        """Export do PDF"""
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            from PyQt6.QtGui import QPainter, QFont
-            from PyQt6.QtPrintSupport import QPrinter
-            from datetime import datetime
-            
-            # Výběr souboru
-            filename, _ = QFileDialog.getSaveFileName(
-                self, 
-                "Uložit PDF report",
-                f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                "PDF soubory (*.pdf)"
-            )
-            
-            if filename:
-                cursor = self.db.cursor()
-                
-                # Získání dat
-                cursor.execute("""
-                    SELECT COUNT(*) as pocet_faktur, SUM(total) as suma_faktur
-                    FROM invoices
-                """)
-                invoice_data = cursor.fetchone()
-                
-                cursor.execute("""
-                    SELECT SUM(amount) as prijem
-                    FROM cash_journal WHERE type = 'Příjem'
-                """)
-                income = cursor.fetchone()[0] or 0
-                
-                cursor.execute("""
-                    SELECT SUM(amount) as vydaj  
-                    FROM cash_journal WHERE type = 'Výdaj'
-                """)
-                expense = cursor.fetchone()[0] or 0
-                
-                # Vytvoření PDF
-                printer = QPrinter()
-                printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-                printer.setOutputFileName(filename)
-                
-                painter = QPainter()
-                painter.begin(printer)
-                
-                # Fonty
-                title_font = QFont("Arial", 16, QFont.Weight.Bold)
-                normal_font = QFont("Arial", 12)
-                
-                y = 100
-                
-                # Nadpis
-                painter.setFont(title_font)
-                painter.drawText(100, y, "Finanční report - Projekt & Develop s.r.o.")
-                y += 80
-                
-                # Datum
-                painter.setFont(normal_font)
-                painter.drawText(100, y, f"Vytvořeno: {datetime.now().strftime('%d.%m.%Y %H:%M')}")
-                y += 60
-                
-                # Data
-                painter.drawText(100, y, f"Počet faktur: {invoice_data[0] or 0}")
-                y += 40
-                painter.drawText(100, y, f"Celkový obrat: {invoice_data[1] or 0:,.2f} Kč")
-                y += 40
-                painter.drawText(100, y, f"Příjmy pokladny: {income:,.2f} Kč")
-                y += 40
-                painter.drawText(100, y, f"Výdaje pokladny: {expense:,.2f} Kč")
-                y += 40
-                painter.drawText(100, y, f"Zisk/ztráta: {income - expense:,.2f} Kč")
-                
-                painter.end()
-                
-                QMessageBox.information(self, "✅ Úspěch", f"PDF report byl vytvořen:\n{filename}")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při vytváření PDF: {str(e)}")
+        """Export do PDF - stránkovaný report za zvolené období se vytváří na pozadí"""
+        from PyQt6.QtWidgets import QFileDialog
+        
+        # Výběr souboru
+        filename, _ = QFileDialog.getSaveFileName(
+            self, 
+            "Uložit PDF report",
+            f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            "PDF soubory (*.pdf)"
+        )
+        
+        if filename:
+            date_from = self.date_from.date().toString("yyyy-MM-dd")
+            date_to = self.date_to.date().toString("yyyy-MM-dd")
+            granularity = self.granularity_combo.currentData() or "month"
+            self.loader.submit("pdf_report", render_financial_report, filename, date_from, date_to, granularity,
+                               on_done=self.pdf_report_finished, on_error=self.show_pdf_error)
+
+    def pdf_report_finished(self, stats):
+        QMessageBox.information(
+            self, "✅ Úspěch",
+            f"PDF report byl vytvořen:\n{stats['filename']}\n\nStran: {stats['pages']}, řádků: {stats['rows']}"
+        )
+
+    def show_pdf_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při vytváření PDF: {str(error)}")
 
     def closeEvent(self, event):
-        """Uzavře databázové připojení při zavření okna"""
+        """Zruší načítání a uzavře databázové připojení při zavření okna"""
+        self.loader.cancel_all()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Údržba rollup tabulek analýz (monthly_revenue, client_monthly_totals, monthly_cash,
+monthly_fuel).
+
+Rollupy průběžně udržují triggery v databázi. Tento modul je umí přepočítat
+ze zdrojových dat a ověřit, že s nimi souhlasí. Použití:
+
+    python analytics_rollups.py --check     # kontrola konzistence
+    python analytics_rollups.py --rebuild   # přepočet všech rollupů
+"""
+
+import sys
+
+from database import ROLLUPS, rollup_select_sql, rebuild_rollups, connect, transaction
+
+
+def check_rollups(conn=None):
+    """Porovná rollupy s agregací zdrojových tabulek.
+
+    Vrací slovník `tabulka -> počet nesouhlasících skupin` (0 = v pořádku).
+    Částky se porovnávají zaokrouhlené na haléře.
+    """
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        cursor = conn.cursor()
+        result = {}
+        for rollup in ROLLUPS:
+            columns = ['month'] + rollup['keys'] + [rollup['count']] + rollup['sums']
+            stored = ", ".join(
+                f"ROUND({col}, 2)" if col in rollup['sums'] else col for col in columns
+            )
+            expected_columns = ", ".join(
+                f"ROUND(c{i}, 2)" if i > len(rollup['keys']) + 1 else f"c{i}"
+                for i in range(len(columns))
+            )
+            aliased = ", ".join(f"c{i}" for i in range(len(columns)))
+            expected = (
+                f"SELECT {expected_columns} FROM "
+                f"(WITH src({aliased}) AS ({rollup_select_sql(rollup)}) SELECT * FROM src)"
+            )
+            actual = f"SELECT {stored} FROM {rollup['table']}"
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM (
+                    SELECT * FROM ({expected} EXCEPT {actual})
+                    UNION ALL
+                    SELECT * FROM ({actual} EXCEPT {expected})
+                )
+            """)
+            result[rollup['table']] = cursor.fetchone()[0]
+        return result
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def rebuild():
+    """Přepočítá rollupy v jedné transakci."""
+    with transaction() as conn:
+        rebuild_rollups(conn.cursor())
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--rebuild" in argv:
+        rebuild()
+        print("✅ Rollup tabulky přepočítány")
+
+    problems = 0
+    for table, mismatches in check_rollups().items():
+        if mismatches:
+            problems += 1
+            print(f"⚠️  {table}: {mismatches} nesouhlasících skupin")
+        else:
+            print(f"✅ {table}")
+    if problems:
+        print("💡 Opravíte je příkazem: python analytics_rollups.py --rebuild")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
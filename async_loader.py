@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Asynchronní načítání dat pro okna aplikace.
+
+Dotaz běží v `QThreadPool` s vlastním připojením vlákna (viz
+`database.ConnectionPool`), výsledek se do hlavního vlákna doručí signálem.
+Každé načítání má klíč - nový požadavek se stejným klíčem zruší předchozí,
+takže při rychlé změně filtrů se zobrazí jen poslední výsledek. Běžící dotaz
+se přeruší přes `sqlite3.Connection.interrupt()`.
+
+Použití v okně:
+
+    self.loader = AsyncLoader(self)
+    bind_loading_indicator(self.loader, self, [self.table])
+    ...
+    self.loader.submit("events", query_events, date_from, date_to,
+                       on_done=self.show_events, on_error=self.show_error)
+
+Funkce dotazu dostane jako první argument připojení a nesmí pracovat s widgety.
+
+Zápisy (importy) se spouští s `writes=True`. Takovou úlohu `cancel_all()`
+nepřeruší - rozepsaný import by zůstal uložený jen z části. Okno ji má
+při zavření nechat doběhnout (`is_writing()`).
+"""
+
+import threading
+import sqlite3
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from database import connect
+
+
+class _TaskSignals(QObject):
+    """Signály úlohy (QRunnable sám signály mít nemůže)"""
+    done = pyqtSignal(object)
+
+
+class QueryTask(QRunnable):
+    """Jeden dotaz spuštěný ve vlákně poolu"""
+
+    def __init__(self, key, fn, args, writes=False):
+        super().__init__()
+        # Úlohu drží AsyncLoader až do doručení výsledku, pool ji nemaže
+        self.setAutoDelete(False)
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.writes = writes
+        self.result = None
+        self.error = None
+        self.signals = _TaskSignals()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Zruší úlohu; běžící SQL příkaz přeruší."""
+        self._cancelled.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self):
+        if not self.cancelled:
+            conn = connect()
+            with self._lock:
+                self._conn = conn
+            try:
+                self.result = self.fn(conn, *self.args)
+            except sqlite3.OperationalError as e:
+                # Přerušení zrušeného dotazu není chyba
+                if not self.cancelled:
+                    self.error = e
+            except Exception as e:
+                self.error = e
+            finally:
+                with self._lock:
+                    self._conn = None
+                conn.close()
+        self.signals.done.emit(self)
+
+
+class AsyncLoader(QObject):
+    """Spouští dotazy na pozadí a doručuje jen aktuální výsledky"""
+
+    # True při běhu alespoň jednoho načítání, False po dokončení všech
+    loading_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, thread_pool=None):
+        super().__init__(parent)
+        self._thread_pool = thread_pool or QThreadPool.globalInstance()
+        self._active = {}      # klíč -> aktuální úloha
+        self._callbacks = {}   # klíč -> (on_done, on_error)
+        self._running = set()  # všechny běžící úlohy včetně zrušených
+        self._loading = False
+
+    def submit(self, key, fn, *args, on_done, on_error=None, writes=False):
+        """Spustí `fn(conn, *args)` na pozadí; starší požadavek s klíčem zruší.
+
+        `writes=True` označí zápis, který `cancel_all()` nepřeruší.
+        """
+        self._drop(key)
+
+        task = QueryTask(key, fn, args, writes)
+        task.signals.done.connect(self._on_task_done)
+        self._active[key] = task
+        self._callbacks[key] = (on_done, on_error)
+        self._running.add(task)
+        self._update_loading()
+        self._thread_pool.start(task)
+        return task
+
+    def cancel(self, key):
+        """Zruší načítání s daným klíčem (výsledek se nedoručí)."""
+        self._drop(key)
+        self._update_loading()
+
+    def cancel_all(self):
+        """Zruší všechna načítání kromě zápisů - volá se při zavření okna."""
+        for key, task in list(self._active.items()):
+            if not task.writes:
+                self.cancel(key)
+
+    def is_writing(self):
+        """Běží zápis, který se nesmí přerušit?"""
+        return any(task.writes for task in self._active.values())
+
+    def _drop(self, key):
+        task = self._active.pop(key, None)
+        self._callbacks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def is_loading(self, key=None):
+        if key is None:
+            return bool(self._active)
+        return key in self._active
+
+    def _on_task_done(self, task):
+        self._running.discard(task)
+        if task.cancelled or self._active.get(task.key) is not task:
+            return
+
+        del self._active[task.key]
+        on_done, on_error = self._callbacks.pop(task.key)
+        self._update_loading()
+
+        if task.error is None:
+            on_done(task.result)
+        elif on_error is not None:
+            on_error(task.error)
+        else:
+            print(f"❌ Chyba při načítání '{task.key}': {task.error}")
+
+    def _update_loading(self):
+        loading = bool(self._active)
+        if loading != self._loading:
+            self._loading = loading
+            self.loading_changed.emit(loading)
+
+
+def bind_loading_indicator(loader, window, widgets=(), message="⏳ Načítám data..."):
+    """Zobrazí stav načítání ve stavovém řádku okna a zneaktivní widgety."""
+    def on_loading_changed(loading):
+        if loading:
+            window.statusBar().showMessage(message)
+        else:
+            window.statusBar().clearMessage()
+        for widget in widgets:
+            widget.setEnabled(not loading)
+
+    loader.loading_changed.connect(on_loading_changed)
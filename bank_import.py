@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hromadný import bankovních výpisů do pokladního deníku.
+
+Podporované formáty:
+- CSV s hlavičkou (oddělovač `;`, `,` nebo tabulátor, UTF-8 nebo CP1250),
+  sloupce se hledají podle názvu - viz `CSV_COLUMNS`
+- GPC/ABO (formát českých bank, záznamy 074/075, texty 078/079)
+
+Soubor se čte po řádcích, pohyby se zpracovávají po dávkách. Duplicitu
+pozná otisk pohybu (`cash_journal.import_hash`, unikátní index), takže
+opakovaný import stejného výpisu nic nepřidá. Vše se vloží v jedné
+transakci a zůstatky se přepočítají jednou na konci. Použití:
+
+    python bank_import.py vypis.gpc --dry-run   # jen náhled a statistika
+    python bank_import.py vypis.csv             # import
+"""
+
+import csv
+import sys
+import hashlib
+import itertools
+import io
+import os
+from datetime import datetime
+
+from database import connect, transaction
+from cash_balance import recalculate
+
+# Počet pohybů zpracovaných jedním dotazem na duplicity a jedním executemany
+BATCH_SIZE = 500
+
+# Počet pohybů v náhledu
+PREVIEW_ROWS = 20
+
+# Názvy sloupců CSV (malými písmeny) -> pole pohybu
+CSV_COLUMNS = {
+    'date': ('datum', 'datum zaúčtování', 'datum pohybu', 'datum provedení', 'datum splatnosti', 'date'),
+    'amount': ('částka', 'objem', 'částka v měně účtu', 'amount'),
+    'person': ('protistrana', 'název protiúčtu', 'název protistrany', 'název účtu protistrany',
+               'příjemce', 'plátce', 'counterparty'),
+    'account': ('protiúčet', 'číslo protiúčtu', 'účet protistrany'),
+    'note': ('poznámka', 'zpráva pro příjemce', 'zpráva', 'popis', 'popis transakce', 'note'),
+    'reference': ('id pohybu', 'id transakce', 'identifikace transakce', 'reference'),
+    'vs': ('vs', 'variabilní symbol'),
+}
+
+_DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d', '%d.%m.%y', '%d/%m/%Y')
+
+
+class StatementError(ValueError):
+    """Chyba ve formátu výpisu (celý soubor nelze zpracovat)"""
+
+
+# --- Pomocné převody -------------------------------------------------
+
+def parse_amount(text):
+    """Převede částku z výpisu ("-1 234,50 CZK", "1.234,50", "1234.5")."""
+    cleaned = "".join(ch for ch in text if ch.isdigit() or ch in ",.-+")
+    if not cleaned or not any(ch.isdigit() for ch in cleaned):
+        raise ValueError(f"neplatná částka '{text}'")
+    if "," in cleaned and "." in cleaned:
+        # Desetinný oddělovač je ten poslední, druhý odděluje tisíce
+        if cleaned.rfind(",") > cleaned.rfind("."):
+            cleaned = cleaned.replace(".", "").replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    else:
+        cleaned = cleaned.replace(",", ".")
+    return float(cleaned)
+
+
+def parse_date(text):
+    """Převede datum z výpisu na YYYY-MM-DD."""
+    value = text.strip().replace(" ", "")
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"neplatné datum '{text}'")
+
+
+def open_text(path):
+    """Otevře soubor jako text - UTF-8, jinak CP1250 (běžné u bank)."""
+    raw = open(path, 'rb')
+    head = raw.read(65536)
+    encoding = 'utf-8-sig'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Chyba těsně na konci ukázky může být jen rozdělený znak
+        if e.start < len(head) - 3:
+            encoding = 'cp1250'
+    raw.seek(0)
+    return io.TextIOWrapper(raw, encoding=encoding, newline='')
+
+
+def detect_format(path):
+    """Vrátí 'gpc' nebo 'csv' podle přípony, případně prvního řádku."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.gpc', '.abo'):
+        return 'gpc'
+    if extension == '.csv':
+        return 'csv'
+    with open_text(path) as stream:
+        first_line = stream.readline()
+    return 'gpc' if first_line.startswith('074') else 'csv'
+
+
+# --- Parsery (generátory pohybů) -------------------------------------
+
+def _movement(line, date, amount, person="", note="", reference="", account=""):
+    return {
+        'line': line,
+        'date': date,
+        'amount': amount,
+        'person': person.strip(),
+        'note': note.strip(),
+        'reference': reference.strip(),
+        'account': account.strip(),
+    }
+
+
+def parse_csv(stream):
+    """Pohyby z CSV výpisu. Chybné řádky vrací jako `{'line', 'error'}`."""
+    header_line = stream.readline()
+    if not header_line.strip():
+        raise StatementError("CSV soubor je prázdný")
+    delimiter = max(';,\t', key=header_line.count)
+
+    reader = csv.reader(itertools.chain([header_line], stream), delimiter=delimiter)
+    header = [name.strip().lower() for name in next(reader)]
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in header:
+                columns[field] = header.index(name)
+                break
+    missing = [field for field in ('date', 'amount') if field not in columns]
+    if missing:
+        raise StatementError(f"CSV neobsahuje sloupec: {', '.join(missing)}")
+
+    def value(row, field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else ""
+
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            note = value(row, 'note')
+            vs = value(row, 'vs').strip().lstrip("0")
+            if vs:
+                note = f"{note} VS {vs}".strip()
+            yield _movement(
+                line_no, parse_date(value(row, 'date')), parse_amount(value(row, 'amount')),
+                value(row, 'person') or value(row, 'account'), note,
+                value(row, 'reference'), value(row, 'account')
+            )
+        except ValueError as e:
+            yield {'line': line_no, 'error': str(e)}
+
+
+def parse_gpc(stream):
+    """Pohyby z výpisu GPC/ABO (záznamy 075, texty ze záznamů 078/079)."""
+    pending = None
+    for line_no, line in enumerate(stream, start=1):
+        line = line.rstrip("\r\n")
+        record = line[:3]
+
+        if record in ('078', '079'):
+            # Doplňující texty patří k předchozímu pohybu
+            if pending is not None and 'error' not in pending:
+                text = line[3:].strip()
+                if text:
+                    pending['note'] = f"{pending['note']} {text}".strip()
+            continue
+
+        if pending is not None:
+            yield pending
+            pending = None
+
+        if record != '075':
+            continue
+        try:
+            if len(line) < 97:
+                raise ValueError("příliš krátký záznam 075")
+            amount = int(line[48:60]) / 100
+            # Kód účtování: 1 debet, 2 kredit, 4 storno debetu, 5 storno kreditu
+            if line[60] in ('1', '5'):
+                amount = -amount
+            date_text = line[122:128].strip() or line[91:97].strip()
+            date = datetime.strptime(date_text, "%d%m%y").strftime("%Y-%m-%d")
+            account = line[19:35].strip().lstrip("0")
+            vs = line[61:71].strip().lstrip("0")
+            pending = _movement(
+                line_no, date, amount,
+                line[97:117].strip() or account, f"VS {vs}" if vs else "",
+                line[35:48], account
+            )
+        except ValueError as e:
+            pending = {'line': line_no, 'error': str(e)}
+
+    if pending is not None:
+        yield pending
+
+
+def parse_statement(path, statement_format=None):
+    """Generátor pohybů ze souboru výpisu."""
+    statement_format = statement_format or detect_format(path)
+    parser = parse_gpc if statement_format == 'gpc' else parse_csv
+    with open_text(path) as stream:
+        yield from parser(stream)
+
+
+# --- Import ----------------------------------------------------------
+
+def movement_hash(movement, occurrence=0):
+    """Otisk pohybu pro kontrolu duplicit.
+
+    Má-li pohyb identifikátor banky, stačí ten. Jinak se skládá z údajů
+    pohybu a pořadí stejného pohybu v souboru (dvě stejné platby v jeden
+    den jsou dva pohyby).
+    """
+    if movement['reference']:
+        key = f"ref|{movement['account']}|{movement['reference']}"
+    else:
+        key = "|".join([
+            movement['date'], f"{movement['amount']:.2f}", movement['person'],
+            movement['note'], movement['account'], str(occurrence)
+        ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _new_stats(statement_format, dry_run):
+    return {
+        'format': statement_format,
+        'dry_run': dry_run,
+        'read': 0,
+        'imported': 0,
+        'duplicates': 0,
+        'errors': [],
+        'income': 0.0,
+        'expenses': 0.0,
+        'date_from': None,
+        'date_to': None,
+        'preview': [],
+        'balance': None,
+    }
+
+
+def _flush(cursor, batch, stats, dry_run):
+    """Vyřadí duplicity dávky (jeden dotaz přes index) a vloží nové pohyby."""
+    if not batch:
+        return
+    hashes = [row[-1] for row in batch]
+    cursor.execute(
+        f"SELECT import_hash FROM cash_journal WHERE import_hash IN ({', '.join('?' for _ in hashes)})",
+        hashes
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    new_rows = [row for row in batch if row[-1] not in existing]
+    stats['duplicates'] += len(batch) - len(new_rows)
+
+    if not dry_run:
+        cursor.executemany("""
+            INSERT INTO cash_journal (type, date, person, amount, note, import_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, new_rows)
+
+    for entry_type, date, person, amount, note, _ in new_rows:
+        stats['imported'] += 1
+        if entry_type == "Příjem":
+            stats['income'] += amount
+        else:
+            stats['expenses'] += amount
+        if stats['date_from'] is None or date < stats['date_from']:
+            stats['date_from'] = date
+        if stats['date_to'] is None or date > stats['date_to']:
+            stats['date_to'] = date
+        if len(stats['preview']) < PREVIEW_ROWS:
+            stats['preview'].append((entry_type, date, person, amount, note))
+
+
+def _import(cursor, movements, stats, dry_run):
+    occurrences = {}
+    seen = set()
+    batch = []
+    for movement in movements:
+        if 'error' in movement:
+            stats['errors'].append((movement['line'], movement['error']))
+            continue
+        stats['read'] += 1
+
+        base = (movement['date'], movement['amount'], movement['person'], movement['note'])
+        occurrence = occurrences.get(base, 0)
+        occurrences[base] = occurrence + 1
+        import_hash = movement_hash(movement, occurrence)
+        if import_hash in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(import_hash)
+
+        entry_type = "Příjem" if movement['amount'] >= 0 else "Výdaj"
+        batch.append((
+            entry_type, movement['date'], movement['person'] or "Banka",
+            abs(movement['amount']), movement['note'], import_hash
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _flush(cursor, batch, stats, dry_run)
+            batch = []
+    _flush(cursor, batch, stats, dry_run)
+
+
+def import_statement(path, dry_run=False, statement_format=None):
+    """Naimportuje výpis do pokladního deníku.
+
+    Při `dry_run` se nic nezapíše - statistika a náhled ukazují, co by se
+    importovalo. Vrací slovník se statistikou importu.
+    """
+    statement_format = statement_format or detect_format(path)
+    stats = _new_stats(statement_format, dry_run)
+    movements = parse_statement(path, statement_format)
+
+    if dry_run:
+        conn = connect()
+        try:
+            _import(conn.cursor(), movements, stats, dry_run=True)
+        finally:
+            conn.close()
+        return stats
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        _import(cursor, movements, stats, dry_run=False)
+        if stats['imported']:
+            # Kontrolní body zůstatku jednou na konci, od nejstaršího importovaného pohybu
+            stats['balance'] = recalculate(cursor, stats['date_from'])
+    return stats
+
+
+def format_stats(stats, preview=True):
+    """Textový souhrn importu pro dialog i konzoli."""
+    action = "K importu" if stats['dry_run'] else "Importováno"
+    lines = [
+        f"Formát: {stats['format'].upper()}",
+        f"Načteno pohybů: {stats['read']}",
+        f"{action}: {stats['imported']}",
+        f"Duplicity (přeskočeno): {stats['duplicates']}",
+        f"Chybné řádky: {len(stats['errors'])}",
+        f"Příjmy: {stats['income']:,.2f} Kč",
+        f"Výdaje: {stats['expenses']:,.2f} Kč",
+    ]
+    if stats['date_from']:
+        lines.append(f"Období: {stats['date_from']} - {stats['date_to']}")
+    for line_no, message in stats['errors'][:5]:
+        lines.append(f"  řádek {line_no}: {message}")
+    if preview and stats['preview']:
+        lines.append("")
+        for entry_type, date, person, amount, note in stats['preview'][:10]:
+            lines.append(f"{date}  {entry_type:<7} {amount:>12,.2f}  {person}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    paths = [arg for arg in argv if not arg.startswith("--")]
+    if not paths:
+        print("Použití: python bank_import.py VÝPIS [--dry-run]")
+        return 2
+    try:
+        stats = import_statement(paths[0], dry_run="--dry-run" in argv)
+    except (OSError, StatementError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(format_stats(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
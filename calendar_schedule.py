@@ -4,10 +4,46 @@ from PyQt6.QtWidgets import (
     QTableWidgetItem, QMessageBox, QDialog, QFormLayout, QLineEdit, QTextEdit,
     QTimeEdit, QCheckBox, QSpinBox
 )
-from PyQt6.QtCore import Qt, QDate, QTime, QTimer
+from PyQt6.QtCore import Qt, QDate, QTime
 from PyQt6.QtGui import QFont
-from database import connect
-from datetime import datetime, timedelta
+from database import connect, register_query
+from async_loader import AsyncLoader, bind_loading_indicator
+from reminder_scheduler import ReminderScheduler
+
+# Nejvýše tolik připomínek se vypíše v jednom okně
+MAX_REMINDERS_SHOWN = 10
+
+
+# Události v rozsahu; filtry typu a stavu se přidávají podle výběru
+EVENTS_SQL = """
+    SELECT id, title, event_type, event_date, event_time, status, description
+    FROM calendar_events
+    WHERE event_date BETWEEN ? AND ?
+"""
+EVENTS_ORDER = " ORDER BY event_date, event_time"
+
+register_query("calendar.events", EVENTS_SQL + EVENTS_ORDER)
+
+
+def query_events(conn, date_from, date_to, type_filter, status_filter):
+    """Události v rozsahu podle filtrů (běží ve vlákně AsyncLoaderu)."""
+    query = EVENTS_SQL
+    params = [date_from, date_to]
+    
+    if type_filter != "Všechny":
+        query += " AND event_type = ?"
+        params.append(type_filter)
+        
+    if status_filter != "Všechny":
+        query += " AND status = ?"
+        params.append(status_filter)
+        
+    query += EVENTS_ORDER
+    
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
 
 class CalendarScheduleWindow(QMainWindow):
     def __init__(self):
@@ -44,13 +80,16 @@ class CalendarScheduleWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
         
+        # Načítání dat na pozadí
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self)
+
         # Načtení dat
         self.load_events()
         
-        # Timer pro kontrolu připomínek
-        self.reminder_timer = QTimer()
-        self.reminder_timer.timeout.connect(self.check_reminders)
-        self.reminder_timer.start(60000)  # Každou minutu
+        # Připomínky - časovač na nejbližší připomenutí, jen při otevřeném okně
+        self.reminders = ReminderScheduler(self, on_due=self.show_reminders)
+        self.reminders.start()
 
     def create_header(self, layout):
         """Vytvoří moderní hlavičku"""
@@ -383,44 +422,28 @@ class CalendarScheduleWindow(QMainWindow):
         """)
 
     def load_events(self):
-        """Načte události z databáze a zobrazí v tabulce."""
-        try:
-            date_from = self.date_from.date().toString("yyyy-MM-dd")
-            date_to = self.date_to.date().toString("yyyy-MM-dd")
-            type_filter = self.type_filter.currentText()
-            status_filter = self.status_filter.currentText()
-            
-            cursor = self.db.cursor()
-            
-            query = """
-                SELECT id, title, event_type, event_date, event_time, status, description 
-                FROM calendar_events 
-                WHERE event_date BETWEEN ? AND ?
-            """
-            params = [date_from, date_to]
-            
-            if type_filter != "Všechny":
-                query += " AND event_type = ?"
-                params.append(type_filter)
-                
-            if status_filter != "Všechny":
-                query += " AND status = ?"
-                params.append(status_filter)
-                
-            query += " ORDER BY event_date, event_time"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+        """Spustí načtení událostí podle filtrů na pozadí.
 
-            self.table.setRowCount(len(rows))
-            for row_idx, row in enumerate(rows):
-                for col_idx, value in enumerate(row):
-                    self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value) if value else ""))
-                    
-        except Exception as e:
-            # Tabulka ještě neexistuje, vytvoříme ji
-            self.create_calendar_table()
-            QMessageBox.information(self, "Info", "Kalendářová tabulka byla vytvořena. Zkuste znovu.")
+        Rychlá změna filtrů (např. datumů) zruší předchozí rozběhnutý dotaz.
+        """
+        self.loader.submit(
+            "events", query_events,
+            self.date_from.date().toString("yyyy-MM-dd"),
+            self.date_to.date().toString("yyyy-MM-dd"),
+            self.type_filter.currentText(),
+            self.status_filter.currentText(),
+            on_done=self.show_events, on_error=self.show_load_error
+        )
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání událostí: {str(error)}")
+
+    def show_events(self, rows):
+        """Zobrazí načtené události v tabulce."""
+        self.table.setRowCount(len(rows))
+        for row_idx, row in enumerate(rows):
+            for col_idx, value in enumerate(row):
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value) if value else ""))
 
     def create_calendar_table(self):
         """Vytvoří tabulku pro kalendář v databázi"""
@@ -468,7 +491,9 @@ class CalendarScheduleWindow(QMainWindow):
                     dialog.reminder_spin.value(),
                     "Plánováno"
                 ))
+                event_id = cursor.lastrowid
                 self.db.commit()
+                self.reminders.refresh_event(event_id)
                 self.load_events()
                 QMessageBox.information(self, "Úspěch", "Událost byla úspěšně přidána!")
             except Exception as e:
@@ -503,7 +528,7 @@ class CalendarScheduleWindow(QMainWindow):
                         cursor.execute("""
                             UPDATE calendar_events 
                             SET title = ?, description = ?, event_type = ?, event_date = ?, 
-                                event_time = ?, reminder_minutes = ?
+                                event_time = ?, reminder_minutes = ?, reminder_sent = 0
                             WHERE id = ?
                         """, (
                             dialog.title_edit.text(),
@@ -515,6 +540,7 @@ class CalendarScheduleWindow(QMainWindow):
                             event_id
                         ))
                         self.db.commit()
+                        self.reminders.refresh_event(event_id)
                         self.load_events()
                         QMessageBox.information(self, "Úspěch", "Událost byla úspěšně upravena!")
                     except Exception as e:
@@ -542,6 +568,7 @@ class CalendarScheduleWindow(QMainWindow):
                     cursor = self.db.cursor()
                     cursor.execute("DELETE FROM calendar_events WHERE id = ?", (event_id,))
                     self.db.commit()
+                    self.reminders.remove_event(event_id)
                     self.load_events()
                     QMessageBox.information(self, "Úspěch", "Událost byla úspěšně smazána!")
                 except Exception as e:
@@ -558,6 +585,7 @@ class CalendarScheduleWindow(QMainWindow):
                 cursor = self.db.cursor()
                 cursor.execute("UPDATE calendar_events SET status = 'Dokončeno' WHERE id = ?", (event_id,))
                 self.db.commit()
+                self.reminders.remove_event(event_id)
                 self.load_events()
                 QMessageBox.information(self, "Úspěch", "Událost byla označena jako dokončená!")
             except Exception as e:
@@ -647,39 +675,25 @@ class CalendarScheduleWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při načítání týdenního přehledu: {str(e)}")
 
-    def check_reminders(self):
-        """Kontroluje připomínky každou minutu."""
-        try:
-            cursor = self.db.cursor()
-            now = datetime.now()
-            
-            # Kontrola událostí s připomínkami
-            cursor.execute("""
-                SELECT id, title, event_date, event_time, reminder_minutes 
-                FROM calendar_events 
-                WHERE status = 'Plánováno' AND reminder_sent = 0
-            """)
-            events = cursor.fetchall()
-            
-            for event_id, title, event_date, event_time, reminder_minutes in events:
-                event_datetime = datetime.strptime(f"{event_date} {event_time}", "%Y-%m-%d %H:%M")
-                reminder_time = event_datetime - timedelta(minutes=reminder_minutes)
-                
-                if now >= reminder_time:
-                    QMessageBox.information(self, "⏰ Připomínka", 
-                                          f"Připomínka události:\n\n"
-                                          f"📅 {title}\n"
-                                          f"🕐 {event_date} v {event_time}")
-                    
-                    # Označit připomínku jako odeslanou
-                    cursor.execute("UPDATE calendar_events SET reminder_sent = 1 WHERE id = ?", (event_id,))
-                    self.db.commit()
-                    
-        except Exception as e:
-            print(f"Chyba při kontrole připomínek: {e}")
+    def show_reminders(self, reminders):
+        """Zobrazí připomínky, které právě nastaly (jedno nemodální okno)."""
+        lines = []
+        for reminder in reminders[:MAX_REMINDERS_SHOWN]:
+            when = f"{reminder.event_date} v {reminder.event_time}" if reminder.event_time else f"{reminder.event_date} (celý den)"
+            lines.append(f"📅 {reminder.title}\n🕐 {when}")
+        if len(reminders) > MAX_REMINDERS_SHOWN:
+            lines.append(f"... a další {len(reminders) - MAX_REMINDERS_SHOWN} připomínky")
+        box = QMessageBox(QMessageBox.Icon.Information, "⏰ Připomínka",
+                          "Připomínka události:\n\n" + "\n\n".join(lines),
+                          QMessageBox.StandardButton.Ok, self)
+        box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        box.setModal(False)
+        box.show()
 
     def closeEvent(self, event):
-        """Uzavře databázové připojení při zavření okna"""
+        """Zruší načítání a připomínky a uzavře databázové připojení při zavření okna"""
+        self.loader.cancel_all()
+        self.reminders.stop()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Výpočet zůstatků pokladního deníku.
+
+Zůstatek se odvozuje z částek v pořadí podle data (a ID u stejného data):
+příjem přičítá, výdaj odečítá, "Počáteční stav" zůstatek nastaví. Ukládá
+se jen kontrolní bod každého měsíce (zůstatek na konci měsíce) v tabulce
+`cash_balance_checkpoints`. Po vložení, úpravě nebo smazání záznamu se
+přepočítají jen kontrolní body od měsíce změny - zpětně datovaný záznam
+tak nepřepisuje všechny pozdější řádky.
+
+Zůstatek po jednotlivých záznamech se počítá při čtení (`journal_entries`):
+kontrolní bod před obdobím plus průběžný součet částek v okně
+(`SUM() OVER`), který každý počáteční stav začíná znovu.
+
+Funkce pracují s předaným kurzorem a necommitují - volající je spouští
+ve stejné transakci jako samotnou změnu záznamu.
+"""
+
+from database import register_query
+
+OPENING_TYPES = ('Počáteční stav', 'počáteční stav')
+INCOME_TYPES = ('Příjem', 'příjem')
+
+# Zaokrouhlení zůstatku - na haléře, bez chyb plovoucí čárky
+_PRECISION = 2
+
+
+def _sql_list(values):
+    return ", ".join(f"'{value}'" for value in values)
+
+
+_IS_OPENING = f"type IN ({_sql_list(OPENING_TYPES)})"
+
+# Změna zůstatku záznamem; u počátečního stavu jeho částka (úsek začíná od ní)
+_DELTA = f"""CASE
+    WHEN {_IS_OPENING} THEN COALESCE(amount, 0)
+    WHEN type IN ({_sql_list(INCOME_TYPES)}) THEN COALESCE(amount, 0)
+    ELSE -COALESCE(amount, 0)
+END"""
+
+# Sloupce záznamu deníku se zůstatkem, jak je čte okno pokladny
+ENTRY_COLUMNS = "id, type, date, person, amount, note, balance"
+
+# Záznamy od měsíce `?` se zůstatkem po každém řádku. `segment` se zvýší
+# u každého počátečního stavu; první úsek navazuje na zůstatek před měsícem
+# (první parametr), další začínají částkou počátečního stavu.
+_ENTRIES_SQL = f"""
+    SELECT id, type, date, person, amount, note,
+        ROUND(SUM(delta) OVER (PARTITION BY segment ORDER BY date, id)
+              + CASE WHEN segment = 0 THEN ? ELSE 0 END, {_PRECISION}) AS balance
+    FROM (
+        SELECT id, type, date, person, amount, note, {_DELTA} AS delta,
+            SUM(CASE WHEN {_IS_OPENING} THEN 1 ELSE 0 END) OVER (ORDER BY date, id) AS segment
+        FROM cash_journal
+        WHERE date >= ?
+    )
+"""
+
+register_query("cash_balance.entries", f"""
+    SELECT {ENTRY_COLUMNS} FROM ({_ENTRIES_SQL}) WHERE date >= ? AND date <= ? ORDER BY date, id
+""")
+
+# Měsíční počty a součty změn; u měsíců s počátečním stavem se použije
+# jen část po posledním z nich (`_AFTER_OPENING_SQL`)
+_MONTHS_SQL = register_query("cash_balance.months", f"""
+    SELECT substr(date, 1, 7) AS month, COUNT(*),
+        SUM(CASE WHEN {_IS_OPENING} THEN 0 ELSE {_DELTA} END)
+    FROM cash_journal
+    WHERE date >= ?
+    GROUP BY month ORDER BY month
+""")
+
+_OPENINGS_SQL = register_query("cash_balance.openings", f"""
+    SELECT substr(date, 1, 7), date, id, COALESCE(amount, 0) FROM cash_journal
+    WHERE {_IS_OPENING} AND date >= ?
+    ORDER BY date, id
+""")
+
+_AFTER_OPENING_SQL = register_query("cash_balance.after_opening", f"""
+    SELECT COALESCE(SUM({_DELTA}), 0) FROM cash_journal
+    WHERE substr(date, 1, 7) = ? AND (date, id) > (?, ?)
+""")
+
+
+def opening_balance(cursor, month):
+    """Zůstatek před začátkem měsíce (YYYY-MM) z nejbližšího kontrolního bodu."""
+    cursor.execute("""
+        SELECT closing_balance FROM cash_balance_checkpoints
+        WHERE month < ? ORDER BY month DESC LIMIT 1
+    """, (month,))
+    row = cursor.fetchone()
+    return row[0] if row else 0.0
+
+
+def current_balance(cursor):
+    """Aktuální zůstatek pokladny - kontrolní bod posledního měsíce."""
+    cursor.execute("SELECT closing_balance FROM cash_balance_checkpoints ORDER BY month DESC LIMIT 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0.0
+
+
+def journal_query(cursor, date_from=None, date_to=None, columns=ENTRY_COLUMNS):
+    """SQL a parametry záznamů deníku za období se zůstatkem po každém řádku.
+
+    Okno začíná prvním dnem měsíce `date_from` a navazuje na kontrolní bod
+    předchozího měsíce, takže se čtou jen řádky od začátku toho měsíce.
+    """
+    month = date_from[:7] if date_from else ""
+    params = [opening_balance(cursor, month) if month else 0.0, month]
+    conditions = []
+    if date_from:
+        conditions.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("date <= ?")
+        params.append(date_to)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return f"SELECT {columns} FROM ({_ENTRIES_SQL}) {where} ORDER BY date, id", params
+
+
+def journal_entries(cursor, date_from=None, date_to=None):
+    """Záznamy deníku `(id, typ, datum, osoba, částka, poznámka, zůstatek)` v pořadí podle data."""
+    sql, params = journal_query(cursor, date_from, date_to)
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def recalculate(cursor, from_date=None):
+    """Přepočítá kontrolní body od měsíce data `from_date` (None = celý deník).
+
+    Čte jeden součet na měsíc (u měsíců s počátečním stavem ještě součet po
+    něm), jednotlivé záznamy se nepřepisují. Vrací slovník se statistikou.
+    """
+    month = from_date[:7] if from_date else ""
+    balance = opening_balance(cursor, month) if month else 0.0
+
+    # Poslední počáteční stav v každém měsíci (bývají jen výjimečně)
+    cursor.execute(_OPENINGS_SQL, (month,))
+    openings = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    cursor.execute(_MONTHS_SQL, (month,))
+    checkpoints = []
+    entries = 0
+    for entry_month, count, delta in cursor.fetchall():
+        if entry_month in openings:
+            opening_date, opening_id, opening_amount = openings[entry_month]
+            cursor.execute(_AFTER_OPENING_SQL, (entry_month, opening_date, opening_id))
+            balance = round(opening_amount + cursor.fetchone()[0], _PRECISION)
+        else:
+            balance = round(balance + (delta or 0), _PRECISION)
+        checkpoints.append((entry_month, balance, count))
+        entries += count
+
+    cursor.execute("DELETE FROM cash_balance_checkpoints WHERE month >= ?", (month,))
+    cursor.executemany("""
+        INSERT INTO cash_balance_checkpoints (month, closing_balance, entry_count)
+        VALUES (?, ?, ?)
+    """, checkpoints)
+
+    return {'entries': entries, 'months': len(checkpoints)}
@@ -1,11 +1,24 @@
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QPushButton, QTableWidgetItem,
     QDialog, QFormLayout, QLabel, QLineEdit, QMessageBox, QComboBox, QDateEdit,
-    QFrame, QScrollArea, QGridLayout
+    QFrame, QScrollArea, QGridLayout, QFileDialog
 )
 from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtGui import QFont, QBrush, QColor
 from database import connect
+from async_loader import AsyncLoader, bind_loading_indicator
+from cash_balance import recalculate, journal_entries
+from bank_import import import_statement, format_stats
+
+
+def query_cash_journal(conn):
+    """Záznamy pokladního deníku se zůstatky (běží ve vlákně AsyncLoaderu)."""
+    return journal_entries(conn.cursor())
+
+
+def run_bank_import(conn, filename, dry_run):
+    """Import výpisu ve vlákně AsyncLoaderu (zapisuje přes transakci vlákna)."""
+    return import_statement(filename, dry_run=dry_run)
 
 
 class CashJournalWindow(QMainWindow):
@@ -40,6 +53,10 @@ class CashJournalWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
 
+        # Načítání dat na pozadí
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self, [self.table])
+
         # Načtení dat
         self.load_cash_journal()
 
@@ -80,6 +97,7 @@ class CashJournalWindow(QMainWindow):
             ("✏️ Upravit záznam", "Upravit vybraný záznam", self.edit_entry),
             ("🗑️ Smazat záznam", "Odstranit záznam", self.delete_entry),
             ("⚙️ Počáteční stav", "Nastavit základní zůstatek", self.set_initial_balance),
+            ("🏦 Import výpisu", "Hromadný import z banky (CSV, GPC/ABO)", self.import_bank_statement),
         ]
         
         for i, (title, desc, func) in enumerate(actions):
@@ -282,18 +300,19 @@ class CashJournalWindow(QMainWindow):
         """)
     
     def load_cash_journal(self):
-        """Načte pokladní deník z databáze a vizuálně zvýrazní transakce barevným pozadím."""
+        """Spustí načtení pokladního deníku na pozadí."""
+        self.loader.submit("cash_journal", query_cash_journal,
+                           on_done=self.show_cash_journal, on_error=self.show_load_error)
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání pokladního deníku: {str(error)}")
+
+    def show_cash_journal(self, rows):
+        """Zobrazí pokladní deník a vizuálně zvýrazní transakce barevným pozadím."""
         # Blokujeme signály pro zabránění varování dataChanged
         self.table.blockSignals(True)
         
         try:
-            conn = connect()
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT id, type, date, person, amount, note, balance FROM cash_journal ORDER BY date ASC")
-            rows = cursor.fetchall()
-            conn.close()
-
             # Vyčistíme tabulku a nastavíme počet řádků
             self.table.clearContents()
             self.table.setRowCount(len(rows))
@@ -359,25 +378,22 @@ class CashJournalWindow(QMainWindow):
         def save_entry():
             """Uloží nový záznam do databáze a správně aktualizuje zůstatek."""
             try:
-                conn = connect()
-                cursor = conn.cursor()
-
-                # Získání posledního známého zůstatku (nejnovější transakce)
-                cursor.execute("SELECT balance FROM cash_journal ORDER BY id DESC LIMIT 1")
-                last_balance = cursor.fetchone()
-                last_balance = last_balance[0] if last_balance else 0  # Pokud není žádný záznam, počáteční stav je 0
-
-                # Výpočet nového zůstatku - podporuje čárku i tečku jako desetinnou čárku
+                # Podporuje čárku i tečku jako desetinnou čárku
                 amount_text = amount_input.text().replace(",", ".")
                 amount = float(amount_text)
-                new_balance = last_balance + amount if type_box.currentText() == "Příjem" else last_balance - amount
+                entry_date = date_input.date().toString("yyyy-MM-dd")
 
-                # Vložení nové transakce s aktualizovaným zůstatkem
+                conn = connect()
+                cursor = conn.cursor()
+
+                # Vložení nové transakce; kontrolní body zůstatku od jejího měsíce přepočítá engine
+                # (záznam může být zpětně datovaný)
                 cursor.execute("""
-                    INSERT INTO cash_journal (type, date, person, amount, note, balance)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (type_box.currentText(), date_input.date().toString("yyyy-MM-dd"), person_input.text(),
-                    amount, note_input.text(), new_balance))
+                    INSERT INTO cash_journal (type, date, person, amount, note)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (type_box.currentText(), entry_date, person_input.text(),
+                    amount, note_input.text()))
+                recalculate(cursor, entry_date)
 
                 conn.commit()
                 conn.close()
@@ -412,7 +428,12 @@ class CashJournalWindow(QMainWindow):
             try:
                 conn = connect()
                 cursor = conn.cursor()
+                cursor.execute("SELECT date FROM cash_journal WHERE id=?", (entry_id,))
+                row = cursor.fetchone()
                 cursor.execute("DELETE FROM cash_journal WHERE id=?", (entry_id,))
+                if row:
+                    # Přepočet kontrolních bodů od měsíce smazaného záznamu
+                    recalculate(cursor, row[0])
                 conn.commit()
                 conn.close()
 
@@ -438,12 +459,14 @@ class CashJournalWindow(QMainWindow):
             try:
                 initial_amount_text = balance_input.text().replace(",", ".")
                 initial_amount = float(initial_amount_text)
+                entry_date = QDate.currentDate().toString("yyyy-MM-dd")
                 conn = connect()
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO cash_journal (type, date, person, amount, note, balance) 
-                    VALUES ('Počáteční stav', ?, 'Systém', ?, 'Zadáno uživatelem', ?)
-                """, (QDate.currentDate().toString("yyyy-MM-dd"), initial_amount, initial_amount))
+                    INSERT INTO cash_journal (type, date, person, amount, note) 
+                    VALUES ('Počáteční stav', ?, 'Systém', ?, 'Zadáno uživatelem')
+                """, (entry_date, initial_amount))
+                recalculate(cursor, entry_date)
                 conn.commit()
                 conn.close()
 
@@ -501,15 +524,20 @@ class CashJournalWindow(QMainWindow):
             try:
                 amount_text = amount_input.text().replace(",", ".")
                 amount = float(amount_text)
+                new_date = date_input.date().toString("yyyy-MM-dd")
                 conn = connect()
                 cursor = conn.cursor()
+                cursor.execute("SELECT date FROM cash_journal WHERE id=?", (entry_id,))
+                row = cursor.fetchone()
                 cursor.execute("""
                     UPDATE cash_journal
                     SET type=?, date=?, person=?, amount=?, note=? 
                     WHERE id=?
-                """, (type_box.currentText(), date_input.date().toString("yyyy-MM-dd"), person_input.text(), 
+                """, (type_box.currentText(), new_date, person_input.text(), 
                     amount, note_input.text(), entry_id))
 
+                # Přepočet od dřívějšího z původního a nového data
+                recalculate(cursor, min(row[0], new_date) if row else new_date)
                 conn.commit()
                 conn.close()
 
@@ -524,3 +552,53 @@ class CashJournalWindow(QMainWindow):
         save_button.clicked.connect(save_changes)
         dialog.setLayout(layout)
         dialog.exec()
+
+    def import_bank_statement(self):
+        """Importuje bankovní výpis - nejdřív náhled, po potvrzení import."""
+        filename, _ = QFileDialog.getOpenFileName(
+            self,
+            "Import bankovního výpisu",
+            "",
+            "Bankovní výpisy (*.csv *.gpc *.abo);;Všechny soubory (*)"
+        )
+        if not filename:
+            return
+
+        self.loader.submit("bank_import", run_bank_import, filename, True,
+                           on_done=lambda stats: self.confirm_bank_import(filename, stats),
+                           on_error=self.show_import_error)
+
+    def confirm_bank_import(self, filename, stats):
+        """Zobrazí náhled importu a po potvrzení pohyby uloží."""
+        if not stats['imported']:
+            QMessageBox.information(self, "Import výpisu",
+                                    "Výpis neobsahuje žádné nové pohyby.\n\n" + format_stats(stats, preview=False))
+            return
+
+        reply = QMessageBox.question(self, "Import výpisu",
+                                     format_stats(stats) + "\n\nImportovat pohyby do pokladního deníku?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.loader.submit("bank_import", run_bank_import, filename, False,
+                           on_done=self.bank_import_finished, on_error=self.show_import_error,
+                           writes=True)
+
+    def bank_import_finished(self, stats):
+        self.load_cash_journal()
+        QMessageBox.information(self, "Úspěch", format_stats(stats, preview=False))
+
+    def show_import_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při importu výpisu: {str(error)}")
+
+    def closeEvent(self, event):
+        """Zruší rozběhnuté načítání při zavření okna"""
+        if self.loader.is_writing():
+            # Import se nesmí přerušit - transakce by se tiše vrátila
+            QMessageBox.information(self, "Import výpisu",
+                                    "Import výpisu ještě probíhá. Okno lze zavřít po jeho dokončení.")
+            event.ignore()
+            return
+        self.loader.cancel_all()
+        event.accept()
@@ -1,19 +1,461 @@
 import sqlite3
 import os
+import weakref
+import threading
+import configparser
+from datetime import datetime
+from contextlib import contextmanager
 
 # Nastavení absolutní cesty k databázi ve stejné složce jako `database.py`
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "invoices.db")
 
+# Volitelný konfigurační soubor s profilem úložiště (sekce [database])
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.ini")
+
+# Proměnná prostředí s názvem profilu - má přednost před konfiguračním souborem
+PROFILE_ENV_VAR = "FIRMA_DB_PROFILE"
+
+DEFAULT_PROFILE = 'performance'
+
+# Profily úložiště - PRAGMA pro každé připojení a politika checkpointů WAL.
+# `wal_autocheckpoint` je počet stránek WAL, po kterém SQLite provede
+# automatický checkpoint; `checkpoint_on_close` je režim checkpointu
+# při ukončení aplikace (None = bez checkpointu).
+STORAGE_PROFILES = {
+    'performance': {
+        'description': 'WAL, synchronous=NORMAL, velká cache a mmap (výchozí)',
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -32000,        # 32 MB
+            'mmap_size': 268435456,      # 256 MB
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+            'wal_autocheckpoint': 1000,
+        },
+        'checkpoint_on_close': 'TRUNCATE',
+    },
+    'safe': {
+        'description': 'WAL se synchronous=FULL - každý commit je trvale zapsán',
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'cache_size': -16000,        # 16 MB
+            'mmap_size': 0,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 10000,
+            'wal_autocheckpoint': 500,
+        },
+        'checkpoint_on_close': 'TRUNCATE',
+    },
+    'compatible': {
+        'description': 'Klasický rollback journal - pro databázi na síťovém disku',
+        'pragmas': {
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+            'cache_size': -2000,         # výchozí hodnota SQLite
+            'mmap_size': 0,
+            'temp_store': 'DEFAULT',
+            'busy_timeout': 5000,
+        },
+        'checkpoint_on_close': None,
+    },
+}
+
+# Číselné hodnoty, které SQLite vrací při čtení textově nastavených PRAGMA
+_PRAGMA_VALUE_ALIASES = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+}
+
+# PRAGMA příkazy aplikované jednou při vytvoření každého připojení v poolu
+DEFAULT_PRAGMAS = STORAGE_PROFILES[DEFAULT_PROFILE]['pragmas']
+
+
+def load_storage_profile(config_path=CONFIG_PATH):
+    """Načte profil úložiště.
+
+    Pořadí: proměnná prostředí `FIRMA_DB_PROFILE`, soubor `database.ini`
+    (`[database] profile = ...`), jinak výchozí profil. Sekce `[pragmas]`
+    v konfiguračním souboru může přepsat jednotlivé hodnoty profilu.
+    Vrací slovník s klíči `name`, `pragmas` a `checkpoint_on_close`.
+    """
+    config = configparser.ConfigParser()
+    if config_path and os.path.exists(config_path):
+        config.read(config_path, encoding='utf-8')
+
+    name = os.environ.get(PROFILE_ENV_VAR) or config.get('database', 'profile', fallback=DEFAULT_PROFILE)
+    name = name.strip().lower()
+    if name not in STORAGE_PROFILES:
+        print(f"⚠️ Neznámý profil databáze '{name}', používám '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE
+
+    profile = STORAGE_PROFILES[name]
+    pragmas = dict(profile['pragmas'])
+    if config.has_section('pragmas'):
+        for key, value in config.items('pragmas'):
+            pragmas[key] = value
+
+    checkpoint = config.get('database', 'checkpoint_on_close', fallback=profile['checkpoint_on_close'])
+    if isinstance(checkpoint, str) and checkpoint.strip().lower() in ('', 'none', 'off'):
+        checkpoint = None
+
+    return {
+        'name': name,
+        'pragmas': pragmas,
+        'checkpoint_on_close': checkpoint,
+    }
+
+
+def _normalize_pragma_value(name, value):
+    """Převede hodnotu PRAGMA na tvar, ve kterém ji vrací SQLite."""
+    if isinstance(value, str):
+        upper = value.strip().upper()
+        aliases = _PRAGMA_VALUE_ALIASES.get(name)
+        if aliases and upper in aliases:
+            return aliases[upper]
+        try:
+            return int(upper)
+        except ValueError:
+            return upper
+    return value
+
+
+class PooledConnection:
+    """Zapůjčené připojení z poolu.
+
+    Chová se jako `sqlite3.Connection`, jen `close()` připojení neuzavře,
+    ale vrátí ho do poolu. Díky tomu zůstává původní vzor
+    `conn = connect() ... conn.close()` ve všech modulech beze změny.
+    Každá zápůjčka má vlastní připojení - neuložená práce jedné zápůjčky
+    se nemíchá s jinou.
+
+    Zápůjčka zahozená bez `close()` (např. po výjimce uprostřed zápisu)
+    se vrátí do poolu při uvolnění objektu, stejně jako dříve samostatné
+    `sqlite3.Connection` - neuložená transakce se odvolá a nedrží zámek
+    databáze.
+    """
+
+    def __init__(self, pool, state, connection):
+        self._pool = pool
+        self._state = state
+        self._connection = connection
+        self._released = False
+        # Finalizer nesmí držet odkaz na self, jinak by se nikdy nespustil
+        self._finalizer = weakref.finalize(self, pool.release, state, connection)
+
+    @property
+    def raw(self):
+        """Vrátí podkladové `sqlite3.Connection`."""
+        if self._released:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return self._connection
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        return self.raw.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.raw.__exit__(exc_type, exc_value, traceback)
+
+    def close(self):
+        """Vrátí připojení do poolu (opakované volání nic nedělá)."""
+        if not self._released:
+            self._released = True
+            self._finalizer()
+
+
+class _ThreadConnectionState:
+    """Připojení jednoho vlákna - volná k zapůjčení a právě zapůjčená."""
+
+    def __init__(self):
+        self.idle = []          # volná připojení bez otevřené transakce
+        self.active = set()     # zapůjčená připojení
+        self.in_transaction_block = False
+        self.closed = False
+
+
+class _ThreadFinalizer:
+    """Drží ho `threading.local` vlákna - zanikne se skončením vlákna.
+
+    Na rozdíl od `Thread.is_alive()` funguje i pro vlákna QThreadPool
+    (v Pythonu `_DummyThread`, které se tváří jako stále živá).
+    """
+
+
+class ConnectionPool:
+    """Pool SQLite připojení - volná připojení se znovu používají v rámci vlákna.
+
+    Připojení se vytvoří při první zápůjčce ve vlákně a PRAGMA se aplikují
+    jen jednou. Vrácené připojení se odvolá (ROLLBACK neuložené transakce,
+    stejně jako dříve při `close()` samostatného připojení) a uloží jako
+    volné pro další `connect()` ve stejném vlákně. Současně zapůjčená
+    připojení jsou vždy různá. Když vlákno skončí, jeho volná připojení
+    se uzavřou.
+    """
+
+    # Kolik volných připojení si vlákno ponechá
+    MAX_IDLE_PER_THREAD = 2
+
+    def __init__(self, db_path=DB_PATH, pragmas=None, checkpoint_on_close=None, profile_name=None):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.checkpoint_on_close = checkpoint_on_close
+        self.profile_name = profile_name
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._states = set()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'released': 0,
+            'rollbacks': 0,
+            'transactions': 0,
+            'closed': 0,
+        }
+
+    def _thread_state(self):
+        """Stav aktuálního vlákna (vytvoří ho při první zápůjčce)."""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = _ThreadConnectionState()
+            finalizer = _ThreadFinalizer()
+            weakref.finalize(finalizer, self._close_thread, state)
+            self._local.state = state
+            self._local.finalizer = finalizer
+            with self._lock:
+                self._states.add(state)
+        return state
+
+    def _open_connection(self):
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
+
+    def _close_thread(self, state):
+        """Uzavře volná připojení skončeného vlákna (zapůjčená až při vrácení)."""
+        with self._lock:
+            state.closed = True
+            self._states.discard(state)
+            idle, state.idle = state.idle, []
+            self._stats['closed'] += len(idle)
+        for connection in idle:
+            connection.close()
+
+    def acquire(self):
+        """Zapůjčí připojení aktuálního vlákna."""
+        state = self._thread_state()
+        if state.idle:
+            connection = state.idle.pop()
+            with self._lock:
+                self._stats['reused'] += 1
+        else:
+            connection = self._open_connection()
+            with self._lock:
+                self._stats['created'] += 1
+        state.active.add(connection)
+        return PooledConnection(self, state, connection)
+
+    def release(self, state, connection):
+        """Vrátí zápůjčku do poolu; neuloženou transakci odvolá."""
+        state.active.discard(connection)
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+                with self._lock:
+                    self._stats['rollbacks'] += 1
+        except sqlite3.ProgrammingError:
+            # Připojení už uzavřel close_all()
+            return
+        with self._lock:
+            self._stats['released'] += 1
+            keep = not state.closed and len(state.idle) < self.MAX_IDLE_PER_THREAD
+            if keep:
+                state.idle.append(connection)
+            else:
+                self._stats['closed'] += 1
+        if not keep:
+            connection.close()
+
+    @contextmanager
+    def transaction(self):
+        """Kontextový manažer pro transakci na vlastním připojení.
+
+        Při úspěchu provede COMMIT, při výjimce ROLLBACK. Transakce se
+        nevnořují: uvnitř jiného `transaction()` bloku, nebo když jiná
+        zápůjčka vlákna má neuloženou transakci, vyvolá ProgrammingError.
+        """
+        state = self._thread_state()
+        if state.in_transaction_block:
+            raise sqlite3.ProgrammingError("Transakce se nevnořují - vlákno už je uvnitř transaction().")
+        if any(connection.in_transaction for connection in state.active):
+            raise sqlite3.ProgrammingError(
+                "Jiné připojení vlákna má neuloženou transakci - nejdřív ji uložte nebo odvolejte."
+            )
+
+        conn = self.acquire()
+        raw = conn.raw
+        raw.execute("BEGIN")
+        state.in_transaction_block = True
+        try:
+            yield conn
+        except BaseException:
+            raw.rollback()
+            raise
+        else:
+            raw.commit()
+            with self._lock:
+                self._stats['transactions'] += 1
+        finally:
+            state.in_transaction_block = False
+            conn.close()
+
+    def stats(self):
+        """Vrátí statistiky poolu jako slovník."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['checked_out'] = sum(len(state.active) for state in self._states)
+            stats['connections'] = stats['checked_out'] + sum(len(state.idle) for state in self._states)
+        requests = stats['created'] + stats['reused']
+        stats['reuse_ratio'] = stats['reused'] / requests if requests else 0.0
+        return stats
+
+    def verify_settings(self):
+        """Porovná aktivní PRAGMA připojení aktuálního vlákna s profilem.
+
+        Vrací slovník `název -> (očekávaná hodnota, skutečná hodnota, shoda)`.
+        """
+        conn = self.acquire()
+        try:
+            report = {}
+            for name, value in self.pragmas.items():
+                expected = _normalize_pragma_value(name, value)
+                actual = _normalize_pragma_value(name, conn.execute(f"PRAGMA {name}").fetchone()[0])
+                report[name] = (expected, actual, expected == actual)
+            return report
+        finally:
+            conn.close()
+
+    def checkpoint(self, mode='PASSIVE'):
+        """Provede checkpoint WAL. Vrací (busy, stránek ve WAL, přeneseno)."""
+        conn = self.acquire()
+        try:
+            return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Uzavře všechna připojení v poolu (např. při ukončení aplikace)."""
+        if self.checkpoint_on_close and str(self.pragmas.get('journal_mode', '')).upper() == 'WAL':
+            try:
+                self.checkpoint(self.checkpoint_on_close)
+            except sqlite3.Error as e:
+                print(f"Chyba při checkpointu databáze: {e}")
+        with self._lock:
+            connections = []
+            for state in self._states:
+                state.closed = True
+                connections += state.idle + list(state.active)
+                state.idle = []
+                state.active.clear()
+            self._stats['closed'] += len(connections)
+            self._states.clear()
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Vrátí sdílený pool připojení (vytvoří ho při prvním použití)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                profile = load_storage_profile()
+                _pool = ConnectionPool(
+                    DB_PATH,
+                    pragmas=profile['pragmas'],
+                    checkpoint_on_close=profile['checkpoint_on_close'],
+                    profile_name=profile['name'],
+                )
+    return _pool
+
+
 def connect():
-    """Připojení k databázi ve správném adresáři."""
-    return sqlite3.connect(DB_PATH)
+    """Připojení k databázi ve správném adresáři (zapůjčené z poolu)."""
+    return get_pool().acquire()
 
-def create_tables():
-    """Vytvoření tabulek v databázi."""
 
-    conn = connect()
+def transaction():
+    """Transakce na vlastním připojení z poolu (nevnořuje se)."""
+    return get_pool().transaction()
+
+
+def pool_stats():
+    """Statistiky sdíleného poolu připojení."""
+    return get_pool().stats()
+
+
+def stream_rows(conn, sql, params=(), size=500):
+    """Řádky dotazu po dávkách `fetchmany` - v paměti je jen jedna dávka.
+
+    Dotaz se spustí až při prvním čtení, takže generátor lze připravit
+    předem a číst postupně (exporty, reporty).
+    """
     cursor = conn.cursor()
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def verify_storage_settings():
+    """Ověří, že databáze běží s nastavením zvoleného profilu.
+
+    Vrací seznam rozdílů `(název, očekáváno, skutečnost)`; prázdný seznam
+    znamená, že všechna PRAGMA odpovídají profilu.
+    """
+    report = get_pool().verify_settings()
+    return [(name, expected, actual) for name, (expected, actual, ok) in report.items() if not ok]
+
+# Registr dotazů aplikace, nad kterými index advisor spouští EXPLAIN QUERY PLAN.
+# Moduly registrují konstanty SQL, které samy spouštějí, přes `register_query()`
+# - kontroluje se tak přesně ten dotaz, který aplikace posílá do databáze.
+QUERY_REGISTRY = {}
 
+# Dotazy, které záměrně čtou celou tabulku (seznamy všech záznamů)
+FULL_SCAN_QUERIES = set()
+
+
+def register_query(name, sql, full_scan=False):
+    """Zaregistruje dotaz pro kontrolu indexů (`index_advisor.py`).
+
+    `full_scan=True` označí dotaz, který má číst celou tabulku (např. seznam
+    všech faktur po dávkách) - advisor jeho průchod vypíše jen jako poznámku.
+    """
+    QUERY_REGISTRY[name] = " ".join(sql.split())
+    if full_scan:
+        FULL_SCAN_QUERIES.add(name)
+    else:
+        FULL_SCAN_QUERIES.discard(name)
+    return sql
+
+
+def _migration_001_base_schema(cursor):
+    """Základní schéma a výchozí data.
+
+    Kroky používají IF NOT EXISTS / INSERT OR IGNORE, takže je lze bezpečně
+    aplikovat i na databázi vytvořenou před zavedením verzování.
+    """
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS invoices (
@@ -203,10 +645,7 @@ def create_tables():
     
     # Vytvoření testovacího neaktivního uživatele pro demonstraci barev
     cursor.execute("""
-        DELETE FROM users WHERE username = 'test_inactive'
-    """)
-    cursor.execute("""
-        INSERT INTO users (username, password_hash, full_name, role, active, created_date)
+        INSERT OR IGNORE INTO users (username, password_hash, full_name, role, active, created_date)
         VALUES ('test_inactive', 'test123', 'Test Neaktivní', 'user', 0, datetime('now'))
     """)
 
@@ -553,10 +992,784 @@ def create_tables():
     """)
 
 
+def _migration_002_indexes(cursor):
+    """Sekundární indexy pro filtry podle data, typu a stavu používané v modulech.
+
+    Indexy jsou navrženy jako pokrývající - obsahují i sčítané sloupce,
+    takže agregační dotazy nemusí číst řádky tabulky.
+    """
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS idx_invoices_type_issue_date ON invoices (type, issue_date, total, recipient)",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_issue_date ON invoices (issue_date)",
+        "CREATE INDEX IF NOT EXISTS idx_cash_journal_type_date ON cash_journal (type, date, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_cash_journal_date ON cash_journal (date)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_events_date ON calendar_events (event_date, event_time)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_events_reminder ON calendar_events (status, reminder_sent, event_date)",
+        "CREATE INDEX IF NOT EXISTS idx_fuel_tankings_vehicle_date ON fuel_tankings (vehicle, date, fuel_amount)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_related ON documents (related_table, related_id, upload_date)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents (upload_date)",
+        "CREATE INDEX IF NOT EXISTS idx_warehouse_movements_product ON warehouse_movements (product_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_cars_registration ON cars (registration)",
+        "CREATE INDEX IF NOT EXISTS idx_service_records_date ON service_records (date)",
+        "CREATE INDEX IF NOT EXISTS idx_employee_salaries_employee ON employee_salaries (employee_id, month)",
+        "CREATE INDEX IF NOT EXISTS idx_employee_attendance_employee ON employee_attendance (employee_id, date)",
+    ):
+        cursor.execute(statement)
+
+
+# Agregační (rollup) tabulky pro analýzy - udržují je triggery nad zdrojovými
+# tabulkami, takže analýzy čtou řádově počet měsíců, ne počet dokladů.
+# `keys` jsou sloupce klíče (kromě měsíce), `sums` sčítané sloupce.
+# Popis slouží ke kontrole a přepočtu (`analytics_rollups.py`); tabulky
+# a triggery zakládají migrace 3 a 10, nový rollup vyžaduje nový krok.
+ROLLUPS = [
+    {
+        'table': 'monthly_revenue',
+        'source': 'invoices',
+        'date': 'issue_date',
+        'keys': ['type'],
+        'count': 'invoice_count',
+        'sums': ['total', 'amount_no_tax', 'tax'],
+    },
+    {
+        'table': 'client_monthly_totals',
+        'source': 'invoices',
+        'date': 'issue_date',
+        'keys': ['recipient', 'type'],
+        'count': 'invoice_count',
+        'sums': ['total'],
+    },
+    {
+        'table': 'monthly_cash',
+        'source': 'cash_journal',
+        'date': 'date',
+        'keys': ['type'],
+        'count': 'entry_count',
+        'sums': ['amount'],
+    },
+    {
+        'table': 'monthly_fuel',
+        'source': 'fuel_tankings',
+        'date': 'date',
+        'keys': ['vehicle'],
+        'count': 'tanking_count',
+        'sums': ['fuel_amount'],
+    },
+]
+
+
+def rollup_select_sql(rollup):
+    """SELECT, který spočítá obsah rollupu přímo ze zdrojové tabulky."""
+    columns = [f"COALESCE(substr({rollup['date']}, 1, 7), '')"]
+    columns += [f"COALESCE({key}, '')" for key in rollup['keys']]
+    columns += ["COUNT(*)"] + [f"COALESCE(SUM({col}), 0)" for col in rollup['sums']]
+    groups = ", ".join(str(i) for i in range(1, len(rollup['keys']) + 2))
+    return f"SELECT {', '.join(columns)} FROM {rollup['source']} GROUP BY {groups}"
+
+
+def rebuild_rollups(cursor):
+    """Přepočítá všechny rollup tabulky ze zdrojových dat."""
+    for rollup in ROLLUPS:
+        columns = ['month'] + rollup['keys'] + [rollup['count']] + rollup['sums']
+        cursor.execute(f"DELETE FROM {rollup['table']}")
+        cursor.execute(f"INSERT INTO {rollup['table']} ({', '.join(columns)}) {rollup_select_sql(rollup)}")
+
+
+def _migration_003_rollups(cursor):
+    """Měsíční rollup tabulky faktur a pokladny s triggery a jejich naplnění z existujících dat."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_revenue (
+            month TEXT NOT NULL,  -- YYYY-MM
+            type TEXT NOT NULL,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            amount_no_tax REAL NOT NULL DEFAULT 0,
+            tax REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, type)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS client_monthly_totals (
+            month TEXT NOT NULL,  -- YYYY-MM
+            recipient TEXT NOT NULL,
+            type TEXT NOT NULL,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, recipient, type)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_cash (
+            month TEXT NOT NULL,  -- YYYY-MM
+            type TEXT NOT NULL,
+            entry_count INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, type)
+        )
+    """)
+
+    # Faktury: měsíční tržby podle typu a součty klientů
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_rollup_insert AFTER INSERT ON invoices
+        BEGIN
+            INSERT INTO monthly_revenue (month, type, invoice_count, total, amount_no_tax, tax)
+            VALUES (COALESCE(substr(NEW.issue_date, 1, 7), ''), COALESCE(NEW.type, ''), 1,
+                    COALESCE(NEW.total, 0), COALESCE(NEW.amount_no_tax, 0), COALESCE(NEW.tax, 0))
+            ON CONFLICT(month, type) DO UPDATE SET
+                invoice_count = invoice_count + 1, total = total + excluded.total,
+                amount_no_tax = amount_no_tax + excluded.amount_no_tax, tax = tax + excluded.tax;
+            INSERT INTO client_monthly_totals (month, recipient, type, invoice_count, total)
+            VALUES (COALESCE(substr(NEW.issue_date, 1, 7), ''), COALESCE(NEW.recipient, ''),
+                    COALESCE(NEW.type, ''), 1, COALESCE(NEW.total, 0))
+            ON CONFLICT(month, recipient, type) DO UPDATE SET
+                invoice_count = invoice_count + 1, total = total + excluded.total;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_rollup_delete AFTER DELETE ON invoices
+        BEGIN
+            UPDATE monthly_revenue SET
+                invoice_count = invoice_count - 1, total = total - COALESCE(OLD.total, 0),
+                amount_no_tax = amount_no_tax - COALESCE(OLD.amount_no_tax, 0), tax = tax - COALESCE(OLD.tax, 0)
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND type = COALESCE(OLD.type, '');
+            DELETE FROM monthly_revenue
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND type = COALESCE(OLD.type, '')
+                AND invoice_count <= 0;
+            UPDATE client_monthly_totals SET
+                invoice_count = invoice_count - 1, total = total - COALESCE(OLD.total, 0)
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND recipient = COALESCE(OLD.recipient, '')
+                AND type = COALESCE(OLD.type, '');
+            DELETE FROM client_monthly_totals
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND recipient = COALESCE(OLD.recipient, '')
+                AND type = COALESCE(OLD.type, '') AND invoice_count <= 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_rollup_update
+        AFTER UPDATE OF amount_no_tax, issue_date, recipient, tax, total, type ON invoices
+        BEGIN
+            UPDATE monthly_revenue SET
+                invoice_count = invoice_count - 1, total = total - COALESCE(OLD.total, 0),
+                amount_no_tax = amount_no_tax - COALESCE(OLD.amount_no_tax, 0), tax = tax - COALESCE(OLD.tax, 0)
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND type = COALESCE(OLD.type, '');
+            DELETE FROM monthly_revenue
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND type = COALESCE(OLD.type, '')
+                AND invoice_count <= 0;
+            UPDATE client_monthly_totals SET
+                invoice_count = invoice_count - 1, total = total - COALESCE(OLD.total, 0)
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND recipient = COALESCE(OLD.recipient, '')
+                AND type = COALESCE(OLD.type, '');
+            DELETE FROM client_monthly_totals
+            WHERE month = COALESCE(substr(OLD.issue_date, 1, 7), '') AND recipient = COALESCE(OLD.recipient, '')
+                AND type = COALESCE(OLD.type, '') AND invoice_count <= 0;
+            INSERT INTO monthly_revenue (month, type, invoice_count, total, amount_no_tax, tax)
+            VALUES (COALESCE(substr(NEW.issue_date, 1, 7), ''), COALESCE(NEW.type, ''), 1,
+                    COALESCE(NEW.total, 0), COALESCE(NEW.amount_no_tax, 0), COALESCE(NEW.tax, 0))
+            ON CONFLICT(month, type) DO UPDATE SET
+                invoice_count = invoice_count + 1, total = total + excluded.total,
+                amount_no_tax = amount_no_tax + excluded.amount_no_tax, tax = tax + excluded.tax;
+            INSERT INTO client_monthly_totals (month, recipient, type, invoice_count, total)
+            VALUES (COALESCE(substr(NEW.issue_date, 1, 7), ''), COALESCE(NEW.recipient, ''),
+                    COALESCE(NEW.type, ''), 1, COALESCE(NEW.total, 0))
+            ON CONFLICT(month, recipient, type) DO UPDATE SET
+                invoice_count = invoice_count + 1, total = total + excluded.total;
+        END
+    """)
+
+    # Pokladna: měsíční součty podle typu záznamu
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_rollup_insert AFTER INSERT ON cash_journal
+        BEGIN
+            INSERT INTO monthly_cash (month, type, entry_count, amount)
+            VALUES (COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.type, ''), 1, COALESCE(NEW.amount, 0))
+            ON CONFLICT(month, type) DO UPDATE SET
+                entry_count = entry_count + 1, amount = amount + excluded.amount;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_rollup_delete AFTER DELETE ON cash_journal
+        BEGIN
+            UPDATE monthly_cash SET
+                entry_count = entry_count - 1, amount = amount - COALESCE(OLD.amount, 0)
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND type = COALESCE(OLD.type, '');
+            DELETE FROM monthly_cash
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND type = COALESCE(OLD.type, '')
+                AND entry_count <= 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_rollup_update
+        AFTER UPDATE OF amount, date, type ON cash_journal
+        BEGIN
+            UPDATE monthly_cash SET
+                entry_count = entry_count - 1, amount = amount - COALESCE(OLD.amount, 0)
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND type = COALESCE(OLD.type, '');
+            DELETE FROM monthly_cash
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND type = COALESCE(OLD.type, '')
+                AND entry_count <= 0;
+            INSERT INTO monthly_cash (month, type, entry_count, amount)
+            VALUES (COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.type, ''), 1, COALESCE(NEW.amount, 0))
+            ON CONFLICT(month, type) DO UPDATE SET
+                entry_count = entry_count + 1, amount = amount + excluded.amount;
+        END
+    """)
+
+    # Naplnění z existujících dat
+    cursor.execute("DELETE FROM monthly_revenue")
+    cursor.execute("""
+        INSERT INTO monthly_revenue (month, type, invoice_count, total, amount_no_tax, tax)
+        SELECT COALESCE(substr(issue_date, 1, 7), ''), COALESCE(type, ''), COUNT(*),
+               COALESCE(SUM(total), 0), COALESCE(SUM(amount_no_tax), 0), COALESCE(SUM(tax), 0)
+        FROM invoices GROUP BY 1, 2
+    """)
+    cursor.execute("DELETE FROM client_monthly_totals")
+    cursor.execute("""
+        INSERT INTO client_monthly_totals (month, recipient, type, invoice_count, total)
+        SELECT COALESCE(substr(issue_date, 1, 7), ''), COALESCE(recipient, ''), COALESCE(type, ''),
+               COUNT(*), COALESCE(SUM(total), 0)
+        FROM invoices GROUP BY 1, 2, 3
+    """)
+    cursor.execute("DELETE FROM monthly_cash")
+    cursor.execute("""
+        INSERT INTO monthly_cash (month, type, entry_count, amount)
+        SELECT COALESCE(substr(date, 1, 7), ''), COALESCE(type, ''), COUNT(*), COALESCE(SUM(amount), 0)
+        FROM cash_journal GROUP BY 1, 2
+    """)
+
+
+def _migration_004_cash_balance_checkpoints(cursor):
+    """Měsíční kontrolní body zůstatku pokladny a přepočet zůstatků podle data."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cash_balance_checkpoints (
+            month TEXT PRIMARY KEY,  -- YYYY-MM
+            closing_balance REAL NOT NULL,  -- Zůstatek na konci měsíce
+            entry_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # Dříve se zůstatek počítal v pořadí vložení - přepočet podle data (a ID):
+    # počáteční stav zůstatek nastaví, příjem přičte, ostatní typy odečtou
+    cursor.execute("SELECT id, type, date, amount FROM cash_journal ORDER BY date, id")
+    balance = 0.0
+    updates = []
+    months = {}  # YYYY-MM -> (zůstatek na konci měsíce, počet záznamů)
+    for entry_id, entry_type, entry_date, amount in cursor.fetchall():
+        amount = amount or 0
+        if entry_type in ('Počáteční stav', 'počáteční stav'):
+            balance = round(amount, 2)
+        elif entry_type in ('Příjem', 'příjem'):
+            balance = round(balance + amount, 2)
+        else:
+            balance = round(balance - amount, 2)
+        updates.append((balance, entry_id))
+        month = (entry_date or "")[:7]
+        months[month] = (balance, months.get(month, (0, 0))[1] + 1)
+
+    cursor.executemany("UPDATE cash_journal SET balance = ? WHERE id = ?", updates)
+    cursor.execute("DELETE FROM cash_balance_checkpoints")
+    cursor.executemany("""
+        INSERT INTO cash_balance_checkpoints (month, closing_balance, entry_count)
+        VALUES (?, ?, ?)
+    """, [(month, closing, count) for month, (closing, count) in months.items()])
+
+
+def _migration_005_cash_import_hash(cursor):
+    """Otisk importovaného bankovního pohybu pro kontrolu duplicit."""
+    cursor.execute("PRAGMA table_info(cash_journal)")
+    if "import_hash" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE cash_journal ADD COLUMN import_hash TEXT")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_cash_journal_import_hash
+        ON cash_journal(import_hash) WHERE import_hash IS NOT NULL
+    """)
+
+
+def _migration_006_document_content_hash(cursor):
+    """Otisk obsahu dokumentu pro úložiště adresované obsahem."""
+    cursor.execute("PRAGMA table_info(documents)")
+    if "content_hash" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_content_hash
+        ON documents(content_hash) WHERE content_hash IS NOT NULL
+    """)
+    # Hledání možného duplikátu podle velikosti před výpočtem otisku
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_documents_blob_size
+        ON documents(file_size) WHERE content_hash IS NOT NULL
+    """)
+
+
+# Fulltextový index (FTS5) - jeden řádek na záznam zdrojové tabulky,
+# udržují ho triggery. `code` určuje rowid v indexu (id * SEARCH_ROWID_STRIDE
+# + code), takže trigger najde řádek přes rowid bez prohledávání indexu.
+# Sloupec `content` indexu plní Python textem souborů dokumentů (search_index.py).
+SEARCH_ROWID_STRIDE = 8
+
+SEARCH_SOURCES = [
+    {'source': 'invoices', 'code': 1, 'title': ['invoice_number'],
+     'body': ['recipient', 'issuer', 'note', 'status', 'type']},
+    {'source': 'companies', 'code': 2, 'title': ['name'],
+     'body': ['ico', 'dic', 'address', 'contact', 'bank']},
+    {'source': 'cash_journal', 'code': 3, 'title': ['person'],
+     'body': ['note']},
+    {'source': 'service_records', 'code': 4, 'title': ['asset_name'],
+     'body': ['description', 'service_type', 'technician', 'notes']},
+    {'source': 'calendar_events', 'code': 5, 'title': ['title'],
+     'body': ['description', 'event_type']},
+    {'source': 'documents', 'code': 6, 'title': ['original_filename'],
+     'body': ['description']},
+]
+
+
+def _search_text_sql(columns, row=None):
+    """SQL výraz spojující sloupce do jednoho textu (NULL = prázdný řetězec)."""
+    prefix = f"{row}." if row else ""
+    return " || ' ' || ".join(f"COALESCE({prefix}{col}, '')" for col in columns)
+
+
+def _search_rowid_sql(source, row=None):
+    prefix = f"{row}." if row else ""
+    return f"{prefix}id * {SEARCH_ROWID_STRIDE} + {source['code']}"
+
+
+def rebuild_search_index(cursor):
+    """Naplní fulltextový index ze zdrojových tabulek (bez textu souborů)."""
+    cursor.execute("DELETE FROM search_index")
+    for source in SEARCH_SOURCES:
+        cursor.execute(f"""
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            SELECT {_search_rowid_sql(source)}, {_search_text_sql(source['title'])},
+                   {_search_text_sql(source['body'])}, '{source['source']}', id
+            FROM {source['source']}
+        """)
+
+
+def _migration_007_search_index(cursor):
+    """Fulltextový index s triggery a jeho naplnění z existujících dat."""
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            title, body, content,
+            source UNINDEXED, ref_id UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+
+    # invoices (rowid řádku indexu = id * 8 + kód zdrojové tabulky)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_search_insert AFTER INSERT ON invoices
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 1, COALESCE(NEW.invoice_number, ''),
+                    COALESCE(NEW.recipient, '') || ' ' || COALESCE(NEW.issuer, '') || ' ' || COALESCE(NEW.note, '') || ' '
+                    || COALESCE(NEW.status, '') || ' ' || COALESCE(NEW.type, ''),
+                    'invoices', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_search_delete AFTER DELETE ON invoices
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_search_update
+        AFTER UPDATE OF invoice_number, recipient, issuer, note, status, type ON invoices
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.invoice_number, ''),
+                body = COALESCE(NEW.recipient, '') || ' ' || COALESCE(NEW.issuer, '') || ' ' || COALESCE(NEW.note, '') || ' '
+                    || COALESCE(NEW.status, '') || ' ' || COALESCE(NEW.type, '')
+            WHERE rowid = NEW.id * 8 + 1;
+        END
+    """)
+
+    # companies
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_companies_search_insert AFTER INSERT ON companies
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 2, COALESCE(NEW.name, ''),
+                    COALESCE(NEW.ico, '') || ' ' || COALESCE(NEW.dic, '') || ' ' || COALESCE(NEW.address, '') || ' '
+                    || COALESCE(NEW.contact, '') || ' ' || COALESCE(NEW.bank, ''),
+                    'companies', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_companies_search_delete AFTER DELETE ON companies
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 2;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_companies_search_update
+        AFTER UPDATE OF name, ico, dic, address, contact, bank ON companies
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.name, ''),
+                body = COALESCE(NEW.ico, '') || ' ' || COALESCE(NEW.dic, '') || ' ' || COALESCE(NEW.address, '') || ' '
+                    || COALESCE(NEW.contact, '') || ' ' || COALESCE(NEW.bank, '')
+            WHERE rowid = NEW.id * 8 + 2;
+        END
+    """)
+
+    # cash_journal
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_search_insert AFTER INSERT ON cash_journal
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 3, COALESCE(NEW.person, ''),
+                    COALESCE(NEW.note, ''),
+                    'cash_journal', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_search_delete AFTER DELETE ON cash_journal
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 3;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cash_journal_search_update
+        AFTER UPDATE OF person, note ON cash_journal
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.person, ''),
+                body = COALESCE(NEW.note, '')
+            WHERE rowid = NEW.id * 8 + 3;
+        END
+    """)
+
+    # service_records
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_records_search_insert AFTER INSERT ON service_records
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 4, COALESCE(NEW.asset_name, ''),
+                    COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.service_type, '') || ' ' || COALESCE(NEW.technician, '') || ' '
+                    || COALESCE(NEW.notes, ''),
+                    'service_records', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_records_search_delete AFTER DELETE ON service_records
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 4;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_service_records_search_update
+        AFTER UPDATE OF asset_name, description, service_type, technician, notes ON service_records
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.asset_name, ''),
+                body = COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.service_type, '') || ' ' || COALESCE(NEW.technician, '') || ' '
+                    || COALESCE(NEW.notes, '')
+            WHERE rowid = NEW.id * 8 + 4;
+        END
+    """)
+
+    # calendar_events
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_search_insert AFTER INSERT ON calendar_events
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 5, COALESCE(NEW.title, ''),
+                    COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.event_type, ''),
+                    'calendar_events', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_search_delete AFTER DELETE ON calendar_events
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 5;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_calendar_events_search_update
+        AFTER UPDATE OF title, description, event_type ON calendar_events
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.title, ''),
+                body = COALESCE(NEW.description, '') || ' ' || COALESCE(NEW.event_type, '')
+            WHERE rowid = NEW.id * 8 + 5;
+        END
+    """)
+
+    # documents
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_documents_search_insert AFTER INSERT ON documents
+        BEGIN
+            INSERT INTO search_index (rowid, title, body, source, ref_id)
+            VALUES (NEW.id * 8 + 6, COALESCE(NEW.original_filename, ''),
+                    COALESCE(NEW.description, ''),
+                    'documents', NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_documents_search_delete AFTER DELETE ON documents
+        BEGIN
+            DELETE FROM search_index WHERE rowid = OLD.id * 8 + 6;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_documents_search_update
+        AFTER UPDATE OF original_filename, description ON documents
+        BEGIN
+            UPDATE search_index
+            SET title = COALESCE(NEW.original_filename, ''),
+                body = COALESCE(NEW.description, '')
+            WHERE rowid = NEW.id * 8 + 6;
+        END
+    """)
+
+    # Naplnění z existujících dat (text souborů dokumentů doplní search_index.py)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 1, COALESCE(invoice_number, ''),
+               COALESCE(recipient, '') || ' ' || COALESCE(issuer, '') || ' ' || COALESCE(note, '') || ' '
+               || COALESCE(status, '') || ' ' || COALESCE(type, ''),
+               'invoices', id
+        FROM invoices
+    """)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 2, COALESCE(name, ''),
+               COALESCE(ico, '') || ' ' || COALESCE(dic, '') || ' ' || COALESCE(address, '') || ' '
+               || COALESCE(contact, '') || ' ' || COALESCE(bank, ''),
+               'companies', id
+        FROM companies
+    """)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 3, COALESCE(person, ''),
+               COALESCE(note, ''),
+               'cash_journal', id
+        FROM cash_journal
+    """)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 4, COALESCE(asset_name, ''),
+               COALESCE(description, '') || ' ' || COALESCE(service_type, '') || ' ' || COALESCE(technician, '') || ' '
+               || COALESCE(notes, ''),
+               'service_records', id
+        FROM service_records
+    """)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 5, COALESCE(title, ''),
+               COALESCE(description, '') || ' ' || COALESCE(event_type, ''),
+               'calendar_events', id
+        FROM calendar_events
+    """)
+    cursor.execute("""
+        INSERT INTO search_index (rowid, title, body, source, ref_id)
+        SELECT id * 8 + 6, COALESCE(original_filename, ''),
+               COALESCE(description, ''),
+               'documents', id
+        FROM documents
+    """)
+
+
+def _migration_008_trips(cursor):
+    """Uložené knihy jízd vozidel po měsících (dávkové generování)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trip_books (
+            vehicle TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            input_hash TEXT NOT NULL,  -- Otisk vstupů (palivo, destinace, řidiči)
+            trip_count INTEGER NOT NULL DEFAULT 0,
+            total_km REAL NOT NULL DEFAULT 0,
+            available_km REAL NOT NULL DEFAULT 0,
+            note TEXT,  -- Důvod prázdné knihy (např. bez paliva)
+            generated_at TEXT NOT NULL,
+            PRIMARY KEY (vehicle, year, month)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trips (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vehicle TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            leg INTEGER NOT NULL,  -- Pořadí jízdy v knize
+            trip_date TEXT NOT NULL,  -- YYYY-MM-DD
+            driver TEXT NOT NULL,
+            start TEXT NOT NULL,
+            destination TEXT NOT NULL,
+            company TEXT,
+            distance REAL NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trips_book ON trips(vehicle, year, month, leg)")
+
+
+def _migration_009_fuel_iso_dates(cursor):
+    """Převod data tankování z DD.MM.YYYY na YYYY-MM-DD."""
+    legacy_formats = ("%d.%m.%Y", "%d. %m. %Y", "%d/%m/%Y", "%Y-%m-%d")
+    cursor.execute("""
+        SELECT id, date FROM fuel_tankings
+        WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+    """)
+    updates = []
+    unknown = []
+    for tanking_id, text in cursor.fetchall():
+        for date_format in legacy_formats:
+            try:
+                iso = datetime.strptime((text or "").strip(), date_format).date().isoformat()
+            except ValueError:
+                continue
+            updates.append((iso, tanking_id))
+            break
+        else:
+            unknown.append(tanking_id)
+    cursor.executemany("UPDATE fuel_tankings SET date = ? WHERE id = ?", updates)
+    if unknown:
+        print(f"⚠️ Tankování s nečitelným datem (ponecháno beze změny): {', '.join(map(str, unknown))}")
+    # Index (vehicle, date) pro měsíční součty rozsahem
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_fuel_tankings_vehicle_date
+        ON fuel_tankings (vehicle, date, fuel_amount)
+    """)
+
+
+def _migration_010_fuel_rollup(cursor):
+    """Měsíční rollup tankování po vozidlech a index knih jízd podle měsíce pro analýzu spotřeby."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_fuel (
+            month TEXT NOT NULL,  -- YYYY-MM
+            vehicle TEXT NOT NULL,
+            tanking_count INTEGER NOT NULL DEFAULT 0,
+            fuel_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, vehicle)
+        )
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fuel_tankings_rollup_insert AFTER INSERT ON fuel_tankings
+        BEGIN
+            INSERT INTO monthly_fuel (month, vehicle, tanking_count, fuel_amount)
+            VALUES (COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.vehicle, ''), 1, COALESCE(NEW.fuel_amount, 0))
+            ON CONFLICT(month, vehicle) DO UPDATE SET
+                tanking_count = tanking_count + 1, fuel_amount = fuel_amount + excluded.fuel_amount;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fuel_tankings_rollup_delete AFTER DELETE ON fuel_tankings
+        BEGIN
+            UPDATE monthly_fuel SET
+                tanking_count = tanking_count - 1, fuel_amount = fuel_amount - COALESCE(OLD.fuel_amount, 0)
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND vehicle = COALESCE(OLD.vehicle, '');
+            DELETE FROM monthly_fuel
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND vehicle = COALESCE(OLD.vehicle, '')
+                AND tanking_count <= 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_fuel_tankings_rollup_update
+        AFTER UPDATE OF date, fuel_amount, vehicle ON fuel_tankings
+        BEGIN
+            UPDATE monthly_fuel SET
+                tanking_count = tanking_count - 1, fuel_amount = fuel_amount - COALESCE(OLD.fuel_amount, 0)
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND vehicle = COALESCE(OLD.vehicle, '');
+            DELETE FROM monthly_fuel
+            WHERE month = COALESCE(substr(OLD.date, 1, 7), '') AND vehicle = COALESCE(OLD.vehicle, '')
+                AND tanking_count <= 0;
+            INSERT INTO monthly_fuel (month, vehicle, tanking_count, fuel_amount)
+            VALUES (COALESCE(substr(NEW.date, 1, 7), ''), COALESCE(NEW.vehicle, ''), 1, COALESCE(NEW.fuel_amount, 0))
+            ON CONFLICT(month, vehicle) DO UPDATE SET
+                tanking_count = tanking_count + 1, fuel_amount = fuel_amount + excluded.fuel_amount;
+        END
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trip_books_month ON trip_books(year, month)")
+
+    cursor.execute("DELETE FROM monthly_fuel")
+    cursor.execute("""
+        INSERT INTO monthly_fuel (month, vehicle, tanking_count, fuel_amount)
+        SELECT COALESCE(substr(date, 1, 7), ''), COALESCE(vehicle, ''), COUNT(*), COALESCE(SUM(fuel_amount), 0)
+        FROM fuel_tankings GROUP BY 1, 2
+    """)
+
+
+def _migration_011_cash_balance_on_read(cursor):
+    """Zůstatek po záznamu pokladny se počítá při čtení - sloupec `balance` se ruší."""
+    cursor.execute("PRAGMA table_info(cash_journal)")
+    if "balance" in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE cash_journal DROP COLUMN balance")
+
+
+# Číslované kroky migrace schématu. Verze databáze je uložena v
+# `PRAGMA user_version`; nový krok se přidává vždy na konec seznamu
+# a už vydané kroky se nemění. Každý krok má vlastní DDL i převod dat
+# a nečte živé definice (`ROLLUPS`, `SEARCH_SOURCES`) ani jiné moduly,
+# aby stará databáze prošla stejnými kroky jako v době jejich vydání.
+MIGRATIONS = [
+    (1, "Základní schéma a výchozí data", _migration_001_base_schema),
+    (2, "Sekundární indexy", _migration_002_indexes),
+    (3, "Měsíční rollup tabulky pro analýzy", _migration_003_rollups),
+    (4, "Kontrolní body zůstatku pokladny", _migration_004_cash_balance_checkpoints),
+    (5, "Otisk importu bankovních pohybů", _migration_005_cash_import_hash),
+    (6, "Otisk obsahu dokumentů", _migration_006_document_content_hash),
+    (7, "Fulltextové vyhledávání", _migration_007_search_index),
+    (8, "Vygenerované knihy jízd", _migration_008_trips),
+    (9, "Datum tankování ve formátu ISO", _migration_009_fuel_iso_dates),
+    (10, "Měsíční rollup tankování", _migration_010_fuel_rollup),
+    (11, "Zůstatek pokladny při čtení", _migration_011_cash_balance_on_read),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn=None):
+    """Vrátí verzi schématu uloženou v databázi."""
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def migrate():
+    """Aplikuje chybějící kroky migrace.
+
+    Aktuální databáze stojí jediné čtení `PRAGMA user_version`. Každý krok
+    běží ve vlastní transakci (BEGIN IMMEDIATE) spolu se zvýšením verze,
+    takže se buď provede celý, nebo vůbec. Vrací počet aplikovaných kroků.
+    """
+    if get_schema_version() >= SCHEMA_VERSION:
+        return 0
+
+    applied = 0
+    conn = connect()
+    try:
+        for version, description, step in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Verzi čteme znovu uvnitř transakce - jiná instance aplikace
+                # mohla krok mezitím provést
+                if get_schema_version(conn) >= version:
+                    conn.rollback()
+                    continue
+                step(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied += 1
+            print(f"🔄 Migrace databáze {version}: {description}")
+    finally:
+        conn.close()
+    return applied
+
+
+def create_tables():
+    """Vytvoření tabulek v databázi (aplikuje chybějící migrace)."""
+    migrate()
 
-    conn.commit()
-    conn.close()
- 
 def fetch_all_invoices():
     """Načte všechny faktury z databáze."""
     conn = connect()
@@ -569,3 +1782,17 @@ def fetch_all_invoices():
     data = cursor.fetchall()
     conn.close()
     return data
+
+
+def fetch_invoice(invoice_id):
+    """Načte jednu fakturu podle ID (nebo None)."""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, invoice_number, type, recipient, issuer, issue_date, tax_date, due_date, 
+               amount_no_tax, tax, total, status, note 
+        FROM invoices WHERE id = ?
+    """, (invoice_id,))
+    data = cursor.fetchone()
+    conn.close()
+    return data
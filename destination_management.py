@@ -3,12 +3,16 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGr
                              QLabel, QLineEdit, QMessageBox, QScrollArea, QFrame)
 from PyQt6.QtCore import Qt
 from database import connect
+import distance_matrix
 
 class DestinationManagementWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("🗺️ Správa destinací")
         self.setGeometry(100, 100, 1200, 800)
+
+        # Matice vzdáleností pro návrh vzdálenosti (načte se až při potřebě)
+        self.distance_matrix = None
         
         # Hlavní scroll area
         scroll_area = QScrollArea()
@@ -286,6 +290,25 @@ class DestinationManagementWindow(QMainWindow):
             for col_idx, value in enumerate(row):
                 self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
 
+    def known_distance(self, start, target):
+        """Vzdálenost z matice vzdáleností (bez NumPy nebo neznámé trasy None)."""
+        if not start or not target or start == target:
+            return None
+        if self.distance_matrix is None:
+            try:
+                self.distance_matrix = distance_matrix.load_matrix()
+            except Exception as e:
+                print(f"⚠️ Matici vzdáleností nelze načíst: {e}")
+                return None
+        if self.distance_matrix is None:
+            return None
+        return self.distance_matrix.distance(start, target)
+
+    def invalidate_distances(self):
+        """Po změně destinací zahodí matici v paměti; soubor cache se podle
+        otisku destinací přepočítá při dalším načtení sám."""
+        self.distance_matrix = None
+
     def add_destination(self):
         """Otevře moderní formulář pro přidání destinace."""
         dialog = QDialog(self)
@@ -393,6 +416,18 @@ class DestinationManagementWindow(QMainWindow):
         
         layout.addLayout(button_layout)
 
+        def suggest_distance():
+            """Doplní vzdálenost nejkratší cestou přes známé destinace."""
+            if distance_input.text():
+                return
+            km = self.known_distance(start_input.text().strip(), destination_input.text().strip())
+            if km is not None:
+                distance_input.setText(f"{km:.0f}")
+                distance_input.setToolTip("Odhad podle nejkratší cesty přes známé destinace")
+
+        start_input.editingFinished.connect(suggest_distance)
+        destination_input.editingFinished.connect(suggest_distance)
+
         def save_destination():
             """Uloží destinaci do databáze."""
             if not all([start_input.text(), destination_input.text(), distance_input.text()]):
@@ -409,6 +444,7 @@ class DestinationManagementWindow(QMainWindow):
                      float(distance_input.text()), note_input.text()))
                 conn.commit()
                 conn.close()
+                self.invalidate_distances()
 
                 self.load_destinations()
                 QMessageBox.information(dialog, "✅ Úspěch", "Destinace byla úspěšně přidána!")
@@ -544,6 +580,7 @@ class DestinationManagementWindow(QMainWindow):
                      float(distance_input.text()), note_input.text(), destination_data[0]))
                 conn.commit()
                 conn.close()
+                self.invalidate_distances()
 
                 self.load_destinations()
                 QMessageBox.information(dialog, "✅ Úspěch", "Destinace byla úspěšně upravena!")
@@ -583,6 +620,7 @@ class DestinationManagementWindow(QMainWindow):
                 cursor.execute("DELETE FROM destinations WHERE id=?", (destination_id,))
                 conn.commit()
                 conn.close()
+                self.invalidate_distances()
 
                 self.load_destinations()
                 QMessageBox.information(self, "✅ Úspěch", f"Destinace {start_name} → {destination_name} byla úspěšně smazána!")
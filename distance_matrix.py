@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Matice vzdáleností mezi známými místy z tabulky `destinations`.
+
+Místa jsou všechny starty a cíle destinací, vzdálenost destinace platí
+oběma směry (u více záznamů stejné dvojice ta nejkratší). Dvojice, které
+v destinacích nejsou, se doplní nejkratší cestou přes známá místa
+(Floyd-Warshall po řádcích v NumPy); nedosažitelné dvojice mají `inf`.
+
+Matice se ukládá do `distance_matrix.npz` spolu s otiskem destinací,
+takže se přepočítá jen po změně tabulky - soubor po úpravě destinací
+není třeba mazat, nesouhlasný otisk stačí.
+
+    matrix = load_matrix()
+    km = matrix.distance("Praha", "Brno")
+    total = matrix.route_length(["Praha", "Brno", "Olomouc", "Praha"])
+
+Vyžaduje NumPy (`NUMPY_SUPPORT`), bez něj `load_matrix()` vrací None.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+from database import connect
+
+try:
+    import numpy as np
+    NUMPY_SUPPORT = True
+except ImportError:
+    NUMPY_SUPPORT = False
+
+MATRIX_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'distance_matrix.npz')
+
+# Verze formátu cache - změna výpočtu vynutí nový soubor
+CACHE_VERSION = 1
+
+
+class DistanceMatrix:
+    """Nejkratší vzdálenosti mezi místy (km, float32, `inf` = nedosažitelné)"""
+
+    def __init__(self, places, distances, direct):
+        self.places = list(places)
+        self.index = {place: i for i, place in enumerate(self.places)}
+        self.distances = distances  # n × n nejkratší vzdálenosti
+        self.direct = direct        # n × n True = vzdálenost přímo z destinací
+
+    def __len__(self):
+        return len(self.places)
+
+    def indices(self, places):
+        """Indexy míst v matici; neznámé místo vyvolá KeyError."""
+        return np.fromiter((self.index[place] for place in places), dtype=np.intp, count=len(places))
+
+    def distance(self, start, target):
+        """Vzdálenost dvou míst, nebo None, pokud místo neznáme nebo k němu nevede cesta."""
+        i, j = self.index.get(start), self.index.get(target)
+        if i is None or j is None or not np.isfinite(self.distances[i, j]):
+            return None
+        return float(self.distances[i, j])
+
+    def route_length(self, stops):
+        """Délka trasy přes zastávky v daném pořadí (`inf`, pokud úsek nevede)."""
+        idx = self.indices(stops)
+        return float(self.distances[idx[:-1], idx[1:]].sum())
+
+    @property
+    def unreachable(self):
+        """Počet dvojic míst (každý směr zvlášť), mezi kterými nevede cesta."""
+        return int(np.count_nonzero(~np.isfinite(self.distances)))
+
+
+def destinations_digest(rows):
+    """Otisk řádků `(start, cíl, vzdálenost)` - klíč cache matice."""
+    payload = json.dumps([CACHE_VERSION, rows], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_destination_rows(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT start, destination, distance FROM destinations ORDER BY id")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def build_matrix(rows):
+    """Matice z řádků `(start, cíl, vzdálenost)` včetně doplnění nejkratších cest."""
+    rows = [(start, target, distance) for start, target, distance in rows
+            if start and target and distance and distance > 0]
+    places = sorted({row[0] for row in rows} | {row[1] for row in rows})
+    index = {place: i for i, place in enumerate(places)}
+    n = len(places)
+
+    distances = np.full((n, n), np.inf, dtype=np.float32)
+    np.fill_diagonal(distances, 0)
+    if rows:
+        starts = np.fromiter((index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+        targets = np.fromiter((index[row[1]] for row in rows), dtype=np.intp, count=len(rows))
+        values = np.fromiter((row[2] for row in rows), dtype=np.float32, count=len(rows))
+        # Oba směry, u duplicitních dvojic nejkratší
+        np.minimum.at(distances, (starts, targets), values)
+        np.minimum.at(distances, (targets, starts), values)
+    direct = np.isfinite(distances)
+
+    # Floyd-Warshall: pro každé mezilehlé místo k jeden vektorový krok nad celou maticí
+    for k in range(n):
+        np.minimum(distances, distances[:, k, None] + distances[None, k, :], out=distances)
+    return DistanceMatrix(places, distances, direct)
+
+
+def _read_cache(path, digest):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['digest']) != digest:
+                return None
+            return DistanceMatrix(data['places'].tolist(), data['distances'], data['direct'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(path, digest, matrix):
+    """Uloží matici atomicky - čtenář nikdy nenajde rozepsaný soubor."""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporary, 'wb') as file:
+            np.savez(file, digest=np.array(digest), places=np.array(matrix.places, dtype=str),
+                     distances=matrix.distances, direct=matrix.direct)
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"⚠️ Matici vzdáleností nelze uložit: {e}")
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def load_matrix(conn=None, path=MATRIX_CACHE_FILE):
+    """Matice vzdáleností z cache, při změně destinací ji přepočítá a uloží.
+
+    Bez NumPy vrací None.
+    """
+    if not NUMPY_SUPPORT:
+        return None
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+    try:
+        rows = load_destination_rows(conn)
+    finally:
+        if own_connection:
+            conn.close()
+
+    digest = destinations_digest(rows)
+    matrix = _read_cache(path, digest)
+    if matrix is None:
+        matrix = build_matrix(rows)
+        _write_cache(path, digest, matrix)
+    return matrix
+
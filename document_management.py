@@ -11,22 +11,35 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                             QListWidgetItem, QTextEdit, QLineEdit, QFormLayout,
                             QWidget, QSplitter, QGroupBox, QScrollArea)
 from PyQt6.QtCore import Qt, QMimeData, QUrl, pyqtSignal
-from PyQt6.QtGui import QPixmap, QPalette, QDragEnterEvent, QDropEvent, QImage
-from database import connect
-
-# Import pro náhled PDF a dokumentů
-try:
-    import fitz  # PyMuPDF
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
+from PyQt6.QtGui import QPixmap, QPalette, QDragEnterEvent, QDropEvent
+from database import connect, register_query
+# Náhled PDF (PyMuPDF) obstarává cache náhledů
+from thumbnail_cache import get_cache, render_pdf, PDF_SUPPORT
+from thumbnail_worker import schedule_thumbnail
+from search_index import schedule_document_text
+from document_storage import store_file, reference_count, release_blob
 
+# Import pro náhled dokumentů
 try:
     from docx import Document
     DOCX_SUPPORT = True
 except ImportError:
     DOCX_SUPPORT = False
 
+# Dokumenty s uživatelem, který je nahrál - ke konkrétnímu záznamu, nebo všechny
+_DOCUMENTS_SQL = """
+    SELECT d.id, d.filename, d.original_filename, d.file_path, d.file_size,
+           d.file_type, d.mime_type, d.related_table, d.related_id,
+           d.description, d.uploaded_by, d.upload_date, u.username
+    FROM documents d
+    LEFT JOIN users u ON d.uploaded_by = u.id
+    {where}
+    ORDER BY d.upload_date DESC
+"""
+RELATED_DOCUMENTS_SQL = register_query("documents.related", _DOCUMENTS_SQL.format(
+    where="WHERE d.related_table = ? AND d.related_id = ?"))
+ALL_DOCUMENTS_SQL = register_query("documents.all", _DOCUMENTS_SQL.format(where=""), full_scan=True)
+
 class DocumentManager:
     """Správa dokumentů"""
     
@@ -80,32 +93,34 @@ class DocumentManager:
         if not is_valid:
             return False, error_msg
         
+        original_filename = os.path.basename(file_path)
+        file_ext = Path(file_path).suffix.lower()
+        target_path = None
+        new_file = False
+        conn = connect()
         try:
-            # Generování unikátního názvu souboru
-            original_filename = os.path.basename(file_path)
-            file_ext = Path(file_path).suffix.lower()
-            unique_filename = f"{uuid.uuid4()}{file_ext}"
+            cursor = conn.cursor()
             
-            # Cílová cesta - pokud není zadán target_directory, použije se výchozí
+            # Cílová cesta - pokud není zadán target_directory, použije se úložiště
+            # adresované obsahem (duplikáty sdílejí jeden soubor)
             if target_directory and os.path.exists(target_directory):
-                documents_folder = target_directory
+                content_hash = None
+                unique_filename = f"{uuid.uuid4()}{file_ext}"
+                target_path = os.path.join(target_directory, unique_filename)
+                shutil.copy2(file_path, target_path)
+                new_file = True
             else:
-                documents_folder = DocumentManager.get_documents_folder()
-                
-            target_path = os.path.join(documents_folder, unique_filename)
-            
-            # Kopírování souboru
-            shutil.copy2(file_path, target_path)
+                target_path, content_hash, new_file = store_file(
+                    cursor, file_path, DocumentManager.get_documents_folder(), file_ext
+                )
+                unique_filename = os.path.basename(target_path)
             
             # Uložení metadat do databáze
-            conn = connect()
-            cursor = conn.cursor()
-            
             cursor.execute("""
                 INSERT INTO documents 
                 (filename, original_filename, file_path, file_size, file_type, mime_type,
-                 related_table, related_id, description, uploaded_by, upload_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 related_table, related_id, description, uploaded_by, upload_date, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 unique_filename,
                 original_filename,
@@ -117,17 +132,27 @@ class DocumentManager:
                 related_id,
                 description,
                 uploaded_by,
-                datetime.now().isoformat()
+                datetime.now().isoformat(),
+                content_hash
             ))
             
             document_id = cursor.lastrowid
             conn.commit()
-            conn.close()
-            
-            return True, f"Dokument úspěšně nahrán (ID: {document_id})"
             
         except Exception as e:
+            conn.rollback()
+            # Nově zapsaný soubor bez záznamu v databázi nenecháme ležet
+            if new_file and target_path and os.path.exists(target_path):
+                os.remove(target_path)
             return False, f"Chyba při nahrávání: {str(e)}"
+        finally:
+            conn.close()
+        
+        # Náhled a text pro vyhledávání se připraví na pozadí
+        schedule_thumbnail(document_id, target_path, file_ext.lstrip('.'))
+        schedule_document_text(document_id, target_path, file_ext.lstrip('.'))
+        
+        return True, f"Dokument úspěšně nahrán (ID: {document_id})"
     
     @staticmethod
     def get_documents(related_table=None, related_id=None):
@@ -136,20 +161,9 @@ class DocumentManager:
         cursor = conn.cursor()
         
         if related_table and related_id:
-            cursor.execute("""
-                SELECT d.*, u.username 
-                FROM documents d
-                LEFT JOIN users u ON d.uploaded_by = u.id
-                WHERE d.related_table = ? AND d.related_id = ?
-                ORDER BY d.upload_date DESC
-            """, (related_table, related_id))
+            cursor.execute(RELATED_DOCUMENTS_SQL, (related_table, related_id))
         else:
-            cursor.execute("""
-                SELECT d.*, u.username 
-                FROM documents d
-                LEFT JOIN users u ON d.uploaded_by = u.id
-                ORDER BY d.upload_date DESC
-            """)
+            cursor.execute(ALL_DOCUMENTS_SQL)
         
         documents = cursor.fetchall()
         conn.close()
@@ -163,23 +177,24 @@ class DocumentManager:
             cursor = conn.cursor()
             
             # Načtení cesty k souboru
-            cursor.execute("SELECT file_path FROM documents WHERE id = ?", (document_id,))
+            cursor.execute("SELECT file_path, content_hash FROM documents WHERE id = ?", (document_id,))
             result = cursor.fetchone()
             
             if not result:
                 conn.close()
                 return False, "Dokument nenalezen"
             
-            file_path = result[0]
+            file_path, content_hash = result
             
-            # Smazání záznamu z databáze
+            # Smazání záznamu z databáze a zbývající odkazy na soubor
             cursor.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+            remaining = reference_count(cursor, content_hash, file_path) if content_hash else 0
             conn.commit()
             conn.close()
+            get_cache().invalidate(document_id)
             
-            # Smazání fyzického souboru
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Smazání fyzického souboru (sdílený soubor až s posledním odkazem)
+            release_blob(file_path, content_hash, remaining)
             
             return True, "Dokument byl smazán"
             
@@ -236,8 +251,8 @@ class DocumentViewer(QWidget):
         
         self.setLayout(layout)
     
-    def display_document(self, document_path, file_type):
-        """Zobrazí dokument"""
+    def display_document(self, document_path, file_type, document_id=None):
+        """Zobrazí dokument; s `document_id` se náhled bere z cache náhledů"""
         self.current_document = document_path
         
         try:
@@ -248,9 +263,9 @@ class DocumentViewer(QWidget):
                 return
             
             if file_type in ['png', 'jpg', 'jpeg']:
-                self.display_image(document_path)
+                self.display_image(document_path, document_id)
             elif file_type == 'pdf':
-                self.display_pdf_preview(document_path)
+                self.display_pdf_preview(document_path, document_id)
             elif file_type in ['txt']:
                 self.display_text_preview(document_path)
             elif file_type in ['doc', 'docx']:
@@ -270,10 +285,15 @@ class DocumentViewer(QWidget):
                                Qt.TransformationMode.SmoothTransformation)
         return pixmap
     
-    def display_image(self, image_path):
+    def display_image(self, image_path, document_id=None):
         """Zobrazí obrázek"""
         try:
-            pixmap = QPixmap(image_path)
+            if document_id is not None:
+                # Zmenšený náhled z cache (dekódovaný rovnou v cílové velikosti)
+                image = get_cache().get(document_id, image_path, Path(image_path).suffix.lstrip('.'))
+                pixmap = QPixmap.fromImage(image) if image is not None else QPixmap()
+            else:
+                pixmap = QPixmap(image_path)
             if not pixmap.isNull():
                 # Škálování na rozumnou velikost
                 scaled_pixmap = self.scale_pixmap(pixmap)
@@ -296,48 +316,29 @@ class DocumentViewer(QWidget):
             self.content_label.update()
             self.content_label.repaint()
     
-    def display_pdf_preview(self, pdf_path):
+    def display_pdf_preview(self, pdf_path, document_id=None):
         """Zobrazí náhled PDF - první stránku jako obrázek"""
         if not PDF_SUPPORT:
             self.display_pdf_info_fallback(pdf_path)
             return
             
         try:
-            # Otevření PDF dokumentu
-            doc = fitz.open(pdf_path)
-            
-            if len(doc) == 0:
-                self.content_label.setPixmap(QPixmap())
-                self.content_label.setText("❌ PDF dokument je prázdný")
-                doc.close()
-                return
-            
-            # Načtení první stránky
-            page = doc[0]
-            
-            # Konverze na obrázek (matrix pro zvětšení kvality)
-            mat = fitz.Matrix(2.0, 2.0)  # 2x zoom pro lepší kvalitu
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Konverze na QImage
-            img_data = pix.tobytes("ppm")
-            qimg = QImage.fromData(img_data)
+            # Náhled z cache; první stránka se vykresluje rovnou v cílové velikosti
+            if document_id is not None:
+                qimg = get_cache().get(document_id, pdf_path, 'pdf')
+            else:
+                rendered = render_pdf(pdf_path)
+                qimg = rendered[0].copy() if rendered else None
             
-            if not qimg.isNull():
-                # Konverze na QPixmap a škálování
-                pixmap = QPixmap.fromImage(qimg)
-                scaled_pixmap = self.scale_pixmap(pixmap)
-                
+            if qimg is not None and not qimg.isNull():
                 # Zobrazení náhledu
                 self.content_label.setText("")
-                self.content_label.setPixmap(scaled_pixmap)
+                self.content_label.setPixmap(QPixmap.fromImage(qimg))
                 self.content_label.update()
                 self.content_label.repaint()
             else:
                 self.display_pdf_info_fallback(pdf_path)
             
-            doc.close()
-            
         except Exception as e:
             self.display_pdf_info_fallback(pdf_path)
     
@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QAction, QPixmap
 from document_management import DocumentManager, DocumentViewer, DocumentUploadDialog
+from thumbnail_worker import prefetch_thumbnails
 
 class DocumentManagementWindow(QMainWindow):
     """Okno pro správu dokumentů"""
@@ -232,6 +233,9 @@ class DocumentManagementWindow(QMainWindow):
             username = doc[12] if doc[12] else "Neznámý"  # username
             user_item = QTableWidgetItem(username)
             self.documents_table.setItem(row, 4, user_item)
+        
+        # Náhledy zobrazených dokumentů se připraví na pozadí
+        prefetch_thumbnails([(doc[0], doc[3], doc[5]) for doc in documents])
     
     def on_document_selected(self):
         """Při výběru dokumentu v tabulce"""
@@ -253,7 +257,7 @@ class DocumentManagementWindow(QMainWindow):
                     file_type = doc[5]  # file_type
                     
                     if os.path.exists(file_path):
-                        self.document_viewer.display_document(file_path, file_type)
+                        self.document_viewer.display_document(file_path, file_type, doc[0])
                         
                         # FORCE REFRESH celého window
                         self.document_viewer.update()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Úložiště dokumentů adresované obsahem.
+
+Soubor se ukládá pod otiskem SHA-256 obsahu do rozdělených složek
+`documents/ab/cd/<otisk><přípona>`. Stejný soubor nahraný vícekrát
+má jediný fyzický soubor (blob), na který odkazuje více řádků tabulky
+`documents` (sloupec `content_hash`). Počet odkazů je počet těchto
+řádků - soubor se smaže až s posledním odkazem (`release_blob`).
+
+Nový soubor se kopíruje a zároveň počítá otisk (jedno čtení zdroje).
+Pokud už úložiště obsahuje blob stejné velikosti, soubor je nejspíš
+duplikát - nejdřív se jen spočítá otisk a při shodě se nic nekopíruje.
+"""
+
+import os
+import hashlib
+import tempfile
+
+# Velikost bloku při čtení a kopírování
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_path(folder, content_hash, extension):
+    """Cesta k blobu: dvě úrovně složek podle začátku otisku."""
+    return os.path.join(folder, content_hash[:2], content_hash[2:4], f"{content_hash}{extension}")
+
+
+def hash_file(file_path):
+    """SHA-256 obsahu souboru."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_and_hash(file_path, folder):
+    """Zkopíruje soubor do dočasného souboru v úložišti a spočítá otisk."""
+    digest = hashlib.sha256()
+    descriptor, temporary = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with open(file_path, 'rb') as source, os.fdopen(descriptor, 'wb') as target:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return digest.hexdigest(), temporary
+
+
+def _has_blob_of_size(cursor, size):
+    cursor.execute("""
+        SELECT 1 FROM documents WHERE content_hash IS NOT NULL AND file_size = ? LIMIT 1
+    """, (size,))
+    return cursor.fetchone() is not None
+
+
+def store_file(cursor, file_path, folder, extension):
+    """Uloží soubor do úložiště. Vrací `(cesta, otisk, nový blob)`.
+
+    Duplikát existujícího blobu se nekopíruje - vrátí se cesta
+    k existujícímu blobu a `False`.
+    """
+    size = os.path.getsize(file_path)
+
+    if _has_blob_of_size(cursor, size):
+        content_hash = hash_file(file_path)
+        path = blob_path(folder, content_hash, extension)
+        if os.path.exists(path):
+            return path, content_hash, False
+
+    content_hash, temporary = _copy_and_hash(file_path, folder)
+    path = blob_path(folder, content_hash, extension)
+    if os.path.exists(path):
+        os.remove(temporary)
+        return path, content_hash, False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(temporary, path)
+    return path, content_hash, True
+
+
+def reference_count(cursor, content_hash, file_path):
+    """Počet dokumentů odkazujících na blob."""
+    cursor.execute("""
+        SELECT COUNT(*) FROM documents WHERE content_hash = ? AND file_path = ?
+    """, (content_hash, file_path))
+    return cursor.fetchone()[0]
+
+
+def release_blob(file_path, content_hash, remaining):
+    """Smaže soubor smazaného dokumentu, pokud na něj nic neodkazuje.
+
+    `remaining` je počet odkazů po smazání řádku. Dokumenty bez otisku
+    (starší úložiště s UUID názvy) mají vlastní soubor a mažou se vždy.
+    Vrací True, pokud byl soubor smazán.
+    """
+    if content_hash and remaining > 0:
+        return False
+    if not os.path.exists(file_path):
+        return False
+    os.remove(file_path)
+    if content_hash:
+        # Prázdné složky rozdělení po posledním blobu
+        for folder in (os.path.dirname(file_path), os.path.dirname(os.path.dirname(file_path))):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                break
+    return True
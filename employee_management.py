@@ -7,8 +7,22 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont
 from database import connect
+from async_loader import AsyncLoader, bind_loading_indicator
 from employee_dialogs import PositionChangeDialog, ContractManagementDialog, TrainingManagementDialog
 
+
+def query_employees(conn):
+    """Seznam zaměstnanců (běží ve vlákně AsyncLoaderu)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, first_name, last_name, position, department, 
+               hire_date, salary, phone, email, active
+        FROM employees 
+        ORDER BY last_name, first_name
+    """)
+    return cursor.fetchall()
+
+
 class EmployeeManagementWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -44,8 +58,11 @@ class EmployeeManagementWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
         
-        # Vytvoření tabulky a načtení dat
-        self.create_employee_tables()
+        # Načítání dat na pozadí
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self, [self.table])
+
+        # Načtení dat (tabulky vytváří migrace v database.py)
         self.load_employees()
 
     def create_header(self, layout):
@@ -365,79 +382,17 @@ class EmployeeManagementWindow(QMainWindow):
             }
         """)
 
-    def create_employee_tables(self):
-        """Vytvoří tabulky pro správu zaměstnanců"""
-        try:
-            cursor = self.db.cursor()
-            
-            # Tabulka zaměstnanců
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS employees (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    first_name TEXT NOT NULL,
-                    last_name TEXT NOT NULL,
-                    position TEXT,
-                    department TEXT,
-                    hire_date TEXT,
-                    birth_date TEXT,
-                    phone TEXT,
-                    email TEXT,
-                    address TEXT,
-                    salary REAL,
-                    active INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabulka mezd
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS employee_salaries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    employee_id INTEGER,
-                    month TEXT,
-                    base_salary REAL,
-                    overtime REAL,
-                    bonus REAL,
-                    deductions REAL,
-                    net_salary REAL,
-                    paid_date TEXT,
-                    FOREIGN KEY (employee_id) REFERENCES employees (id)
-                )
-            """)
-            
-            # Tabulka docházky
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS employee_attendance (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    employee_id INTEGER,
-                    date TEXT,
-                    start_time TEXT,
-                    end_time TEXT,
-                    break_time INTEGER DEFAULT 0,
-                    overtime INTEGER DEFAULT 0,
-                    absence_type TEXT,
-                    notes TEXT,
-                    FOREIGN KEY (employee_id) REFERENCES employees (id)
-                )
-            """)
-            
-            self.db.commit()
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při vytváření tabulek: {str(e)}")
-
     def load_employees(self):
-        """Načte seznam zaměstnanců"""
-        try:
-            cursor = self.db.cursor()
-            cursor.execute("""
-                SELECT id, first_name, last_name, position, department, 
-                       hire_date, salary, phone, email, active
-                FROM employees 
-                ORDER BY last_name, first_name
-            """)
-            rows = cursor.fetchall()
+        """Spustí načtení seznamu zaměstnanců na pozadí"""
+        self.loader.submit("employees", query_employees,
+                           on_done=self.show_employees, on_error=self.show_load_error)
 
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání zaměstnanců: {str(error)}")
+
+    def show_employees(self, rows):
+        """Zobrazí seznam zaměstnanců"""
+        try:
             self.table.setRowCount(len(rows))
             
             total_employees = len(rows)
@@ -640,7 +595,8 @@ class EmployeeManagementWindow(QMainWindow):
             QMessageBox.critical(self, "Chyba", f"Chyba při evidenci školení: {str(e)}")
 
     def closeEvent(self, event):
-        """Uzavře databázové připojení při zavření okna"""
+        """Zruší načítání a uzavře databázové připojení při zavření okna"""
+        self.loader.cancel_all()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
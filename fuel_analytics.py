@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Analýza spotřeby paliva po vozidlech a měsících.
+
+Jízdy a kilometry se berou ze souhrnů uložených knih jízd (`trip_books`,
+viz `trip_batch`), litry z měsíčního rollupu tankování (`monthly_fuel`,
+viz `database.ROLLUPS`) a normovaná spotřeba z `cars.consumption`. Obě
+tabulky mají řádek na vozidlo a měsíc, takže dotaz čte řádově počet
+vozidel × měsíců bez ohledu na počet tankování. Náklady, průměr l/100 km
+i příznak odchylky spočítá jeden dotaz s GROUP BY - změna období znamená
+jen nový dotaz.
+
+    rows = fuel_analysis(conn, "2025-01-01", "2026-01-01", band=0.15)
+    totals = analysis_totals(rows)
+
+Odchylka: průměr l/100 km mimo pásmo `normovaná spotřeba ± band`
+(např. 0.15 = ±15 %), nebo tankování v měsíci bez uložených jízd.
+"""
+
+from collections import namedtuple
+
+from database import register_query
+
+# Cena paliva pro výpočet nákladů (Kč/l) - tankování cenu neukládá
+DEFAULT_FUEL_PRICE = 44.7
+
+# Výchozí tolerance spotřeby vůči normě vozidla (±15 %)
+DEFAULT_ANOMALY_BAND = 0.15
+
+# Příznaky odchylky
+ANOMALY_HIGH = 'high'
+ANOMALY_LOW = 'low'
+ANOMALY_NO_TRIPS = 'no_trips'
+
+ANOMALY_LABELS = {
+    ANOMALY_HIGH: "Vysoká spotřeba",
+    ANOMALY_LOW: "Nízká spotřeba",
+    ANOMALY_NO_TRIPS: "Tankování bez jízd",
+}
+
+# Jeden řádek analýzy; `consumption` je skutečný průměr l/100 km (None bez km),
+# `nominal` normovaná spotřeba vozidla, `anomaly` jeden z příznaků nebo None
+FuelAnalysisRow = namedtuple(
+    'FuelAnalysisRow', 'vehicle month trips km litres cost consumption nominal anomaly'
+)
+
+# Rollup tankování a knihy jízd sloučené přes UNION ALL a sečtené po (vozidlo, měsíc)
+_ANALYSIS_SQL = """
+    SELECT vehicle, month, trips, km, litres, litres * ? AS cost, consumption, nominal,
+        CASE
+            WHEN km = 0 THEN CASE WHEN litres > 0 THEN '{no_trips}' END
+            WHEN nominal IS NULL OR nominal <= 0 THEN NULL
+            WHEN consumption > nominal * (1 + ?) THEN '{high}'
+            WHEN consumption < nominal * (1 - ?) THEN '{low}'
+        END AS anomaly
+    FROM (
+        SELECT vehicle, month, SUM(trips) AS trips, SUM(km) AS km, SUM(litres) AS litres,
+            CASE WHEN SUM(km) > 0 THEN SUM(litres) * 100.0 / SUM(km) END AS consumption,
+            (SELECT consumption FROM cars WHERE registration = vehicle ORDER BY id LIMIT 1) AS nominal
+        FROM (
+            SELECT vehicle, month, 0 AS trips, 0 AS km, fuel_amount AS litres
+            FROM monthly_fuel
+            WHERE {vehicle_filter} month >= ? AND month < ?
+            UNION ALL
+            SELECT vehicle, printf('%04d-%02d', year, month), trip_count, total_km, 0
+            FROM trip_books
+            WHERE {vehicle_filter} (year, month) >= (?, ?) AND (year, month) < (?, ?)
+        )
+        GROUP BY vehicle, month
+    )
+    ORDER BY month, vehicle
+"""
+
+_FLAGS = dict(no_trips=ANOMALY_NO_TRIPS, high=ANOMALY_HIGH, low=ANOMALY_LOW)
+
+FLEET_ANALYSIS_SQL = register_query("fuel.analysis", _ANALYSIS_SQL.format(
+    vehicle_filter="", **_FLAGS
+))
+
+VEHICLE_ANALYSIS_SQL = register_query("fuel.vehicle_analysis", _ANALYSIS_SQL.format(
+    vehicle_filter="vehicle = ? AND", **_FLAGS
+))
+
+
+def fuel_analysis(conn, date_from, date_to, vehicle=None,
+                  band=DEFAULT_ANOMALY_BAND, fuel_price=DEFAULT_FUEL_PRICE):
+    """Spotřeba po vozidlech a měsících jako seznam `FuelAnalysisRow`.
+
+    Období je `date_from` až `date_to` (vyloučené, první den po období),
+    obě meze ve tvaru YYYY-MM-DD a na začátku měsíce - knihy jízd jsou
+    měsíční. Bez `vehicle` vrací všechna vozidla.
+    """
+    # Měsíce YYYY-MM (rollup) a (rok, měsíc) (knihy jízd); měsíc date_to se nepočítá
+    month_from, month_to = date_from[:7], date_to[:7]
+    book_from = (int(date_from[:4]), int(date_from[5:7]))
+    book_to = (int(date_to[:4]), int(date_to[5:7]))
+    cursor = conn.cursor()
+    if vehicle is None:
+        cursor.execute(FLEET_ANALYSIS_SQL, (
+            fuel_price, band, band, month_from, month_to, *book_from, *book_to
+        ))
+    else:
+        cursor.execute(VEHICLE_ANALYSIS_SQL, (
+            fuel_price, band, band, vehicle, month_from, month_to, vehicle, *book_from, *book_to
+        ))
+    return [FuelAnalysisRow(*row) for row in cursor.fetchall()]
+
+
+def analysis_totals(rows):
+    """Souhrn analýzy: jízdy, km, litry, náklady, průměr l/100 km a počet odchylek.
+
+    Průměr počítá jen s měsíci, které mají jízdy (litry bez km by ho zkreslily).
+    """
+    km = sum(row.km for row in rows)
+    litres_with_trips = sum(row.litres for row in rows if row.km)
+    return {
+        'trips': sum(row.trips for row in rows),
+        'km': km,
+        'litres': sum(row.litres for row in rows),
+        'cost': sum(row.cost for row in rows),
+        'consumption': litres_with_trips * 100 / km if km else None,
+        'anomalies': sum(1 for row in rows if row.anomaly),
+    }
+
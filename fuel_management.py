@@ -5,6 +5,10 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import QDate, Qt
 from database import connect
+from fuel_summary import monthly_fuel_summary, month_bounds
+
+# Datum tankování se ukládá jako YYYY-MM-DD (viz fuel_summary.py)
+DATE_FORMAT = "yyyy-MM-dd"
 
 class FuelManagementWindow(QMainWindow):
     def __init__(self):
@@ -99,6 +103,17 @@ class FuelManagementWindow(QMainWindow):
         
         table_frame.layout().addWidget(self.table)
         layout.addWidget(table_frame)
+        
+        # Měsíční souhrn za aktuální rok
+        summary_frame = self.create_section_frame("📊 Měsíční přehled", "Natankované litry vozidel po měsících v aktuálním roce")
+        self.summary_table = QTableWidget(0, 4)
+        self.summary_table.setObjectName("dataTable")
+        self.summary_table.setHorizontalHeaderLabels([
+            "Vozidlo", "Měsíc", "Počet tankování", "Množství (litry)"
+        ])
+        self.summary_table.setAlternatingRowColors(True)
+        summary_frame.layout().addWidget(self.summary_table)
+        layout.addWidget(summary_frame)
 
     def create_section_frame(self, title, subtitle):
         """Vytvoří rám pro sekci"""
@@ -279,7 +294,7 @@ class FuelManagementWindow(QMainWindow):
         """Načte seznam tankování z databáze a zobrazí ho v tabulce."""
         conn = connect()
         cursor = conn.cursor()
-        cursor.execute("SELECT id, date, vehicle, fuel_amount FROM fuel_tankings")
+        cursor.execute("SELECT id, date, vehicle, fuel_amount FROM fuel_tankings ORDER BY date, id")
         rows = cursor.fetchall()
         conn.close()
 
@@ -288,6 +303,20 @@ class FuelManagementWindow(QMainWindow):
             for col_idx, value in enumerate(row):
                 self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
 
+        self.load_fuel_summary()
+
+    def load_fuel_summary(self):
+        """Načte měsíční souhrn tankování za aktuální rok."""
+        year = QDate.currentDate().year()
+        conn = connect()
+        rows = monthly_fuel_summary(conn, month_bounds(year, 1)[0], month_bounds(year, 12)[1])
+        conn.close()
+
+        self.summary_table.setRowCount(len(rows))
+        for row_idx, (vehicle, month, count, litres) in enumerate(rows):
+            for col_idx, value in enumerate((vehicle, month, count, f"{litres:.1f}")):
+                self.summary_table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
+
     def add_fuel(self):
         """Otevře moderní formulář pro přidání tankování."""
         dialog = QDialog(self)
@@ -381,7 +410,7 @@ class FuelManagementWindow(QMainWindow):
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO fuel_tankings (date, vehicle, fuel_amount) VALUES (?, ?, ?)
-                """, (date_input.date().toString("dd.MM.yyyy"), vehicle_box.currentText(), float(fuel_input.text())))
+                """, (date_input.date().toString(DATE_FORMAT), vehicle_box.currentText(), float(fuel_input.text())))
                 conn.commit()
                 conn.close()
 
@@ -458,7 +487,7 @@ class FuelManagementWindow(QMainWindow):
         
         date_input = QDateEdit()
         date_input.setCalendarPopup(True)
-        date_input.setDate(QDate.fromString(fuel_data[1], "dd.MM.yyyy"))
+        date_input.setDate(QDate.fromString(fuel_data[1], DATE_FORMAT))
         form_layout.addRow("📅 Datum:", date_input)
 
         vehicle_box = QComboBox()
@@ -494,7 +523,7 @@ class FuelManagementWindow(QMainWindow):
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE fuel_tankings SET date=?, vehicle=?, fuel_amount=? WHERE id=?
-                """, (date_input.date().toString("dd.MM.yyyy"), vehicle_box.currentText(), 
+                """, (date_input.date().toString(DATE_FORMAT), vehicle_box.currentText(), 
                      float(fuel_input.text()), fuel_data[0]))
                 conn.commit()
                 conn.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dotazy nad tankováním (`fuel_tankings`) sdílené okny knihy jízd.
+
+Datum tankování je uložené jako YYYY-MM-DD (migrace 9 převedla starší
+záznamy ve tvaru DD.MM.YYYY). Měsíc se proto hledá rozsahem
+`date >= první den AND date < první den dalšího měsíce`, který využije
+index `idx_fuel_tankings_vehicle_date (vehicle, date, fuel_amount)`.
+
+    litres = month_fuel(conn, "1AB 2345", 2025, 3)
+    rows = monthly_fuel_summary(conn, "2025-01-01", "2026-01-01")
+"""
+
+from datetime import date
+
+from database import register_query
+
+MONTH_FUEL_SQL = register_query("fuel.month_total", """
+    SELECT COALESCE(SUM(fuel_amount), 0) FROM fuel_tankings
+    WHERE vehicle = ? AND date >= ? AND date < ?
+""")
+
+MONTH_TANKINGS_SQL = register_query("fuel.month_tankings", """
+    SELECT fuel_amount FROM fuel_tankings
+    WHERE vehicle = ? AND date >= ? AND date < ? ORDER BY date, id
+""")
+
+VEHICLE_SUMMARY_SQL = register_query("fuel.vehicle_monthly_summary", """
+    SELECT vehicle, substr(date, 1, 7) AS month, COUNT(*), SUM(fuel_amount)
+    FROM fuel_tankings
+    WHERE vehicle = ? AND date >= ? AND date < ?
+    GROUP BY vehicle, month ORDER BY month
+""")
+
+# Souhrn všech vozidel z rollupu monthly_fuel - bez vozidla by se jinak
+# procházel celý index (vehicle, date)
+FLEET_SUMMARY_SQL = register_query("fuel.monthly_summary", """
+    SELECT vehicle, month, tanking_count, fuel_amount
+    FROM monthly_fuel
+    WHERE month >= ? AND month < ?
+    ORDER BY vehicle, month
+""")
+
+
+def month_bounds(year, month):
+    """První den měsíce a první den následujícího měsíce (YYYY-MM-DD)."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def month_fuel(conn, vehicle, year, month):
+    """Natankované litry vozidla za měsíc."""
+    cursor = conn.cursor()
+    cursor.execute(MONTH_FUEL_SQL, (vehicle, *month_bounds(year, month)))
+    return cursor.fetchone()[0]
+
+
+def month_tankings(conn, vehicle, year, month):
+    """Jednotlivá tankování vozidla za měsíc (litry v pořadí data)."""
+    cursor = conn.cursor()
+    cursor.execute(MONTH_TANKINGS_SQL, (vehicle, *month_bounds(year, month)))
+    return [row[0] or 0 for row in cursor.fetchall()]
+
+
+def monthly_fuel_summary(conn, date_from, date_to, vehicle=None):
+    """Měsíční souhrn tankování: řádky `(vozidlo, YYYY-MM, počet tankování, litry)`.
+
+    `date_to` je vyloučené (první den po období). Bez `vehicle` vrací
+    souhrn všech vozidel z rollupu po celých měsících - `date_from`
+    i `date_to` mají být první dny měsíců (viz `month_bounds`).
+    """
+    cursor = conn.cursor()
+    if vehicle is None:
+        cursor.execute(FLEET_SUMMARY_SQL, (date_from[:7], date_to[:7]))
+    else:
+        cursor.execute(VEHICLE_SUMMARY_SQL, (vehicle, date_from, date_to))
+    return cursor.fetchall()
@@ -1,75 +1,107 @@
+import importlib
 from PyQt6.QtWidgets import (
     QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QHBoxLayout,
-    QMenuBar, QMenu, QMessageBox, QGroupBox, QGridLayout, QFrame, QScrollArea
+    QMenuBar, QMenu, QMessageBox, QGroupBox, QGridLayout, QFrame, QScrollArea,
+    QLineEdit, QListWidget, QListWidgetItem
 )
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer
 from PyQt6.QtGui import QAction, QFont, QIcon
-from database import create_tables
-from invoice_management import InvoiceManagementWindow
-from company_managment import CompanyManagementWindow
-from cash_journal import CashJournalWindow
-from trip_book import TripBookWindow
 from user_management import UserManager
+from async_loader import AsyncLoader
 from simple_login import SimpleLoginDialog
-from company_settings import CompanySettingsWindow
-from user_management_window import UserManagementWindow
-from role_management_window import RoleManagementWindow
-from document_management_window import DocumentManagementWindow
-from asset_management import AssetManagementWindow
-from analytics_reports import AnalyticsReportsWindow
-from calendar_schedule import CalendarScheduleWindow
-from warehouse_management import WarehouseManagementWindow
-from employee_management import EmployeeManagementWindow
-from service_maintenance import ServiceMaintenanceWindow
-from documentation_window import DocumentationWindow
+from startup_timing import phase, mark
+
+# Okna aplikace: klíč -> (modul, třída, nová instance při každém otevření).
+# Modul se importuje a okno vytvoří až při prvním otevření. Okna, která
+# při zavření uvolňují připojení k databázi, se vytvářejí pokaždé znovu.
+WINDOWS = {
+    'invoices': ('invoice_management', 'InvoiceManagementWindow', False),
+    'companies': ('company_managment', 'CompanyManagementWindow', False),
+    'cash_journal': ('cash_journal', 'CashJournalWindow', False),
+    'trip_book': ('trip_book', 'TripBookWindow', False),
+    'company_settings': ('company_settings', 'CompanySettingsWindow', False),
+    'documentation': ('documentation_window', 'DocumentationWindow', False),
+    'users': ('user_management_window', 'UserManagementWindow', True),
+    'roles': ('role_management_window', 'RoleManagementWindow', True),
+    'documents': ('document_management_window', 'DocumentManagementWindow', True),
+    'assets': ('asset_management', 'AssetManagementWindow', True),
+    'analytics': ('analytics_reports', 'AnalyticsReportsWindow', True),
+    'calendar': ('calendar_schedule', 'CalendarScheduleWindow', True),
+    'warehouse': ('warehouse_management', 'WarehouseManagementWindow', True),
+    'employees': ('employee_management', 'EmployeeManagementWindow', True),
+    'service': ('service_maintenance', 'ServiceMaintenanceWindow', True),
+}
+
+# Výsledky hledání: zdrojová tabulka -> (okno, potřebné oprávnění nebo None)
+SEARCH_TARGETS = {
+    'invoices': ('show_invoice_management', 'invoices'),
+    'companies': ('show_company_management', 'companies'),
+    'cash_journal': ('show_cash_journal', 'cash_journal'),
+    'service_records': ('show_service_maintenance', None),
+    'calendar_events': ('show_calendar_schedule', None),
+    'documents': ('show_document_management', None),
+}
+
+# Prodleva hledání po posledním stisku klávesy (ms)
+SEARCH_DELAY_MS = 200
+
+
+class WindowRegistry:
+    """Líně vytvářená okna aplikace"""
+
+    def __init__(self, windows=None):
+        self._specs = WINDOWS if windows is None else windows
+        self._instances = {}
+
+    def get(self, key, **kwargs):
+        """Vrátí okno - při prvním použití naimportuje modul a okno vytvoří."""
+        module_name, class_name, fresh = self._specs[key]
+        window = None if fresh else self._instances.get(key)
+        if window is None:
+            with phase(f"okno {key}"):
+                module = importlib.import_module(module_name)
+                window = getattr(module, class_name)(**kwargs)
+            self._instances[key] = window
+        return window
+
+    def show(self, key, **kwargs):
+        """Zobrazí okno a přenese ho do popředí."""
+        window = self.get(key, **kwargs)
+        window.show()
+        window.raise_()
+        return window
 
 class InvoiceApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.current_user = None
-        self.invoice_window = None
-        self.company_window = None
-        self.cash_journal_window = None
-        self.trip_book_window = None
-        self.company_settings_window = None
-        self.user_management_window = None
-        self.role_management_window = None
-        self.documentation_window = None
+        self.windows = WindowRegistry()
+        self.loader = AsyncLoader(self)
         
         self.setWindowTitle("Správa firmy - Projekt & Develop s.r.o.")
         self.setGeometry(200, 200, 900, 700)
         
         # Přihlášení uživatele
-        if not self.login():
-            return
-        
-        # Inicializace databáze
-        create_tables()
-        
-        # Inicializace oken po přihlášení
-        self.init_windows()
-        self.init_ui()
-        self.setup_menu()
+        with phase("přihlášení (uživatel)"):
+            if not self.login():
+                return
+        
+        # Okna se vytvářejí až při prvním otevření (WindowRegistry)
+        with phase("dashboard"):
+            self.init_ui()
+            self.setup_menu()
 
     
     def login(self):
         """Zobrazí dialog pro přihlášení"""
         login_dialog = SimpleLoginDialog()
+        mark("přihlašovací dialog")
         if login_dialog.exec() == login_dialog.DialogCode.Accepted:
             self.current_user = login_dialog.get_current_user()
             return True
         else:
             return False
     
-    def init_windows(self):
-        """Inicializuje okna aplikace"""
-        self.invoice_window = InvoiceManagementWindow()
-        self.company_window = CompanyManagementWindow()
-        self.cash_journal_window = CashJournalWindow()
-        self.trip_book_window = TripBookWindow()
-        self.company_settings_window = CompanySettingsWindow()
-        self.user_management_window = UserManagementWindow()
-    
     def init_ui(self):
         """Inicializuje moderní uživatelské rozhraní"""
         central_widget = QWidget()
@@ -91,6 +123,9 @@ class InvoiceApp(QMainWindow):
         # Moderní hlavička
         self.create_header(layout)
         
+        # Globální vyhledávání
+        self.create_search(layout)
+        
         # Dashboard sekcе
         self.create_dashboard(layout)
         
@@ -131,6 +166,84 @@ class InvoiceApp(QMainWindow):
         
         layout.addWidget(header_frame)
     
+    def create_search(self, layout):
+        """Vytvoří pole pro vyhledávání napříč agendami"""
+        search_frame = self.create_section_frame(
+            "🔍 Vyhledávání", "Faktury, firmy, pokladna, servis, kalendář a dokumenty"
+        )
+        
+        self.search_input = QLineEdit()
+        self.search_input.setObjectName("searchInput")
+        self.search_input.setPlaceholderText("Hledat číslo faktury, firmu, poznámku, text dokumentu...")
+        self.search_input.setClearButtonEnabled(True)
+        search_frame.layout().addWidget(self.search_input)
+        
+        self.search_results = QListWidget()
+        self.search_results.setObjectName("searchResults")
+        self.search_results.setMaximumHeight(240)
+        self.search_results.hide()
+        self.search_results.itemActivated.connect(self.open_search_result)
+        search_frame.layout().addWidget(self.search_results)
+        
+        # Hledá se až po krátké pauze v psaní
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.run_search)
+        
+        layout.addWidget(search_frame)
+    
+    def search_sources(self):
+        """Zdroje, které smí uživatel prohledávat"""
+        return [
+            source for source, (_, permission) in SEARCH_TARGETS.items()
+            if permission is None or UserManager.has_permission(self.current_user['role'], permission)
+        ]
+    
+    def run_search(self):
+        """Spustí hledání na pozadí"""
+        # search_index načítá PyMuPDF (text PDF) - importuje se až při prvním hledání
+        from search_index import search
+
+        self.search_timer.stop()
+        text = self.search_input.text().strip()
+        if not text:
+            self.loader.cancel("search")
+            self.search_results.clear()
+            self.search_results.hide()
+            return
+        self.loader.submit("search", search, text, self.search_sources(),
+                           on_done=self.show_search_results, on_error=self.show_search_error)
+    
+    def show_search_results(self, hits):
+        """Zobrazí výsledky hledání"""
+        from search_index import SOURCE_LABELS
+
+        self.search_results.clear()
+        if not hits:
+            self.search_results.addItem("Nic nenalezeno")
+        for hit in hits:
+            text = f"{SOURCE_LABELS.get(hit.source, hit.source)}  {hit.title}"
+            if hit.snippet and hit.snippet != hit.title:
+                text += f"  —  {hit.snippet}"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, (hit.source, hit.ref_id))
+            self.search_results.addItem(item)
+        self.search_results.show()
+    
+    def show_search_error(self, error):
+        QMessageBox.warning(self, "Vyhledávání", f"Hledání se nezdařilo:\n{error}")
+    
+    def open_search_result(self, item):
+        """Otevře okno agendy vybraného výsledku"""
+        target = item.data(Qt.ItemDataRole.UserRole)
+        if not target:
+            return
+        method, _ = SEARCH_TARGETS[target[0]]
+        getattr(self, method)()
+    
     def create_dashboard(self, layout):
         """Vytvoří dashboard s kartami"""
         
@@ -442,6 +555,21 @@ class InvoiceApp(QMainWindow):
                 line-height: 1.4;
             }
             
+            #searchInput {
+                font-size: 14px;
+                padding: 8px 12px;
+                border: 1px solid rgba(108, 133, 163, 0.4);
+                border-radius: 8px;
+                background: white;
+            }
+            
+            #searchResults {
+                font-size: 13px;
+                border: 1px solid rgba(108, 133, 163, 0.2);
+                border-radius: 8px;
+                background: white;
+            }
+            
             /* Menu bar */
             QMenuBar {
                 background: rgba(44, 62, 80, 0.95);
@@ -528,6 +656,11 @@ class InvoiceApp(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
+    def closeEvent(self, event):
+        """Při zavření zruší běžící hledání"""
+        self.loader.cancel_all()
+        super().closeEvent(event)
+    
     def logout(self):
         """Odhlášení uživatele"""
         reply = QMessageBox.question(self, 'Odhlášení', 
@@ -554,83 +687,56 @@ class InvoiceApp(QMainWindow):
     
     def show_user_guide(self):
         """Zobrazí okno s uživatelským návodem"""
-        if not hasattr(self, 'documentation_window') or not self.documentation_window:
-            self.documentation_window = DocumentationWindow()
-        self.documentation_window.show()
-        self.documentation_window.raise_()  # Přenese okno do popředí
+        self.windows.show('documentation')
     
     def show_company_settings(self):
         """Zobrazí nastavení firmy"""
-        if not self.company_settings_window:
-            self.company_settings_window = CompanySettingsWindow()
-        self.company_settings_window.show()
+        self.windows.show('company_settings')
     
     def show_user_management(self):
         """Zobrazí správu uživatelů"""
-        # Vždycky vytvoříme novou instanci pro zajištění aktuálních dat
-        self.user_management_window = UserManagementWindow()
-        self.user_management_window.show()
+        self.windows.show('users')
 
     def show_role_management(self):
         """Zobrazí správu rolí"""
-        # Vždycky vytvoříme novou instanci pro zajištění aktuálních dat
-        self.role_management_window = RoleManagementWindow()
-        self.role_management_window.show()
+        self.windows.show('roles')
 
     def show_document_management(self):
         """Zobrazí správu dokumentů"""
-        # Vždycky vytvoříme novou instanci pro zajištění aktuálních dat
-        self.document_management_window = DocumentManagementWindow(
-            title_suffix="Všechny dokumenty"
-        )
-        self.document_management_window.show()
+        self.windows.show('documents', title_suffix="Všechny dokumenty")
 
     def show_invoice_management(self):
-        if not self.invoice_window:
-            self.invoice_window = InvoiceManagementWindow()
-        self.invoice_window.show()
+        self.windows.show('invoices')
 
     def show_company_management(self):
-        if not self.company_window:
-            self.company_window = CompanyManagementWindow()
-        self.company_window.show()
+        self.windows.show('companies')
 
     def show_cash_journal(self):
-        if not self.cash_journal_window:
-            self.cash_journal_window = CashJournalWindow()
-        self.cash_journal_window.show()
+        self.windows.show('cash_journal')
 
     def show_trip_book(self):
-        if not self.trip_book_window:
-            self.trip_book_window = TripBookWindow()
-        self.trip_book_window.show()
+        self.windows.show('trip_book')
 
     def show_asset_management(self):
         """Zobrazí správu hmotného majetku"""
-        self.asset_management_window = AssetManagementWindow()
-        self.asset_management_window.show()
+        self.windows.show('assets')
 
     def show_analytics_reports(self):
         """Zobrazí analýzy a reporty"""
-        self.analytics_reports_window = AnalyticsReportsWindow()
-        self.analytics_reports_window.show()
+        self.windows.show('analytics')
 
     def show_calendar_schedule(self):
         """Zobrazí kalendář a termíny"""
-        self.calendar_schedule_window = CalendarScheduleWindow()
-        self.calendar_schedule_window.show()
+        self.windows.show('calendar')
 
     def show_warehouse_management(self):
         """Zobrazí skladové hospodářství"""
-        self.warehouse_management_window = WarehouseManagementWindow()
-        self.warehouse_management_window.show()
+        self.windows.show('warehouse')
 
     def show_employee_management(self):
         """Zobrazí správu zaměstnanců"""
-        self.employee_management_window = EmployeeManagementWindow()
-        self.employee_management_window.show()
+        self.windows.show('employees')
 
     def show_service_maintenance(self):
         """Zobrazí servis a údržbu"""
-        self.service_maintenance_window = ServiceMaintenanceWindow()
-        self.service_maintenance_window.show()
+        self.windows.show('service')
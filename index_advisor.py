@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Index advisor - kontrola plánů dotazů nad databází aplikace.
+
+Pro každý dotaz z `database.QUERY_REGISTRY` spustí EXPLAIN QUERY PLAN
+a nahlásí úplné průchody tabulkou - SCAN bez indexu i SCAN celým indexem
+(`USING INDEX` / `USING COVERING INDEX`), který sice vrací řádky v pořadí
+indexu, ale čte je všechny. Dotazy registrované s `full_scan=True` (seznamy
+všech záznamů) mají průchod jen jako poznámku, stejně jako řazení přes
+dočasný B-strom. Průchody poddotazy (`SCAN (subquery-N)`) se nehlásí,
+čtou už omezený mezivýsledek. Použití:
+
+    python index_advisor.py            # kontrola databáze aplikace
+    python index_advisor.py --strict   # návratový kód 1 při nálezu
+"""
+
+import re
+import sys
+import sqlite3
+import importlib
+
+from database import connect, QUERY_REGISTRY, FULL_SCAN_QUERIES
+
+# Moduly, které při importu registrují své dotazy přes `register_query()`
+QUERY_MODULES = [
+    "analytics_engine",
+    "invoice_table_model",
+    "calendar_schedule",
+    "reminder_scheduler",
+    "document_management",
+    "role_management",
+    "service_maintenance",
+    "trip_generator",
+    "fuel_summary",
+    "fuel_analytics",
+    "cash_balance",
+]
+
+# Úplný průchod tabulkou - "SCAN invoices" (nové SQLite) i "SCAN TABLE invoices",
+# případně celým indexem "SCAN invoices USING [COVERING] INDEX idx_..."
+_FULL_SCAN = re.compile(
+    r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?$"
+)
+
+
+def explain_query(cursor, sql):
+    """Vrátí řádky plánu dotazu jako seznam textových popisů."""
+    params = (None,) * sql.count("?")
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def analyze_plan(plan, full_scan=False):
+    """Rozdělí plán na problémy (úplné průchody) a poznámky (dočasná řazení).
+
+    S `full_scan=True` se úplné průchody vrátí jako poznámky.
+    """
+    issues = []
+    notes = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail.strip())
+        if match:
+            table, index = match.groups()
+            if index:
+                message = f"úplný průchod tabulkou {table} indexem {index}"
+            else:
+                message = f"úplný průchod tabulkou {table}"
+            if full_scan:
+                notes.append(message + " (záměrně celá tabulka)")
+            else:
+                issues.append(message)
+        elif "USE TEMP B-TREE FOR" in detail:
+            notes.append("řazení bez indexu: " + detail.split("FOR", 1)[1].strip().lower())
+    return issues, notes
+
+
+def load_query_modules():
+    """Naimportuje moduly s registrovanými dotazy (chybějící přeskočí)."""
+    for module_name in QUERY_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"⚠️ Modul {module_name} nelze načíst: {e}")
+
+
+def run_advisor(registry=None, conn=None):
+    """Zkontroluje registrované dotazy.
+
+    Vrací slovník `název dotazu -> (plán, problémy, poznámky)`.
+    """
+    if registry is None:
+        load_query_modules()
+        registry = QUERY_REGISTRY
+    own_connection = conn is None
+    if own_connection:
+        conn = connect()
+
+    try:
+        cursor = conn.cursor()
+        results = {}
+        for name, sql in sorted(registry.items()):
+            try:
+                plan = explain_query(cursor, sql)
+            except sqlite3.Error as e:
+                results[name] = ([], [f"dotaz nelze analyzovat: {e}"], [])
+                continue
+            results[name] = (plan, *analyze_plan(plan, name in FULL_SCAN_QUERIES))
+        return results
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def print_report(results):
+    """Vypíše výsledek kontroly. Vrací počet dotazů s problémem."""
+    problems = 0
+    for name, (plan, issues, notes) in results.items():
+        if issues:
+            problems += 1
+            print(f"⚠️  {name}")
+            for issue in issues:
+                print(f"      - {issue}")
+            for detail in plan:
+                print(f"        plán: {detail}")
+        else:
+            print(f"✅ {name}")
+        for note in notes:
+            print(f"      ℹ️ {note}")
+
+    print(f"\n📊 Zkontrolováno {len(results)} dotazů, s problémem: {problems}")
+    return problems
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    problems = print_report(run_advisor())
+    if "--strict" in argv and problems:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hromadný import faktur z ISDOC (XML) a CSV.
+
+ISDOC se čte proudově přes `iterparse` - soubor může obsahovat jednu fakturu
+(.isdoc), více faktur v libovolném obalovém elementu, nebo být zabalený
+v .isdocx. Faktura se zpracuje hned po načtení svého elementu a uvolní se.
+CSV používá názvy sloupců z `CSV_COLUMNS`.
+
+Faktury se ukládají jako upsert podle `invoice_number` (UNIQUE) - opakovaný
+import fakturu aktualizuje. Commit proběhne po každé dávce `CHUNK_SIZE`
+faktur. Odběratel a dodavatel se napárují na `companies` (podle IČO, pak
+názvu), chybějící firmy se založí. Chybné faktury i nečitelné soubory se
+zapíšou do statistiky a import pokračuje. Použití:
+
+    python invoice_import.py faktury.isdoc [další soubory...]
+"""
+
+import csv
+import sys
+import os
+import sqlite3
+import zipfile
+import itertools
+import xml.etree.ElementTree as ET
+
+from database import transaction
+from bank_import import parse_amount, parse_date, open_text
+
+# Počet faktur v jedné transakci
+CHUNK_SIZE = 1000
+
+# Výchozí stav importované faktury
+DEFAULT_STATUS = "Čeká na platbu"
+
+INVOICE_COLUMNS = (
+    'invoice_number', 'type', 'recipient', 'issuer', 'issue_date', 'tax_date', 'due_date',
+    'amount_no_tax', 'tax', 'total', 'status', 'note',
+)
+
+# Názvy sloupců CSV (malými písmeny) -> sloupec faktury
+CSV_COLUMNS = {
+    'invoice_number': ('číslo faktury', 'cislo faktury', 'číslo dokladu', 'invoice_number'),
+    'type': ('typ', 'type'),
+    'recipient': ('příjemce', 'odběratel', 'recipient'),
+    'issuer': ('výdejce', 'dodavatel', 'issuer'),
+    'issue_date': ('datum vystavení', 'vystaveno', 'issue_date'),
+    'tax_date': ('datum plnění', 'duzp', 'datum zdanitelného plnění', 'tax_date'),
+    'due_date': ('datum splatnosti', 'splatnost', 'due_date'),
+    'amount_no_tax': ('částka bez dph', 'základ', 'bez dph', 'amount_no_tax'),
+    'tax': ('dph', 'tax'),
+    'total': ('celkem', 'částka celkem', 'celkem s dph', 'total'),
+    'status': ('stav', 'status'),
+    'note': ('poznámka', 'note'),
+}
+
+# Sloupce, které opakovaný import bez hodnoty ve zdroji (NULL) nepřepíše -
+# zaplacená faktura si ponechá stav i poznámku
+_KEPT_COLUMNS = ('status', 'note')
+_STATUS, _NOTE = INVOICE_COLUMNS.index('status'), INVOICE_COLUMNS.index('note')
+
+_UPSERT_SQL = f"""
+    INSERT INTO invoices ({', '.join(INVOICE_COLUMNS)})
+    VALUES ({', '.join('?' for _ in INVOICE_COLUMNS)})
+    ON CONFLICT(invoice_number) DO UPDATE SET
+        {', '.join(f'{col} = excluded.{col}' for col in INVOICE_COLUMNS[1:] if col not in _KEPT_COLUMNS)},
+        {', '.join(f'{col} = COALESCE(excluded.{col}, invoices.{col})' for col in _KEPT_COLUMNS)}
+"""
+
+
+class InvoiceImportError(ValueError):
+    """Chyba v datech jedné faktury"""
+
+
+# --- ISDOC -----------------------------------------------------------
+
+def _local(tag):
+    """Název elementu bez jmenného prostoru."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child(element, *path):
+    """Potomek podle cesty lokálních názvů (jmenný prostor se ignoruje)."""
+    for name in path:
+        if element is None:
+            return None
+        element = next((child for child in element if _local(child.tag) == name), None)
+    return element
+
+
+def _text(element, *path):
+    found = _child(element, *path)
+    return (found.text or "").strip() if found is not None else ""
+
+
+def _party(invoice, role):
+    """Údaje strany faktury (AccountingSupplierParty / AccountingCustomerParty)."""
+    party = _child(invoice, role, 'Party')
+    address = _child(party, 'PostalAddress')
+    street = " ".join(filter(None, [_text(address, 'StreetName'), _text(address, 'BuildingNumber')]))
+    city = " ".join(filter(None, [_text(address, 'PostalZone'), _text(address, 'CityName')]))
+    return {
+        'name': _text(party, 'PartyName', 'Name'),
+        'ico': _text(party, 'PartyIdentification', 'ID'),
+        'dic': _text(party, 'PartyTaxScheme', 'CompanyID'),
+        'address': ", ".join(filter(None, [street, city])),
+        'contact': _text(party, 'Contact', 'ElectronicMail') or _text(party, 'Contact', 'Telephone'),
+    }
+
+
+def _isdoc_invoice(invoice):
+    """Převede element <Invoice> na slovník faktury a strany."""
+    number = _text(invoice, 'ID')
+    if not number:
+        raise InvoiceImportError("faktura nemá číslo (ID)")
+
+    def date(*path):
+        value = _text(invoice, *path)
+        return parse_date(value) if value else None
+
+    def amount(*path):
+        value = _text(invoice, *path)
+        return parse_amount(value) if value else None
+
+    total = amount('LegalMonetaryTotal', 'TaxInclusiveAmount')
+    amount_no_tax = amount('LegalMonetaryTotal', 'TaxExclusiveAmount')
+    tax = amount('TaxTotal', 'TaxAmount')
+    if tax is None and total is not None and amount_no_tax is not None:
+        tax = round(total - amount_no_tax, 2)
+
+    return {
+        'invoice_number': number,
+        'issue_date': date('IssueDate'),
+        'tax_date': date('TaxPointDate'),
+        'due_date': date('PaymentMeans', 'Payment', 'Details', 'PaymentDueDate'),
+        'amount_no_tax': amount_no_tax,
+        'tax': tax,
+        'total': total,
+        'note': _text(invoice, 'Note'),
+        'supplier': _party(invoice, 'AccountingSupplierParty'),
+        'customer': _party(invoice, 'AccountingCustomerParty'),
+    }
+
+
+def parse_isdoc(stream, source):
+    """Generátor faktur z ISDOC XML; element se po zpracování uvolní."""
+    context = ET.iterparse(stream, events=('start', 'end'))
+    root = None
+    index = 0
+    for event, element in context:
+        if root is None:
+            root = element
+        if event != 'end' or _local(element.tag) != 'Invoice':
+            continue
+        index += 1
+        position = f"{source}#{index}"
+        try:
+            yield position, _isdoc_invoice(element), None
+        except (InvoiceImportError, ValueError) as e:
+            yield position, None, str(e)
+        element.clear()
+        if element is not root:
+            root.clear()
+
+
+def _open_isdoc(path):
+    """Otevře ISDOC; u .isdocx první .isdoc v archivu."""
+    if path.lower().endswith('.isdocx'):
+        archive = zipfile.ZipFile(path)
+        names = [name for name in archive.namelist() if name.lower().endswith('.isdoc')]
+        if not names:
+            raise InvoiceImportError("archiv .isdocx neobsahuje soubor .isdoc")
+        return archive.open(names[0])
+    return open(path, 'rb')
+
+
+# --- CSV -------------------------------------------------------------
+
+def parse_csv(stream, source):
+    """Generátor faktur z CSV s hlavičkou."""
+    header_line = stream.readline()
+    delimiter = max(';,\t', key=header_line.count)
+    reader = csv.reader(itertools.chain([header_line], stream), delimiter=delimiter)
+    header = [name.strip().lower() for name in next(reader, [])]
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in header:
+                columns[field] = header.index(name)
+                break
+    if 'invoice_number' not in columns:
+        raise InvoiceImportError("CSV neobsahuje sloupec s číslem faktury")
+
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        position = f"{source}:{line_no}"
+        values = {field: row[index].strip() if index < len(row) else "" for field, index in columns.items()}
+        try:
+            if not values['invoice_number']:
+                raise InvoiceImportError("chybí číslo faktury")
+            invoice = {'invoice_number': values['invoice_number'], 'note': values.get('note', "")}
+            for field in ('issue_date', 'tax_date', 'due_date'):
+                invoice[field] = parse_date(values[field]) if values.get(field) else None
+            for field in ('amount_no_tax', 'tax', 'total'):
+                invoice[field] = parse_amount(values[field]) if values.get(field) else None
+            invoice['type'] = values.get('type') or None
+            invoice['status'] = values.get('status') or None
+            invoice['supplier'] = {'name': values.get('issuer', "")}
+            invoice['customer'] = {'name': values.get('recipient', "")}
+            yield position, invoice, None
+        except ValueError as e:
+            yield position, None, str(e)
+
+
+# --- Import ----------------------------------------------------------
+
+class _CompanyMapper:
+    """Páruje strany faktury na firmy v `companies` (s cache na celý import)."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.created = 0
+        self._by_ico = {}
+        self._by_name = {}
+        cursor.execute("SELECT name, ico FROM companies")
+        for name, ico in cursor.fetchall():
+            self._by_name[name.lower()] = name
+            if ico:
+                self._by_ico.setdefault(ico, name)
+
+        cursor.execute("SELECT company_name, ico FROM company_settings WHERE id = 1")
+        own = cursor.fetchone()
+        self.own_name, self.own_ico = own if own else ("", "")
+
+    def is_own(self, party):
+        if party.get('ico') and self.own_ico:
+            return party['ico'] == self.own_ico
+        return bool(party.get('name')) and party['name'].lower() == (self.own_name or "").lower()
+
+    def resolve(self, party):
+        """Vrátí název firmy pro fakturu; neznámou firmu založí."""
+        name = (party.get('name') or "").strip()
+        ico = (party.get('ico') or "").strip()
+        if self.is_own(party):
+            return self.own_name
+        if ico and ico in self._by_ico:
+            return self._by_ico[ico]
+        if not name:
+            return None
+        existing = self._by_name.get(name.lower())
+        if existing:
+            return existing
+
+        self.cursor.execute("""
+            INSERT INTO companies (name, ico, dic, bank, contact, address)
+            VALUES (?, ?, ?, '', ?, ?)
+        """, (name, ico, party.get('dic') or "", party.get('contact') or "", party.get('address') or ""))
+        self.created += 1
+        self._by_name[name.lower()] = name
+        if ico:
+            self._by_ico[ico] = name
+        return name
+
+
+def _invoice_row(invoice, mapper):
+    """Řádek pro upsert - typ podle toho, zda je dodavatelem naše firma."""
+    supplier, customer = invoice['supplier'], invoice['customer']
+    if not supplier.get('name') and not supplier.get('ico'):
+        # Bez dodavatele (typicky CSV vydaných faktur) je dodavatelem naše firma
+        supplier = {'name': mapper.own_name, 'ico': mapper.own_ico}
+    invoice_type = invoice.get('type')
+    if not invoice_type:
+        invoice_type = "Vydaná" if mapper.is_own(supplier) else "Přijatá"
+
+    total = invoice['total']
+    if total is None and invoice['amount_no_tax'] is not None:
+        total = invoice['amount_no_tax'] + (invoice['tax'] or 0)
+    if total is None:
+        raise InvoiceImportError("chybí částka faktury")
+
+    return (
+        invoice['invoice_number'], invoice_type, mapper.resolve(customer), mapper.resolve(supplier),
+        invoice['issue_date'], invoice['tax_date'], invoice['due_date'],
+        invoice['amount_no_tax'], invoice['tax'], total,
+        invoice.get('status') or None, invoice['note'] or None,
+    )
+
+
+def _new_invoice_row(row):
+    """Řádek nové faktury - chybějící stav a poznámka dostanou výchozí hodnotu."""
+    row = list(row)
+    row[_STATUS] = row[_STATUS] or DEFAULT_STATUS
+    row[_NOTE] = row[_NOTE] or ""
+    return tuple(row)
+
+
+def _write_chunk(cursor, chunk, stats):
+    """Upsert dávky; při chybě databáze se dávka zopakuje po jednotlivých fakturách."""
+    numbers = [row[0] for _, row in chunk]
+    cursor.execute(
+        f"SELECT invoice_number FROM invoices WHERE invoice_number IN ({', '.join('?' for _ in numbers)})",
+        numbers
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+
+    # Výchozí stav jen u faktur, které v databázi ještě nejsou (ani dříve v dávce)
+    seen = set(existing)
+    prepared = []
+    for position, row in chunk:
+        prepared.append((position, row if row[0] in seen else _new_invoice_row(row)))
+        seen.add(row[0])
+    chunk = prepared
+
+    try:
+        cursor.execute("SAVEPOINT invoice_chunk")
+        cursor.executemany(_UPSERT_SQL, [row for _, row in chunk])
+        cursor.execute("RELEASE invoice_chunk")
+        written = chunk
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK TO invoice_chunk")
+        cursor.execute("RELEASE invoice_chunk")
+        written = []
+        for position, row in chunk:
+            try:
+                cursor.execute(_UPSERT_SQL, row)
+                written.append((position, row))
+            except sqlite3.Error as e:
+                stats['errors'].append((position, str(e)))
+
+    for _, row in written:
+        if row[0] in existing:
+            stats['updated'] += 1
+        else:
+            stats['inserted'] += 1
+            existing.add(row[0])
+
+
+def _parse_file(path):
+    """Faktury ze souboru podle přípony.
+
+    Nečitelný soubor (nebo jeho nečitelný zbytek) se zapíše jako chyba
+    s názvem souboru a import pokračuje dalším souborem.
+    """
+    source = os.path.basename(path)
+    try:
+        if path.lower().endswith('.csv'):
+            with open_text(path) as stream:
+                yield from parse_csv(stream, source)
+        else:
+            with _open_isdoc(path) as stream:
+                yield from parse_isdoc(stream, source)
+    except (OSError, UnicodeDecodeError, ET.ParseError, zipfile.BadZipFile, InvoiceImportError) as e:
+        yield source, None, f"soubor nelze načíst: {e}"
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_invoices(paths):
+    """Naimportuje faktury ze souborů. Vrací slovník se statistikou.
+
+    Každá dávka `CHUNK_SIZE` faktur je samostatná transakce - při přerušení
+    zůstanou uložené dávky zapsané a opakovaný import je jen aktualizuje.
+    """
+    stats = {'read': 0, 'inserted': 0, 'updated': 0, 'companies_created': 0, 'errors': []}
+    invoices = itertools.chain.from_iterable(_parse_file(path) for path in paths)
+    mapper = None
+
+    for parsed in _chunks(invoices, CHUNK_SIZE):
+        with transaction() as conn:
+            cursor = conn.cursor()
+            if mapper is None:
+                mapper = _CompanyMapper(cursor)
+            mapper.cursor = cursor
+
+            chunk = []
+            for position, invoice, error in parsed:
+                stats['read'] += 1
+                if error:
+                    stats['errors'].append((position, error))
+                    continue
+                try:
+                    chunk.append((position, _invoice_row(invoice, mapper)))
+                except (ValueError, sqlite3.Error) as e:
+                    stats['errors'].append((position, str(e)))
+            if chunk:
+                _write_chunk(cursor, chunk, stats)
+
+    stats['companies_created'] = mapper.created if mapper else 0
+    return stats
+
+
+def format_stats(stats):
+    """Textový souhrn importu pro dialog i konzoli."""
+    lines = [
+        f"Načteno faktur: {stats['read']}",
+        f"Nové: {stats['inserted']}",
+        f"Aktualizované: {stats['updated']}",
+        f"Založené firmy: {stats['companies_created']}",
+        f"Chybné faktury: {len(stats['errors'])}",
+    ]
+    for position, message in stats['errors'][:10]:
+        lines.append(f"  {position}: {message}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Použití: python invoice_import.py SOUBOR [SOUBOR...]  (.isdoc, .isdocx, .xml, .csv)")
+        return 2
+    try:
+        stats = import_invoices(argv)
+    except (OSError, ET.ParseError, zipfile.BadZipFile, InvoiceImportError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(format_stats(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
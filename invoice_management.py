@@ -2,14 +2,22 @@ from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtWidgets import (
     QDialog, QFormLayout, QLabel, QLineEdit, QComboBox, QDateEdit,
     QMessageBox, QFileDialog, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-    QTableWidget, QPushButton, QTableWidgetItem, QFrame, QScrollArea, QGridLayout
+    QTableView, QAbstractItemView, QPushButton, QFrame, QScrollArea, QGridLayout
 )
 from PyQt6.QtGui import QFont
 
 from companies import fetch_company_names
-from database import fetch_all_invoices
+from database import fetch_invoice
+from invoice_table_model import InvoiceTableModel
+from async_loader import AsyncLoader, bind_loading_indicator
 from invoices import add_invoice
 from invoices import update_invoice, delete_invoice
+from invoice_import import import_invoices, format_stats
+
+
+def run_invoice_import(conn, filenames):
+    """Import faktur ve vlákně AsyncLoaderu (zapisuje přes transakci vlákna)."""
+    return import_invoices(filenames)
 
 
 class InvoiceManagementWindow(QMainWindow):
@@ -83,6 +91,7 @@ class InvoiceManagementWindow(QMainWindow):
             ("➕ Zařazení faktury do evidence", "Evidovat novou fakturu v systému", self.add_invoice),
             ("✏️ Upravit fakturu", "Upravit vybranou fakturu", self.edit_invoice),
             ("🗑️ Smazat fakturu", "Odstranit fakturu ze systému", self.delete_invoice),
+            ("📥 Import faktur", "Hromadný import z ISDOC nebo CSV", self.import_invoices),
         ]
         
         for i, (title, desc, func) in enumerate(actions):
@@ -95,17 +104,45 @@ class InvoiceManagementWindow(QMainWindow):
         # Tabulka faktur
         table_frame = self.create_section_frame("📋 Seznam faktur", "Přehled všech faktur v systému")
         
-        # Tabulka faktur
-        self.table = QTableWidget(0, 13)
+        # Filtry - vyhodnocují se v SQL
+        filter_layout = QHBoxLayout()
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Hledat číslo, příjemce, výdejce nebo poznámku...")
+        self.search_input.returnPressed.connect(self.load_invoices)
+        filter_layout.addWidget(self.search_input)
+        
+        self.type_filter = QComboBox()
+        self.type_filter.addItems(["Všechny typy", "Přijatá", "Vydaná"])
+        self.type_filter.currentIndexChanged.connect(self.load_invoices)
+        filter_layout.addWidget(self.type_filter)
+        
+        self.status_filter = QComboBox()
+        self.status_filter.addItems(["Všechny stavy", "Čeká na platbu", "Zaplaceno", "Stornováno"])
+        self.status_filter.currentIndexChanged.connect(self.load_invoices)
+        filter_layout.addWidget(self.status_filter)
+        
+        search_button = QPushButton("Hledat")
+        search_button.clicked.connect(self.load_invoices)
+        filter_layout.addWidget(search_button)
+        
+        table_frame.layout().addLayout(filter_layout)
+        
+        # Tabulka faktur - model načítá řádky z databáze po dávkách,
+        # první dávku po změně filtrů na pozadí
+        self.loader = AsyncLoader(self)
+        self.model = InvoiceTableModel(self, loader=self.loader)
+        self.table = QTableView()
         self.table.setObjectName("dataTable")
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Číslo faktury", "Typ", "Příjemce", "Výdejce", "Datum vystavení", 
-            "Datum plnění", "Datum splatnosti", "Částka bez DPH", "DPH", "Celkem", "Status", "Poznámka"
-        ])
+        self.table.setModel(self.model)
         
         # Nastavení tabulky
         self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        bind_loading_indicator(self.loader, self)
         
         table_frame.layout().addWidget(self.table)
         layout.addWidget(table_frame)
@@ -286,21 +323,58 @@ class InvoiceManagementWindow(QMainWindow):
         """)
     
     def load_invoices(self):
-        """Načte faktury z databáze a zobrazí je v tabulce."""
-        # Blokujeme signály pro zabránění varování dataChanged
-        self.table.blockSignals(True)
-        
-        try:
-            rows = fetch_all_invoices()
-            # Vyčistíme tabulku a nastavíme počet řádků
-            self.table.clearContents()
-            self.table.setRowCount(len(rows))
-            for row_idx, row in enumerate(rows):
-                for col_idx, value in enumerate(row):
-                    self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
-        finally:
-            # Obnovíme signály
-            self.table.blockSignals(False)
+        """Načte faktury podle filtrů - model čte z databáze jen viditelné dávky."""
+        invoice_type = self.type_filter.currentText() if self.type_filter.currentIndex() > 0 else None
+        status = self.status_filter.currentText() if self.status_filter.currentIndex() > 0 else None
+        self.model.set_filters(
+            search=self.search_input.text(),
+            invoice_type=invoice_type,
+            status=status
+        )
+
+    def selected_invoice_id(self):
+        """Vrátí ID vybrané faktury (nebo None)."""
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        return self.model.invoice_id(index.row())
+
+    def import_invoices(self):
+        """Hromadně naimportuje faktury z vybraných souborů ISDOC/CSV."""
+        filenames, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Import faktur",
+            "",
+            "Faktury (*.isdoc *.isdocx *.xml *.csv);;Všechny soubory (*)"
+        )
+        if not filenames:
+            return
+
+        self.loader.submit("invoice_import", run_invoice_import, filenames,
+                           on_done=self.invoice_import_finished, on_error=self.show_import_error,
+                           writes=True)
+
+    def invoice_import_finished(self, stats):
+        self.load_invoices()
+        if stats['errors']:
+            QMessageBox.warning(self, "Import faktur", format_stats(stats))
+        else:
+            QMessageBox.information(self, "Úspěch", format_stats(stats))
+
+    def show_import_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při importu faktur: {str(error)}")
+
+    def closeEvent(self, event):
+        """Zruší načítání a uvolní otevřený kurzor modelu při zavření okna"""
+        if self.loader.is_writing():
+            # Import se nesmí přerušit - uložil by se jen z části
+            QMessageBox.information(self, "Import faktur",
+                                    "Import faktur ještě probíhá. Okno lze zavřít po jeho dokončení.")
+            event.ignore()
+            return
+        self.loader.cancel_all()
+        self.model.suspend()
+        event.accept()
 
     def add_invoice(self):
         """Otevře moderní dialogové okno pro přidání faktury"""
@@ -703,15 +777,12 @@ class InvoiceManagementWindow(QMainWindow):
 
     def edit_invoice(self):
         """Otevře moderní dialogové okno pro úpravu faktury"""
-        selected_row = self.table.currentRow()
-        if selected_row < 0:
+        invoice_id = self.selected_invoice_id()
+        if invoice_id is None:
             QMessageBox.warning(self, "Upozornění", "Prosím vyberte fakturu k úpravě!")
             return
-            
-        invoice_id = self.table.item(selected_row, 0).text()
         
-        rows = fetch_all_invoices()
-        invoice_data = next((row for row in rows if str(row[0]) == invoice_id), None)
+        invoice_data = fetch_invoice(invoice_id)
 
         if not invoice_data:
             QMessageBox.warning(self, "Chyba", "Faktura nebyla nalezena!")
@@ -860,12 +931,9 @@ class InvoiceManagementWindow(QMainWindow):
 
     def edit_invoice_old(self):
         """Otevře dialogové okno pro úpravu faktury."""
-        selected_row = self.table.currentRow()
-        if selected_row >= 0:
-            invoice_id = self.table.item(selected_row, 0).text()
-            
-            rows = fetch_all_invoices()
-            invoice_data = next((row for row in rows if str(row[0]) == invoice_id), None)
+        invoice_id = self.selected_invoice_id()
+        if invoice_id is not None:
+            invoice_data = fetch_invoice(invoice_id)
 
             if not invoice_data:
                 return
@@ -956,13 +1024,11 @@ class InvoiceManagementWindow(QMainWindow):
 
     def delete_invoice(self):
         """Smaže vybranou fakturu po potvrzení uživatelem."""
-        selected_row = self.table.currentRow()
-        if selected_row < 0:
+        invoice_id = self.selected_invoice_id()
+        if invoice_id is None:
             QMessageBox.warning(self, "Chyba", "Nebyla vybrána žádná faktura!")
             return
 
-        invoice_id = self.table.item(selected_row, 0).text()
-
         confirmation = QMessageBox.question(
             self, "Potvrzení smazání",
             f"Opravdu chcete smazat fakturu ID {invoice_id}?",
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Virtualizovaný model seznamu faktur pro QTableView.
+
+Řádky se čtou z otevřeného SQL kurzoru po dávkách (canFetchMore/fetchMore),
+řazení i filtrování se provádí v SQL. Otevření okna tak nezávisí na počtu
+faktur v databázi. S `AsyncLoader` se první dávka po změně filtrů načítá
+na pozadí.
+"""
+
+import sqlite3
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from database import connect, register_query
+
+
+def _fetch_first_batch(conn, sql, params, size):
+    """První dávka řádků - běží ve vlákně AsyncLoaderu."""
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    batch = cursor.fetchmany(size)
+    cursor.close()
+    return batch
+
+
+class InvoiceTableModel(QAbstractTableModel):
+    """Model faktur s líným načítáním z databáze"""
+
+    # (sloupec v databázi, záhlaví)
+    COLUMNS = [
+        ("id", "ID"),
+        ("invoice_number", "Číslo faktury"),
+        ("type", "Typ"),
+        ("recipient", "Příjemce"),
+        ("issuer", "Výdejce"),
+        ("issue_date", "Datum vystavení"),
+        ("tax_date", "Datum plnění"),
+        ("due_date", "Datum splatnosti"),
+        ("amount_no_tax", "Částka bez DPH"),
+        ("tax", "DPH"),
+        ("total", "Celkem"),
+        ("status", "Status"),
+        ("note", "Poznámka"),
+    ]
+
+    # Sloupce, ve kterých hledá fulltextový filtr
+    SEARCH_COLUMNS = ("invoice_number", "recipient", "issuer", "note")
+
+    # Počet řádků načtených jedním voláním fetchMore
+    BATCH_SIZE = 200
+
+    def __init__(self, parent=None, loader=None):
+        super().__init__(parent)
+        self._loader = loader
+        self._conn = connect()
+        self._cursor = None
+        self._rows = []
+        self._exhausted = True
+        self._sort_column = 0
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._filters = {}
+
+    # --- Dotaz ---------------------------------------------------------
+
+    def _build_query(self, offset=0):
+        """Sestaví SELECT s filtry a řazením."""
+        columns = ", ".join(name for name, _ in self.COLUMNS)
+        conditions = []
+        params = []
+
+        search = self._filters.get('search')
+        if search:
+            pattern = f"%{search}%"
+            conditions.append("(" + " OR ".join(f"{col} LIKE ?" for col in self.SEARCH_COLUMNS) + ")")
+            params.extend([pattern] * len(self.SEARCH_COLUMNS))
+
+        for key, column in (('type', 'type'), ('status', 'status')):
+            value = self._filters.get(key)
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        if self._filters.get('date_from'):
+            conditions.append("issue_date >= ?")
+            params.append(self._filters['date_from'])
+        if self._filters.get('date_to'):
+            conditions.append("issue_date <= ?")
+            params.append(self._filters['date_to'])
+
+        sql = f"SELECT {columns} FROM invoices"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        # Název sloupce pochází z COLUMNS, nikdy ze vstupu uživatele
+        sort_name = self.COLUMNS[self._sort_column][0]
+        direction = "DESC" if self._sort_order == Qt.SortOrder.DescendingOrder else "ASC"
+        sql += f" ORDER BY {sort_name} {direction}"
+        if sort_name != "id":
+            sql += f", id {direction}"
+
+        if offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+        return sql, params
+
+    def _open_cursor(self, offset=0):
+        """Otevře kurzor dotazu, volitelně od daného řádku."""
+        self._close_cursor()
+        sql, params = self._build_query(offset)
+        self._cursor = self._conn.cursor()
+        self._cursor.execute(sql, params)
+        self._exhausted = False
+
+    def _close_cursor(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+    def _read_batch(self):
+        """Přečte další dávku řádků z kurzoru."""
+        if self._cursor is None:
+            # Kurzor byl uvolněn (suspend) - pokračujeme od posledního řádku
+            self._open_cursor(len(self._rows))
+        try:
+            batch = self._cursor.fetchmany(self.BATCH_SIZE)
+        except sqlite3.Error:
+            # Kurzor zneplatněn (např. změnou schématu) - otevřeme znovu
+            self._open_cursor(len(self._rows))
+            batch = self._cursor.fetchmany(self.BATCH_SIZE)
+
+        if len(batch) < self.BATCH_SIZE:
+            self._exhausted = True
+            self._close_cursor()
+        return batch
+
+    # --- Veřejné rozhraní ----------------------------------------------
+
+    def refresh(self):
+        """Znovu načte data podle aktuálních filtrů a řazení."""
+        if self._loader is not None:
+            self._close_cursor()
+            sql, params = self._build_query()
+            self._loader.submit("invoices", _fetch_first_batch, sql, params, self.BATCH_SIZE,
+                                on_done=self._set_first_batch)
+            return
+
+        self.beginResetModel()
+        self._rows = []
+        self._open_cursor()
+        self._rows.extend(self._read_batch())
+        self.endResetModel()
+
+    def _set_first_batch(self, batch):
+        """Zobrazí první dávku načtenou na pozadí; další dávky čte fetchMore."""
+        self.beginResetModel()
+        self._close_cursor()
+        self._rows = list(batch)
+        self._exhausted = len(batch) < self.BATCH_SIZE
+        self.endResetModel()
+
+    def set_filters(self, search=None, invoice_type=None, status=None, date_from=None, date_to=None):
+        """Nastaví filtry (prázdná hodnota = bez filtru) a obnoví data."""
+        self._filters = {
+            'search': (search or "").strip(),
+            'type': invoice_type,
+            'status': status,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+        self.refresh()
+
+    def suspend(self):
+        """Uvolní otevřený kurzor; další fetchMore ho otevře znovu.
+
+        Otevřený kurzor drží snímek databáze, který ve WAL režimu brání
+        úplnému checkpointu - proto ho okno při zavření uvolňuje.
+        """
+        self._close_cursor()
+
+    def invoice_id(self, row):
+        """Vrátí ID faktury na daném řádku."""
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+    # --- QAbstractTableModel -------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return "" if value is None else str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(value, (int, float)):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][1]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        batch = self._read_batch()
+        if not batch:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self._rows.extend(batch)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Řazení v SQL (ORDER BY) místo řazení v Pythonu."""
+        if not 0 <= column < len(self.COLUMNS):
+            return
+        self._sort_column = column
+        self._sort_order = order
+        self.refresh()
+
+
+register_query("invoices.list", """
+    SELECT id, invoice_number, type, recipient, issuer, issue_date, tax_date, due_date,
+           amount_no_tax, tax, total, status, note
+    FROM invoices ORDER BY issue_date DESC, id DESC
+""", full_scan=True)
@@ -1,6 +1,8 @@
 import sys
 import os
-from PyQt6.QtWidgets import QApplication, QMessageBox
+from startup_timing import phase, print_report
+with phase("importy"):
+    from PyQt6.QtWidgets import QApplication, QMessageBox
 
 def main():
     """Hlavní funkce aplikace s error handlingem"""
@@ -10,14 +12,19 @@ def main():
     APP_VERSION = "1.0"
     
     try:
-        # Import závislostí
-        from database import create_tables
-        from gui import InvoiceApp
+        # Import závislostí (moduly oken se načítají až při otevření)
+        with phase("importy"):
+            from database import create_tables, get_pool, verify_storage_settings
+            from gui import InvoiceApp
         
         # Vytvoření databázových tabulek
         print(f"🚀 Spouštění {APP_NAME} v{APP_VERSION}")
         print("📊 Inicializace databáze...")
-        create_tables()
+        with phase("create_tables"):
+            create_tables()
+        print(f"💾 Profil úložiště: {get_pool().profile_name}")
+        for name, expected, actual in verify_storage_settings():
+            print(f"⚠️ PRAGMA {name}: očekáváno {expected}, aktivní {actual}")
         print("✅ Databáze připravena")
         
         # Vytvoření aplikace
@@ -34,7 +41,10 @@ def main():
             print(f"👤 Přihlášen uživatel: {window.current_user.get('username', 'Neznámý')}")
             print("✅ Aplikace připravena k použití")
             window.show()
-            sys.exit(app.exec())
+            print_report()
+            exit_code = app.exec()
+            get_pool().close_all()
+            sys.exit(exit_code)
         else:
             print("❌ Přihlášení bylo zrušeno")
             sys.exit(0)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Plánovač připomínek událostí kalendáře.
+
+Místo kontroly všech událostí každou minutu drží plánovač nadcházející
+připomínky v haldě podle času připomenutí a nastaví jediný jednorázový
+časovač na nejbližší z nich. Načítají se jen neodeslané připomínky událostí
+do `HORIZON_DAYS` dní (index `status, reminder_sent, event_date`); po
+uplynutí horizontu se halda načte znovu.
+
+Změny událostí se promítají jednotlivě:
+
+    scheduler = ReminderScheduler(self, on_due=self.show_reminders)
+    scheduler.start()
+    ...
+    scheduler.refresh_event(event_id)   # přidání / úprava
+    scheduler.remove_event(event_id)    # smazání / dokončení
+
+Plánovač běží jen s otevřeným oknem kalendáře (`stop()` v closeEvent).
+"""
+
+import heapq
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from PyQt6.QtCore import QObject, QTimer
+
+from database import connect, register_query
+
+# Kolik dní dopředu se připomínky drží v haldě
+HORIZON_DAYS = 7
+
+# Čas začátku celodenní události (bez event_time)
+ALL_DAY_TIME = time(8, 0)
+
+# Nejdelší čekání časovače - po uspání počítače se čas nejbližší
+# připomínky ověří nejpozději po této době
+MAX_DELAY_MS = 10 * 60 * 1000
+
+Reminder = namedtuple('Reminder', 'due event_id title event_date event_time')
+
+REMINDERS_SQL = register_query("calendar.reminders", """
+    SELECT id, title, event_date, event_time, reminder_minutes
+    FROM calendar_events
+    WHERE status = 'Plánováno' AND reminder_sent = 0 AND event_date <= ?
+""")
+
+_EVENT_SQL = """
+    SELECT id, title, event_date, event_time, reminder_minutes
+    FROM calendar_events
+    WHERE id = ? AND status = 'Plánováno' AND reminder_sent = 0
+"""
+
+
+def reminder_due(event_date, event_time, reminder_minutes):
+    """Čas připomenutí události, nebo None u neplatného data.
+
+    Událost bez času je celodenní a začíná v `ALL_DAY_TIME`.
+    """
+    try:
+        day = datetime.strptime(event_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+    start = ALL_DAY_TIME
+    if event_time:
+        try:
+            start = datetime.strptime(event_time[:5], "%H:%M").time()
+        except ValueError:
+            return None
+    return datetime.combine(day, start) - timedelta(minutes=reminder_minutes or 0)
+
+
+def _reminder(row):
+    event_id, title, event_date, event_time, reminder_minutes = row
+    due = reminder_due(event_date, event_time, reminder_minutes)
+    if due is None:
+        print(f"⚠️ Událost {event_id} má neplatné datum nebo čas: {event_date} {event_time}")
+        return None
+    return Reminder(due, event_id, title, event_date, event_time)
+
+
+class ReminderScheduler(QObject):
+    """Halda připomínek s jedním jednorázovým časovačem"""
+
+    def __init__(self, parent=None, on_due=None, now=datetime.now):
+        super().__init__(parent)
+        self.on_due = on_due
+        self._now = now
+        self._heap = []          # (čas připomenutí, id události)
+        self._reminders = {}     # id události -> Reminder (platná položka haldy)
+        self._reload_at = None   # konec načteného horizontu
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+
+    # --- Načtení ---------------------------------------------------------
+
+    def start(self):
+        """Načte připomínky v horizontu a nastaví časovač."""
+        self.reload()
+
+    def stop(self):
+        self._timer.stop()
+        self._reload_at = None
+        self._heap.clear()
+        self._reminders.clear()
+
+    def reload(self):
+        """Načte všechny neodeslané připomínky událostí v horizontu."""
+        # Připomínka je nejvýš den před událostí (EventDialog: max 1440 min),
+        # načtené události tedy pokrývají všechna připomenutí před limitním dnem
+        limit = self._now().date() + timedelta(days=HORIZON_DAYS)
+        conn = connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(REMINDERS_SQL, (limit.isoformat(),))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        self._reminders = {}
+        for row in rows:
+            reminder = _reminder(row)
+            if reminder is not None:
+                self._reminders[reminder.event_id] = reminder
+        self._heap = [(r.due, r.event_id) for r in self._reminders.values()]
+        heapq.heapify(self._heap)
+        self._reload_at = datetime.combine(limit, time())
+        self._arm()
+
+    def refresh_event(self, event_id):
+        """Přeplánuje připomínku přidané nebo upravené události."""
+        event_id = int(event_id)
+        conn = connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(_EVENT_SQL, (event_id,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+
+        reminder = _reminder(row) if row else None
+        if reminder is None or self._reload_at is None or reminder.due >= self._reload_at:
+            # Mimo horizont - načte se při dalším reloadu
+            self._reminders.pop(event_id, None)
+        else:
+            self._reminders[event_id] = reminder
+            heapq.heappush(self._heap, (reminder.due, event_id))
+        self._arm()
+
+    def remove_event(self, event_id):
+        """Zruší připomínku smazané nebo dokončené události."""
+        # Položka v haldě zůstane a při vyjmutí se přeskočí
+        self._reminders.pop(int(event_id), None)
+        self._arm()
+
+    def pending(self):
+        """Naplánované připomínky seřazené podle času."""
+        return sorted(self._reminders.values())
+
+    # --- Časovač ---------------------------------------------------------
+
+    def _is_current(self, entry):
+        reminder = self._reminders.get(entry[1])
+        return reminder is not None and reminder.due == entry[0]
+
+    def _next_due(self):
+        """Čas nejbližší platné připomínky (zastaralé položky haldy zahodí)."""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _arm(self):
+        if self._reload_at is None:
+            return
+        next_due = self._next_due()
+        wake = self._reload_at if next_due is None else min(next_due, self._reload_at)
+        delay = (wake - self._now()).total_seconds() * 1000
+        self._timer.start(int(min(max(delay, 0), MAX_DELAY_MS)))
+
+    def _fire(self):
+        now = self._now()
+        due = []
+        while True:
+            next_due = self._next_due()
+            if next_due is None or next_due > now:
+                break
+            _, event_id = heapq.heappop(self._heap)
+            due.append(self._reminders.pop(event_id))
+
+        if due:
+            self._mark_sent([r.event_id for r in due])
+        if now >= self._reload_at:
+            self.reload()
+        else:
+            self._arm()
+        if due and self.on_due:
+            self.on_due(due)
+
+    def _mark_sent(self, event_ids):
+        conn = connect()
+        try:
+            conn.execute(
+                f"UPDATE calendar_events SET reminder_sent = 1 WHERE id IN ({', '.join('?' * len(event_ids))})",
+                event_ids
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Chyba při ukládání odeslaných připomínek: {e}")
+        finally:
+            conn.close()
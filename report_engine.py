@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stránkované PDF reporty.
+
+Report se skládá ze sekcí (`ReportSection`) - nadpis, sloupce a řádky.
+Řádky mohou být libovolný iterátor; velké tabulky se čtou z SQL po dávkách
+(`stream_rows`) a rovnou se kreslí, takže v paměti není celý výsledek.
+Když se řádek na stránku nevejde, začne nová stránka a záhlaví tabulky
+se zopakuje. Každá stránka má záhlaví (název reportu, firma, období)
+a zápatí (datum vytvoření, číslo strany).
+
+Kreslení nepoužívá widgety - `QPainter` nad `QPrinter` funguje i mimo
+hlavní vlákno, report tedy běží ve vlákně AsyncLoaderu:
+
+    loader.submit("pdf_report", render_financial_report, filename,
+                  date_from, date_to, "month", on_done=...)
+
+Z příkazové řádky (bez oken):
+
+    python report_engine.py report.pdf 2025-01-01 2025-12-31 [month|quarter|year|week]
+"""
+
+import os
+import sys
+from datetime import datetime
+
+from PyQt6.QtCore import Qt, QRectF, QMarginsF
+from PyQt6.QtGui import QPainter, QFont, QPen, QColor, QPageLayout, QPageSize
+from PyQt6.QtPrintSupport import QPrinter
+
+from database import connect, stream_rows
+from analytics_engine import (
+    aggregate_periods, category_summary, top_clients,
+    ISSUED_INVOICE_TYPES, RECEIVED_INVOICE_TYPES, GRANULARITIES
+)
+
+# Počet řádků načtených z databáze najednou
+FETCH_SIZE = 500
+
+# Okraje stránky v milimetrech
+PAGE_MARGIN_MM = 15
+
+# Výška řádku jako násobek výšky písma
+LINE_SPACING = 1.5
+
+GRANULARITY_TITLES = {
+    'week': "Přehled po týdnech",
+    'month': "Přehled po měsících",
+    'quarter': "Přehled po čtvrtletích",
+    'year': "Přehled po letech",
+}
+
+
+class ReportError(Exception):
+    """Report nelze vytvořit (např. nelze zapsat výstupní soubor)"""
+
+
+def money(value):
+    return f"{value:,.2f} Kč"
+
+
+def percent(value):
+    return f"{value:.1f} %"
+
+
+class Column:
+    """Sloupec tabulky reportu - šířka je podíl šířky stránky"""
+
+    def __init__(self, title, width, align='left', fmt=None):
+        self.title = title
+        self.width = width
+        self.align = align
+        self.fmt = fmt
+
+    def format(self, value):
+        if value is None:
+            return ""
+        return self.fmt(value) if self.fmt else str(value)
+
+
+class ReportSection:
+    """Sekce reportu; `totals` jsou indexy sloupců, které se sčítají do řádku Celkem"""
+
+    def __init__(self, title, columns, rows, totals=()):
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+        self.totals = totals
+
+
+def create_pdf_printer(filename):
+    """QPrinter pro zápis PDF na A4 (nepotřebuje tiskový dialog)."""
+    printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+    printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
+    printer.setOutputFileName(filename)
+    printer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+    printer.setPageMargins(QMarginsF(PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM),
+                           QPageLayout.Unit.Millimeter)
+    return printer
+
+
+class ReportRenderer:
+    """Kreslí sekce reportu na stránky tiskárny se záhlavím a zápatím"""
+
+    def __init__(self, printer, title, subtitle=""):
+        self.printer = printer
+        self.title = title
+        self.subtitle = subtitle
+        self.created = datetime.now().strftime('%d.%m.%Y %H:%M')
+        self.painter = None
+        self.page = 0
+        self.rows_drawn = 0
+
+    def render(self, sections):
+        """Vykreslí sekce; vrací slovník s počtem stran a řádků."""
+        self.painter = QPainter()
+        if not self.painter.begin(self.printer):
+            raise ReportError(f"Nelze zapisovat do souboru {self.printer.outputFileName()}")
+        try:
+            area = self.printer.pageLayout().paintRectPixels(self.printer.resolution())
+            self.width = area.width()
+            self.height = area.height()
+
+            self.title_font = QFont("Arial", 14, QFont.Weight.Bold)
+            self.section_font = QFont("Arial", 11, QFont.Weight.Bold)
+            self.bold_font = QFont("Arial", 9, QFont.Weight.Bold)
+            self.normal_font = QFont("Arial", 9)
+            self.small_font = QFont("Arial", 7)
+            self.painter.setFont(self.normal_font)
+            self.line = int(self.painter.fontMetrics().height() * LINE_SPACING)
+            self.top = self.line * 3
+            self.bottom = self.height - self.line * 2
+
+            self._start_page()
+            for section in sections:
+                self._draw_section(section)
+            self._draw_footer()
+        finally:
+            self.painter.end()
+        return {'pages': self.page, 'rows': self.rows_drawn}
+
+    # --- Stránky ---
+
+    def _start_page(self):
+        if self.page:
+            self._draw_footer()
+            self.printer.newPage()
+        self.page += 1
+
+        painter = self.painter
+        painter.setFont(self.title_font)
+        painter.drawText(QRectF(0, 0, self.width, self.line * 2),
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, self.title)
+        painter.setFont(self.normal_font)
+        painter.drawText(QRectF(0, 0, self.width, self.line * 2),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, self.subtitle)
+        painter.setPen(QPen(QColor("#2c3e50")))
+        painter.drawLine(0, self.line * 2, self.width, self.line * 2)
+        self.y = self.top
+
+    def _draw_footer(self):
+        painter = self.painter
+        y = self.bottom + self.line // 2
+        painter.setPen(QPen(QColor("#bdc3c7")))
+        painter.drawLine(0, y, self.width, y)
+        painter.setPen(QPen(QColor("#7f8c8d")))
+        painter.setFont(self.small_font)
+        rect = QRectF(0, y, self.width, self.line)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         f"Vytvořeno: {self.created}")
+        painter.drawText(rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                         f"Strana {self.page}")
+        painter.setPen(QPen(QColor("#2c3e50")))
+
+    def _ensure_space(self, lines, section=None):
+        """Začne novou stránku, pokud se `lines` řádků nevejde."""
+        if self.y + self.line * lines <= self.bottom:
+            return
+        self._start_page()
+        if section is not None:
+            self._draw_header_row(section)
+
+    # --- Tabulky ---
+
+    def _draw_section(self, section):
+        # Nadpis nezůstane sám na konci stránky
+        self._ensure_space(4)
+        self.painter.setFont(self.section_font)
+        self.painter.drawText(QRectF(0, self.y, self.width, self.line * 1.5),
+                              Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, section.title)
+        self.y += int(self.line * 1.5)
+        self._draw_header_row(section)
+
+        totals = {index: 0 for index in section.totals}
+        empty = True
+        for row in section.rows:
+            empty = False
+            self._ensure_space(1, section)
+            self._draw_row(section.columns, row, self.normal_font)
+            self.rows_drawn += 1
+            for index in totals:
+                totals[index] += row[index] or 0
+
+        if empty:
+            self.painter.setFont(self.normal_font)
+            self.painter.drawText(QRectF(0, self.y, self.width, self.line),
+                                  Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                                  "Žádná data za zvolené období")
+            self.y += self.line
+        elif totals:
+            self._ensure_space(1, section)
+            total_row = ["Celkem"] + [None] * (len(section.columns) - 1)
+            for index, value in totals.items():
+                total_row[index] = value
+            self.painter.drawLine(0, self.y, self.width, self.y)
+            self._draw_row(section.columns, total_row, self.bold_font)
+        self.y += self.line
+
+    def _draw_header_row(self, section):
+        self._draw_row(section.columns, [column.title for column in section.columns],
+                       self.bold_font, formatted=True)
+        self.painter.drawLine(0, self.y, self.width, self.y)
+
+    def _draw_row(self, columns, values, font, formatted=False):
+        painter = self.painter
+        painter.setFont(font)
+        metrics = painter.fontMetrics()
+        padding = self.line // 4
+        x = 0
+        for column, value in zip(columns, values):
+            width = self.width * column.width
+            if formatted or isinstance(value, str):
+                text = value or ""
+            else:
+                text = column.format(value)
+            text = metrics.elidedText(text, Qt.TextElideMode.ElideRight, int(width - 2 * padding))
+            align = Qt.AlignmentFlag.AlignRight if column.align == 'right' else Qt.AlignmentFlag.AlignLeft
+            painter.drawText(QRectF(x + padding, self.y, width - 2 * padding, self.line),
+                             align | Qt.AlignmentFlag.AlignVCenter, text)
+            x += width
+        self.y += self.line
+
+
+# --- Finanční report ----------------------------------------------------
+
+def financial_report_sections(conn, date_from, date_to, granularity='month'):
+    """Sekce finančního reportu za období; seznamy faktur a pokladny se streamují."""
+    amount = Column("Částka", 0.2, 'right', money)
+    issued = ", ".join("?" for _ in ISSUED_INVOICE_TYPES)
+    received = ", ".join("?" for _ in RECEIVED_INVOICE_TYPES)
+
+    return [
+        ReportSection(
+            "Souhrn podle kategorií",
+            [Column("Kategorie", 0.45), Column("Počet", 0.15, 'right'), amount,
+             Column("Podíl", 0.2, 'right', percent)],
+            category_summary(date_from, date_to, conn),
+        ),
+        ReportSection(
+            GRANULARITY_TITLES[granularity],
+            [Column("Období", 0.25), Column("Příjmy", 0.25, 'right', money),
+             Column("Výdaje", 0.25, 'right', money), Column("Zisk", 0.25, 'right', money)],
+            aggregate_periods(date_from, date_to, granularity, conn),
+            totals=(1, 2, 3),
+        ),
+        ReportSection(
+            "Nejvýznamnější klienti",
+            [Column("Klient", 0.6), Column("Faktur", 0.15, 'right'), Column("Obrat", 0.25, 'right', money)],
+            top_clients(date_from, date_to, 20, conn),
+            totals=(1, 2),
+        ),
+        ReportSection(
+            "Vydané faktury",
+            [Column("Číslo", 0.15), Column("Vystaveno", 0.13), Column("Odběratel", 0.37),
+             Column("Stav", 0.15), amount],
+            stream_rows(conn, f"""
+                SELECT invoice_number, issue_date, recipient, status, total FROM invoices
+                WHERE type IN ({issued}) AND issue_date BETWEEN ? AND ?
+                ORDER BY issue_date, id
+            """, (*ISSUED_INVOICE_TYPES, date_from, date_to), FETCH_SIZE),
+            totals=(4,),
+        ),
+        ReportSection(
+            "Přijaté faktury",
+            [Column("Číslo", 0.15), Column("Vystaveno", 0.13), Column("Dodavatel", 0.37),
+             Column("Stav", 0.15), amount],
+            stream_rows(conn, f"""
+                SELECT invoice_number, issue_date, issuer, status, total FROM invoices
+                WHERE type IN ({received}) AND issue_date BETWEEN ? AND ?
+                ORDER BY issue_date, id
+            """, (*RECEIVED_INVOICE_TYPES, date_from, date_to), FETCH_SIZE),
+            totals=(4,),
+        ),
+        ReportSection(
+            "Pokladní deník",
+            [Column("Datum", 0.13), Column("Typ", 0.12), Column("Osoba", 0.25),
+             Column("Poznámka", 0.3), amount],
+            stream_rows(conn, """
+                SELECT date, type, person, note, amount FROM cash_journal
+                WHERE date BETWEEN ? AND ?
+                ORDER BY date, id
+            """, (date_from, date_to), FETCH_SIZE),
+        ),
+    ]
+
+
+def _company_name(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT company_name FROM company_settings WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else ""
+
+
+def render_financial_report(conn, filename, date_from, date_to, granularity='month'):
+    """Vytvoří PDF finanční report (lze spustit ve vlákně AsyncLoaderu).
+
+    Vrací slovník se souborem, počtem stran a řádků. Nedokončený soubor
+    se při chybě smaže.
+    """
+    renderer = ReportRenderer(
+        create_pdf_printer(filename),
+        f"Finanční report - {_company_name(conn)}",
+        f"Období: {date_from} - {date_to}",
+    )
+    try:
+        stats = renderer.render(financial_report_sections(conn, date_from, date_to, granularity))
+    except Exception:
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    stats['filename'] = filename
+    return stats
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 3 or (len(argv) > 3 and argv[3] not in GRANULARITIES):
+        print("Použití: python report_engine.py REPORT.pdf OD DO [week|month|quarter|year]")
+        return 2
+
+    # Bez displeje - písma a PDF zvládne platforma offscreen
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv[:1])
+
+    conn = connect()
+    try:
+        stats = render_financial_report(conn, argv[0], argv[1], argv[2], argv[3] if len(argv) > 3 else 'month')
+    except ReportError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        conn.close()
+    print(f"✅ Report {stats['filename']}: {stats['pages']} stran, {stats['rows']} řádků")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
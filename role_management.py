@@ -7,11 +7,47 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdi
                             QListWidget, QListWidgetItem, QCheckBox, QGroupBox,
                             QScrollArea, QWidget)
 from PyQt6.QtCore import Qt
-from database import connect
+from database import connect, register_query
+
+# Názvy oprávnění role (čte se jednou za přihlášení, viz cache níže)
+USER_PERMISSIONS_SQL = register_query("roles.user_permissions", """
+    SELECT p.name
+    FROM permissions p
+    INNER JOIN role_permissions rp ON p.id = rp.permission_id
+    INNER JOIN roles r ON rp.role_id = r.id
+    WHERE r.name = ?
+""")
 
 class RoleManager:
     """Správa rolí a oprávnění"""
     
+    # Cache oprávnění podle role pro jedno přihlášení (název role -> frozenset)
+    _permission_cache = {}
+    _cache_stats = {'hits': 0, 'misses': 0}
+    
+    @staticmethod
+    def get_cached_permissions(user_role):
+        """Oprávnění role z cache; při prvním dotazu je načte z databáze"""
+        permissions = RoleManager._permission_cache.get(user_role)
+        if permissions is not None:
+            RoleManager._cache_stats['hits'] += 1
+            return permissions
+        
+        RoleManager._cache_stats['misses'] += 1
+        permissions = frozenset(RoleManager.get_user_permissions(user_role))
+        RoleManager._permission_cache[user_role] = permissions
+        return permissions
+    
+    @staticmethod
+    def invalidate_permission_cache():
+        """Zahodí cache oprávnění (nové přihlášení nebo změna rolí)"""
+        RoleManager._permission_cache.clear()
+    
+    @staticmethod
+    def permission_cache_stats():
+        """Počty zásahů a výpadků cache oprávnění"""
+        return {**RoleManager._cache_stats, 'roles': len(RoleManager._permission_cache)}
+    
     @staticmethod
     def get_all_roles():
         """Načte všechny role"""
@@ -101,6 +137,7 @@ class RoleManager:
             
             conn.commit()
             conn.close()
+            RoleManager.invalidate_permission_cache()
             return True
         except Exception as e:
             conn.rollback()
@@ -135,6 +172,7 @@ class RoleManager:
             
             conn.commit()
             conn.close()
+            RoleManager.invalidate_permission_cache()
             return True
         except Exception as e:
             conn.rollback()
@@ -164,6 +202,7 @@ class RoleManager:
             
             conn.commit()
             conn.close()
+            RoleManager.invalidate_permission_cache()
             return True
         except Exception as e:
             conn.rollback()
@@ -175,13 +214,7 @@ class RoleManager:
         """Získá oprávnění uživatele podle jeho role"""
         conn = connect()
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.name
-            FROM permissions p
-            INNER JOIN role_permissions rp ON p.id = rp.permission_id
-            INNER JOIN roles r ON rp.role_id = r.id
-            WHERE r.name = ?
-        """, (user_role,))
+        cursor.execute(USER_PERMISSIONS_SQL, (user_role,))
         permissions = [row[0] for row in cursor.fetchall()]
         conn.close()
         return permissions
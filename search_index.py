@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fulltextové vyhledávání nad fakturami, firmami, pokladním deníkem,
+servisem, kalendářem a dokumenty.
+
+Index je FTS5 tabulka `search_index` (viz `database.SEARCH_SOURCES`).
+Záznamy tabulek do něj zapisují triggery, text souborů dokumentů (.txt, PDF)
+doplňuje tento modul na pozadí po nahrání (`schedule_document_text`).
+Diakritika a velikost písmen se při hledání ignorují, slova dotazu se
+hledají jako začátky slov a výsledky jsou seřazené podle relevance (bm25).
+
+    hits = search(conn, "novak faktura")
+
+Index lze přestavět celý včetně textu dokumentů nebo prohledat z příkazové
+řádky:
+
+    python search_index.py --rebuild
+    python search_index.py <dotaz>
+"""
+
+import re
+import sys
+from collections import namedtuple
+
+from PyQt6.QtCore import QRunnable, QThreadPool
+
+from database import (
+    connect, transaction, rebuild_search_index, SEARCH_SOURCES, SEARCH_ROWID_STRIDE
+)
+from thumbnail_cache import PDF_SUPPORT, pdf_lock
+
+if PDF_SUPPORT:
+    import fitz  # PyMuPDF
+
+# Popisky zdrojů ve výsledcích hledání
+SOURCE_LABELS = {
+    'invoices': "📊 Faktura",
+    'companies': "🏢 Firma",
+    'cash_journal': "💰 Pokladna",
+    'service_records': "🔧 Servis",
+    'calendar_events': "📅 Událost",
+    'documents': "📎 Dokument",
+}
+
+# Typy dokumentů, jejichž text se indexuje
+TEXT_TYPES = ('txt', 'pdf')
+
+# Maximální délka indexovaného textu jednoho dokumentu
+MAX_TEXT_CHARS = 500_000
+
+# Váhy sloupců title, body, content pro bm25
+RANK_WEIGHTS = (10.0, 3.0, 1.0)
+
+SearchHit = namedtuple('SearchHit', 'source ref_id title snippet rank')
+
+_SOURCE_CODES = {source['source']: source['code'] for source in SEARCH_SOURCES}
+
+
+def match_query(text):
+    """Převede zadaný text na FTS5 dotaz - každé slovo jako začátek slova.
+
+    Uvozovky a operátory uživatele se nevyhodnocují. Prázdný text vrátí None.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(conn, text, sources=None, limit=50):
+    """Výsledky hledání seřazené podle relevance.
+
+    `sources` omezí hledání na vybrané zdrojové tabulky (např. podle
+    oprávnění uživatele). Vrací seznam `SearchHit`; úryvek má nalezená
+    slova v hranatých závorkách.
+    """
+    query = match_query(text)
+    if query is None:
+        return []
+    sql = f"""
+        SELECT source, ref_id, title,
+               snippet(search_index, -1, '[', ']', '…', 12),
+               bm25(search_index, {', '.join(str(w) for w in RANK_WEIGHTS)}) AS rank
+        FROM search_index
+        WHERE search_index MATCH ?
+    """
+    params = [query]
+    if sources is not None:
+        sources = list(sources)
+        if not sources:
+            return []
+        sql += f" AND source IN ({', '.join('?' * len(sources))})"
+        params += sources
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+# --- Text dokumentů ----------------------------------------------------
+
+def _read_text_file(file_path):
+    for encoding in ('utf-8', 'cp1250'):
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                return f.read(MAX_TEXT_CHARS)
+        except UnicodeDecodeError:
+            continue
+    return ""
+
+
+def _read_pdf(file_path):
+    if not PDF_SUPPORT:
+        return ""
+    parts = []
+    length = 0
+    with pdf_lock:
+        doc = fitz.open(file_path)
+        try:
+            for page in doc:
+                text = page.get_text()
+                parts.append(text)
+                length += len(text)
+                if length >= MAX_TEXT_CHARS:
+                    break
+        finally:
+            doc.close()
+    return "\n".join(parts)[:MAX_TEXT_CHARS]
+
+
+def extract_text(file_path, file_type):
+    """Text dokumentu pro index (prázdný řetězec u nepodporovaných typů)."""
+    file_type = (file_type or "").lower()
+    if file_type == 'txt':
+        return _read_text_file(file_path)
+    if file_type == 'pdf':
+        return _read_pdf(file_path)
+    return ""
+
+
+def store_document_text(cursor, document_id, text):
+    """Uloží text dokumentu do jeho řádku v indexu."""
+    rowid = document_id * SEARCH_ROWID_STRIDE + _SOURCE_CODES['documents']
+    cursor.execute("UPDATE search_index SET content = ? WHERE rowid = ?", (text, rowid))
+
+
+class DocumentTextTask(QRunnable):
+    """Doplní text nahraného dokumentu do indexu"""
+
+    def __init__(self, document_id, file_path, file_type):
+        super().__init__()
+        self.document_id = document_id
+        self.file_path = file_path
+        self.file_type = file_type
+
+    def run(self):
+        try:
+            text = extract_text(self.file_path, self.file_type)
+            if text:
+                with transaction() as conn:
+                    store_document_text(conn.cursor(), self.document_id, text)
+        except Exception as e:
+            print(f"⚠️ Text dokumentu {self.document_id} se nepodařilo zaindexovat: {e}")
+
+
+def schedule_document_text(document_id, file_path, file_type):
+    """Zaindexuje text nově nahraného dokumentu na pozadí."""
+    if (file_type or "").lower() in TEXT_TYPES:
+        QThreadPool.globalInstance().start(DocumentTextTask(document_id, file_path, file_type))
+
+
+# --- Přestavba indexu ---------------------------------------------------
+
+def rebuild(progress=None):
+    """Přestaví celý index včetně textu dokumentů.
+
+    Text souborů se čte mimo zápisovou transakci. `progress(hotovo, celkem)`
+    se volá po každém dokumentu. Vrací slovník se statistikou.
+    """
+    with transaction() as conn:
+        rebuild_search_index(conn.cursor())
+
+    conn = connect()
+    cursor = conn.cursor()
+    placeholders = ", ".join("?" * len(TEXT_TYPES))
+    cursor.execute(f"""
+        SELECT id, file_path, file_type FROM documents
+        WHERE lower(file_type) IN ({placeholders}) ORDER BY id
+    """, TEXT_TYPES)
+    documents = cursor.fetchall()
+    conn.close()
+
+    stats = {'documents': len(documents), 'indexed': 0, 'errors': []}
+    for done, (document_id, file_path, file_type) in enumerate(documents, start=1):
+        try:
+            text = extract_text(file_path, file_type)
+        except Exception as e:
+            stats['errors'].append((document_id, str(e)))
+            text = ""
+        if text:
+            with transaction() as conn:
+                store_document_text(conn.cursor(), document_id, text)
+            stats['indexed'] += 1
+        if progress:
+            progress(done, len(documents))
+    return stats
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--rebuild" in argv:
+        stats = rebuild()
+        print(f"✅ Index přestavěn, text {stats['indexed']} z {stats['documents']} dokumentů")
+        for document_id, error in stats['errors']:
+            print(f"❌ Dokument {document_id}: {error}")
+        return 1 if stats['errors'] else 0
+
+    text = " ".join(argv)
+    if not match_query(text):
+        print("Použití: python search_index.py [--rebuild] <dotaz>")
+        return 2
+    conn = connect()
+    try:
+        hits = search(conn, text)
+    finally:
+        conn.close()
+    for hit in hits:
+        print(f"{SOURCE_LABELS.get(hit.source, hit.source)} #{hit.ref_id}: {hit.title} - {hit.snippet}")
+    print(f"🔍 Nalezeno: {len(hits)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,30 @@ from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFrame, QScrollArea, 
     QGridLayout, QLabel, QPushButton, QComboBox, QDateEdit, QTableWidget, 
     QTableWidgetItem, QMessageBox, QDialog, QFormLayout, QLineEdit, QTextEdit,
-    QSpinBox, QDoubleSpinBox, QCheckBox
+    QSpinBox, QDoubleSpinBox, QCheckBox, QFileDialog
 )
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont
-from database import connect
+from database import connect, stream_rows, register_query
+from async_loader import AsyncLoader, bind_loading_indicator
+from xlsx_export import XlsxWorkbook, XlsxColumn
+import sqlite3
+
+
+SERVICE_RECORDS_SQL = register_query("service.records", """
+    SELECT id, date, asset_name, service_type, description,
+           technician, cost, status, notes
+    FROM service_records
+    ORDER BY date DESC
+""", full_scan=True)
+
+
+def query_service_records(conn):
+    """Servisní záznamy (běží ve vlákně AsyncLoaderu)"""
+    cursor = conn.cursor()
+    cursor.execute(SERVICE_RECORDS_SQL)
+    return cursor.fetchall()
+
 
 class ServiceMaintenanceWindow(QMainWindow):
     def __init__(self):
@@ -43,8 +62,11 @@ class ServiceMaintenanceWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
         
-        # Vytvoření tabulky a načtení dat
-        self.create_service_tables()
+        # Načítání dat na pozadí
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self, [self.table])
+
+        # Načtení dat (tabulky vytváří migrace v database.py)
         self.load_service_records()
 
     def create_header(self, layout):
@@ -364,78 +386,17 @@ class ServiceMaintenanceWindow(QMainWindow):
             }
         """)
 
-    def create_service_tables(self):
-        """Vytvoří tabulky pro servis a údržbu"""
-        try:
-            cursor = self.db.cursor()
-            
-            # Tabulka servisních záznamů
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS service_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    asset_type TEXT,
-                    asset_id INTEGER,
-                    asset_name TEXT,
-                    service_type TEXT,
-                    description TEXT,
-                    technician TEXT,
-                    cost REAL,
-                    status TEXT DEFAULT 'Plánováno',
-                    scheduled_date TEXT,
-                    completed_date TEXT,
-                    next_service_date TEXT,
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabulka servisních plánů
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS service_schedules (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    asset_type TEXT,
-                    asset_id INTEGER,
-                    service_type TEXT,
-                    interval_days INTEGER,
-                    last_service_date TEXT,
-                    next_service_date TEXT,
-                    active INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabulka náhradních dílů
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS service_parts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    service_record_id INTEGER,
-                    part_name TEXT,
-                    part_number TEXT,
-                    quantity INTEGER,
-                    unit_price REAL,
-                    total_price REAL,
-                    supplier TEXT,
-                    FOREIGN KEY (service_record_id) REFERENCES service_records (id)
-                )
-            """)
-            
-            self.db.commit()
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při vytváření tabulek: {str(e)}")
-
     def load_service_records(self):
-        """Načte servisní záznamy"""
-        try:
-            cursor = self.db.cursor()
-            cursor.execute("""
-                SELECT id, date, asset_name, service_type, description, 
-                       technician, cost, status, notes
-                FROM service_records 
-                ORDER BY date DESC
-            """)
-            rows = cursor.fetchall()
+        """Spustí načtení servisních záznamů na pozadí"""
+        self.loader.submit("service_records", query_service_records,
+                           on_done=self.show_service_records, on_error=self.show_load_error)
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání servisních záznamů: {str(error)}")
 
+    def show_service_records(self, rows):
+        """Zobrazí servisní záznamy"""
+        try:
             self.table.setRowCount(len(rows))
             
             total_services = len(rows)
@@ -621,7 +582,8 @@ class ServiceMaintenanceWindow(QMainWindow):
         self.load_service_records()
 
     def closeEvent(self, event):
-        """Uzavře databázové připojení při zavření okna"""
+        """Zruší načítání a uzavře databázové připojení při zavření okna"""
+        self.loader.cancel_all()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
@@ -1130,6 +1092,18 @@ class ServicePlanDialog(QDialog):
         QMessageBox.information(self, "Export", "Servisní plán byl exportován do CSV souboru.")
 
 
+# Náklady na servis - záznamy s vyplněnou cenou
+SERVICE_COSTS_SQL = """
+    SELECT date, asset_name, service_type, description, cost FROM service_records
+    WHERE cost > 0 ORDER BY date DESC, id DESC
+"""
+
+SERVICE_COSTS_COLUMNS = [
+    XlsxColumn("Datum", 'date'), XlsxColumn("Vozidlo", width=24), XlsxColumn("Typ", width=18),
+    XlsxColumn("Popis", width=40), XlsxColumn("Náklady (Kč)", 'money'),
+]
+
+
 class ServiceCostsDialog(QDialog):
     """Dialog pro přehled nákladů na servis"""
     
@@ -1199,11 +1173,11 @@ class ServiceCostsDialog(QDialog):
         # Statistiky
         stats_layout = QHBoxLayout()
         
-        total_label = QLabel("Celkové náklady: 45 320 Kč")
+        total_label = self.total_label = QLabel("Celkové náklady: 0 Kč")
         total_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 10px; border-radius: 5px;")
         stats_layout.addWidget(total_label)
         
-        monthly_label = QLabel("Měsíční průměr: 7 553 Kč")
+        monthly_label = self.monthly_label = QLabel("Měsíční průměr: 0 Kč")
         monthly_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 10px; border-radius: 5px;")
         stats_layout.addWidget(monthly_label)
         
@@ -1235,25 +1209,28 @@ class ServiceCostsDialog(QDialog):
         layout.addLayout(button_layout)
     
     def load_costs(self):
-        """Načte náklady na servis"""
-        # Simulace dat pro náklady
-        costs_data = [
-            ("2024-01-15", "Škoda Octavia", "Pravidelný servis", "Výměna oleje a filtrů", "3 450"),
-            ("2024-01-20", "Ford Transit", "Oprava", "Výměna brzdových destiček", "8 900"),
-            ("2024-02-01", "BMW 320d", "STK", "Technická kontrola", "1 200"),
-            ("2024-02-05", "Škoda Octavia", "Oprava", "Výměna pneumatik", "12 800"),
-            ("2024-02-10", "Ford Transit", "Pravidelný servis", "Kontrola a údržba", "4 670"),
-        ]
+        """Načte náklady na servis ze servisních záznamů"""
+        conn = connect()
+        try:
+            costs_data = list(stream_rows(conn, SERVICE_COSTS_SQL))
+        finally:
+            conn.close()
         
         self.costs_table.setRowCount(len(costs_data))
         
-        for row, data in enumerate(costs_data):
-            for col, value in enumerate(data):
-                item = QTableWidgetItem(str(value))
+        for row, (date, vehicle, service_type, description, cost) in enumerate(costs_data):
+            values = [date, vehicle or "", service_type or "", description or "", f"{cost:,.0f}".replace(",", " ")]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
                 if col == 4:  # Náklady
                     item.setForeground(Qt.GlobalColor.darkMagenta)
                 self.costs_table.setItem(row, col, item)
         
+        total = sum(cost for *_, cost in costs_data)
+        months = len({date[:7] for date, *_ in costs_data}) or 1
+        self.total_label.setText(f"Celkové náklady: {total:,.0f} Kč".replace(",", " "))
+        self.monthly_label.setText(f"Měsíční průměr: {total / months:,.0f} Kč".replace(",", " "))
+        
         self.costs_table.resizeColumnsToContents()
     
     def change_period(self):
@@ -1261,8 +1238,22 @@ class ServiceCostsDialog(QDialog):
         QMessageBox.information(self, "Období", "Funkce změny období bude k dispozici v další verzi.")
     
     def export_costs(self):
-        """Export nákladů do Excel"""
-        QMessageBox.information(self, "Export", "Náklady byly exportovány do Excel souboru.")
+        """Export nákladů do Excel - řádky se čtou z databáze průběžně"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export nákladů", "naklady_servis.xlsx", "Excel sešity (*.xlsx)"
+        )
+        if not filename:
+            return
+        conn = connect()
+        try:
+            with XlsxWorkbook(filename) as workbook:
+                count = workbook.add_sheet("Náklady na servis", SERVICE_COSTS_COLUMNS,
+                                           stream_rows(conn, SERVICE_COSTS_SQL))
+            QMessageBox.information(self, "Export", f"Exportováno {count} záznamů do:\n{filename}")
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Chyba", f"Chyba při exportu: {str(e)}")
+        finally:
+            conn.close()
 
 
 class CertificateManagementDialog(QDialog):
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Měření doby spuštění aplikace po fázích.
+
+    with phase("importy"):
+        ...
+    print_report()
+
+Fáze se zaznamenávají v pořadí dokončení; stejný název se sčítá.
+Značka (`mark`) zaznamená čas od začátku spuštění, např. zobrazení
+přihlašovacího dialogu.
+"""
+
+import time
+from contextlib import contextmanager
+
+# Začátek měření - import modulu při startu aplikace
+STARTED_AT = time.perf_counter()
+
+_phases = {}
+_marks = {}
+
+
+@contextmanager
+def phase(name):
+    """Změří dobu běhu bloku a přičte ji k fázi `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = _phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def mark(name):
+    """Zaznamená čas od začátku spuštění (jen první výskyt)."""
+    _marks.setdefault(name, elapsed())
+
+
+def phases():
+    """Vrátí seznam `(fáze, sekundy)` v pořadí prvního dokončení."""
+    return list(_phases.items())
+
+
+def elapsed():
+    """Sekundy od začátku měření."""
+    return time.perf_counter() - STARTED_AT
+
+
+def print_report(title="⏱️ Doba spuštění"):
+    """Vypíše dobu jednotlivých fází a celkový čas."""
+    print(title)
+    for name, seconds in phases():
+        print(f"   {name:<20} {seconds * 1000:8.1f} ms")
+    for name, seconds in _marks.items():
+        print(f"   {name:<20} {seconds * 1000:8.1f} ms od startu")
+    print(f"   {'celkem':<20} {elapsed() * 1000:8.1f} ms")
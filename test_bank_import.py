@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test čtení výpisu GPC/ABO - pole záznamu 075 na pevných pozicích
+"""
+
+import io
+
+from bank_import import parse_gpc
+
+
+def record_075(amount_halere, code, counter_account="0000001234567890", vs="0000012345",
+               valuta="150325", name="ALFA SRO", posted="160325", document="0000000000042"):
+    """Záznam 075 poskládaný po polích (pozice podle formátu ABO)"""
+    fields = [
+        ("075", 3),                        # 0-3 typ záznamu
+        ("0000000123456789", 16),          # 3-19 vlastní účet
+        (counter_account, 16),             # 19-35 protiúčet
+        (document, 13),                    # 35-48 číslo dokladu
+        (f"{amount_halere:012d}", 12),     # 48-60 částka v haléřích
+        (code, 1),                         # 60 kód účtování
+        (vs, 10),                          # 61-71 variabilní symbol
+        ("0000000308", 10),                # 71-81 banka protiúčtu a konstantní symbol
+        ("0000000000", 10),                # 81-91 specifický symbol
+        (valuta, 6),                       # 91-97 datum valuty
+        (name.ljust(20), 20),              # 97-117 název protiúčtu
+        ("0", 1),                          # 117 změna položky
+        ("0203", 4),                       # 118-122 kód měny
+        (posted, 6),                       # 122-128 datum splatnosti
+    ]
+    line = ""
+    for value, width in fields:
+        assert len(value) == width, (value, width)
+        line += value
+    return line
+
+
+def parse(*lines):
+    return list(parse_gpc(io.StringIO("".join(line + "\r\n" for line in lines))))
+
+
+def test_gpc_field_offsets():
+    """Částka, znaménko, datum, protiúčet, VS a název se čtou ze správných pozic"""
+    header = "074" + "0000000123456789" + "FIRMA".ljust(20) + "010325"
+    credit, debit = parse(
+        header,
+        record_075(123450, "2"),
+        "078Faktura 2025/001",
+        record_075(9990, "1", counter_account="0000000000009876", vs="0000000000",
+                   name="", posted="      ", valuta="020325"),
+    )
+
+    assert credit['amount'] == 1234.50
+    assert credit['date'] == "2025-03-16"
+    assert credit['account'] == "1234567890"
+    assert credit['person'] == "ALFA SRO"
+    assert credit['reference'] == "0000000000042"
+    assert credit['note'] == "VS 12345 Faktura 2025/001"
+
+    # Debet je záporný, bez data splatnosti platí datum valuty, bez názvu protiúčet
+    assert debit['amount'] == -99.90
+    assert debit['date'] == "2025-03-02"
+    assert debit['person'] == "9876"
+    assert debit['note'] == ""
+    print("✅ Pole záznamu 075 načtena správně")
+
+
+def test_gpc_invalid_record():
+    """Krátký záznam je chyba řádku, ne celého výpisu"""
+    movements = parse(record_075(100, "5")[:80], record_075(100, "5"))
+    assert movements[0] == {'line': 1, 'error': "příliš krátký záznam 075"}
+    # Storno kreditu se odečítá
+    assert movements[1]['amount'] == -1.0
+    print("✅ Chybný záznam nahlášen s číslem řádku")
+
+
+if __name__ == "__main__":
+    test_gpc_field_offsets()
+    test_gpc_invalid_record()
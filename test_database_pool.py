@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test poolu připojení - zahozená zápůjčka neblokuje databázi
+"""
+
+import gc
+import os
+import sqlite3
+import tempfile
+import threading
+
+from database import ConnectionPool
+
+
+def write_from_thread(pool):
+    """Zápis z jiného vlákna; vrací výjimku, nebo None"""
+    result = []
+
+    def worker():
+        conn = pool.acquire()
+        try:
+            conn.execute("INSERT INTO notes (text) VALUES ('jiné vlákno')")
+            conn.commit()
+            result.append(None)
+        except sqlite3.Error as e:
+            result.append(e)
+        finally:
+            conn.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def leaky_write(pool):
+    """Vzor `conn = connect() ... conn.close()` bez finally - výjimka před close()"""
+    conn = pool.acquire()
+    conn.execute("INSERT INTO notes (text) VALUES ('neuloženo')")
+    raise ValueError("chyba uprostřed zápisu")
+
+
+def test_leaked_handle_released():
+    """Zahozená zápůjčka s otevřenou transakcí se odvolá a vrátí do poolu"""
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "test.db"), pragmas={'busy_timeout': 100})
+        try:
+            conn = pool.acquire()
+            conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)")
+            conn.commit()
+            conn.close()
+
+            try:
+                leaky_write(pool)
+            except ValueError:
+                pass
+            gc.collect()
+
+            assert write_from_thread(pool) is None
+            stats = pool.stats()
+            assert stats['checked_out'] == 0, stats
+            assert stats['rollbacks'] == 1, stats
+
+            conn = pool.acquire()
+            texts = [row[0] for row in conn.execute("SELECT text FROM notes")]
+            conn.close()
+            assert texts == ['jiné vlákno'], texts
+            print("✅ Zahozená zápůjčka odvolána, databáze neblokovaná")
+        finally:
+            pool.close_all()
+
+
+def test_close_once():
+    """Po close() se připojení nevrací podruhé při uvolnění zápůjčky"""
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "test.db"), pragmas={})
+        try:
+            conn = pool.acquire()
+            conn.close()
+            conn.close()
+            del conn
+            gc.collect()
+            stats = pool.stats()
+            assert stats['released'] == 1 and stats['connections'] == 1, stats
+            print("✅ Zápůjčka vrácena jen jednou")
+        finally:
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    test_leaked_handle_released()
+    test_close_once()
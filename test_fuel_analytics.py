@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test analýzy spotřeby - příznak odchylky od normované spotřeby vozidla
+"""
+
+import os
+import tempfile
+
+import database
+from fuel_analytics import (
+    fuel_analysis, analysis_totals, ANOMALY_HIGH, ANOMALY_LOW, ANOMALY_NO_TRIPS
+)
+
+
+def test_anomaly_flags():
+    """Měsíc mimo pásmo normy ±15 % a tankování bez jízd se označí"""
+    with tempfile.TemporaryDirectory() as directory:
+        previous_pool = database._pool
+        database._pool = database.ConnectionPool(os.path.join(directory, "test.db"))
+        try:
+            database.migrate()
+            with database.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO cars (registration, type, owner, consumption)
+                    VALUES ('TEST 001', 'Test vůz', 'Firma', 6.0)
+                """)
+                # Litry přes trigger do rollupu monthly_fuel
+                cursor.executemany("INSERT INTO fuel_tankings (date, vehicle, fuel_amount) VALUES (?, 'TEST 001', ?)", [
+                    ("2025-01-10", 30), ("2025-01-25", 30),  # 60 l / 1000 km = 6.0 - v normě
+                    ("2025-02-12", 80),                      # 80 l / 1000 km = 8.0 - vysoká
+                    ("2025-03-05", 40),                      # 40 l / 1000 km = 4.0 - nízká
+                    ("2025-04-20", 25),                      # bez jízd
+                ])
+                cursor.executemany("""
+                    INSERT INTO trip_books (vehicle, year, month, input_hash, trip_count, total_km, generated_at)
+                    VALUES ('TEST 001', 2025, ?, '', ?, ?, '2025-05-01')
+                """, [(1, 20, 1000), (2, 18, 1000), (3, 22, 1000)])
+
+            conn = database.connect()
+            try:
+                rows = fuel_analysis(conn, "2025-01-01", "2025-05-01", vehicle="TEST 001", fuel_price=40)
+            finally:
+                conn.close()
+
+            flags = {row.month: row.anomaly for row in rows}
+            assert flags == {
+                "2025-01": None,
+                "2025-02": ANOMALY_HIGH,
+                "2025-03": ANOMALY_LOW,
+                "2025-04": ANOMALY_NO_TRIPS,
+            }, flags
+            assert rows[1].consumption == 8.0 and rows[1].nominal == 6.0 and rows[1].cost == 3200
+
+            totals = analysis_totals(rows)
+            assert totals['anomalies'] == 3
+            assert totals['km'] == 3000 and totals['litres'] == 205
+            # Průměr jen z měsíců s jízdami (180 l / 3000 km)
+            assert totals['consumption'] == 6.0
+            print(f"✅ Odchylky: {', '.join(f'{month} {flag}' for month, flag in flags.items())}")
+        finally:
+            database._pool.close_all()
+            database._pool = previous_pool
+
+
+if __name__ == "__main__":
+    test_anomaly_flags()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Test generátoru knih jízd - stejné semínko dá stejnou knihu, žádné 0 km úseky
+"""
+
+from trip_generator import generate_trip_book, book_seed, TripGeneratorError
+
+DISTANCES = [12.5, 40, 0, 85, 3]
+
+
+def legs(book):
+    return [tuple(leg) for leg in book.legs]
+
+
+def test_same_seed_same_book():
+    """Stejné vstupy a semínko dají stejnou knihu, jiné semínko jinou"""
+    seed = book_seed("1A2 3456", 2025, 3)
+    first = generate_trip_book(60, 7.5, DISTANCES, 3, 2025, 3, seed=seed)
+    second = generate_trip_book(60, 7.5, DISTANCES, 3, 2025, 3, seed=seed)
+    other = generate_trip_book(60, 7.5, DISTANCES, 3, 2025, 3, seed=seed + 1)
+
+    assert legs(first) == legs(second)
+    assert legs(first) != legs(other)
+    assert first.total_distance <= first.available_km
+    print(f"✅ Semínko {seed}: {len(first)} úseků, {first.total_distance} km")
+
+
+def test_no_zero_km_legs():
+    """Poslední jízda, jejíž úsek by vyšel na 0 km, se vynechá"""
+    for fuel in (0.2, 0.5, 1, 3.3, 17, 60):
+        for seed in range(50):
+            try:
+                book = generate_trip_book(fuel, 7.5, DISTANCES, 2, 2025, 2, seed=seed)
+            except TripGeneratorError:
+                # Palivo na méně než jeden celý kilometr tam i zpět
+                continue
+            assert all(leg[4] > 0 for leg in legs(book)), (fuel, seed)
+    print("✅ Žádný úsek s 0 km")
+
+
+if __name__ == "__main__":
+    test_same_seed_same_book()
+    test_no_zero_km_legs()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache náhledů dokumentů (první stránka PDF, obrázky).
+
+Náhled se vykreslí rovnou v cílové velikosti - PDF přes matici zvětšení
+PyMuPDF, obrázky přes `QImageReader.setScaledSize` (JPEG se dekóduje
+zmenšený). Pixely z PyMuPDF se do `QImage` předávají bez kopie
+(`samples_mv`), buffer drží položka cache.
+
+Náhledy se ukládají do paměti (LRU, `MEMORY_ITEMS` položek) a na disk
+do složky `thumbnails/` jako PNG. Klíčem je ID dokumentu a čas změny
+souboru - změněný soubor dostane nový náhled, starý se smaže.
+
+    image = get_cache().get(document_id, file_path, file_type)
+    if image is not None:
+        label.setPixmap(QPixmap.fromImage(image))
+
+QImage lze vytvářet i mimo hlavní vlákno, cache je chráněná zámkem.
+"""
+
+import os
+import glob
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QImage, QImageReader
+
+try:
+    import fitz  # PyMuPDF
+    PDF_SUPPORT = True
+except ImportError:
+    PDF_SUPPORT = False
+
+# Maximální velikost náhledu (odpovídá DocumentViewer.scale_pixmap)
+THUMBNAIL_SIZE = (800, 600)
+
+# Počet náhledů držených v paměti
+MEMORY_ITEMS = 64
+
+THUMBNAIL_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thumbnails')
+
+IMAGE_TYPES = ('png', 'jpg', 'jpeg')
+THUMBNAIL_TYPES = ('pdf',) + IMAGE_TYPES
+
+# PyMuPDF není bezpečný pro souběh vláken - sdílí ho i extrakce textu (search_index)
+pdf_lock = threading.Lock()
+
+
+def _fit(width, height, max_width, max_height):
+    """Měřítko pro vložení do rámečku (nezvětšuje)."""
+    if width <= 0 or height <= 0:
+        return 1.0
+    return min(max_width / width, max_height / height, 1.0)
+
+
+def render_pdf(file_path, size=THUMBNAIL_SIZE):
+    """První stránka PDF vykreslená přímo v cílové velikosti.
+
+    Vrací `(QImage, buffer)` - QImage sdílí paměť s bufferem, ten musí
+    žít stejně dlouho. None, pokud PDF nelze vykreslit.
+    """
+    if not PDF_SUPPORT:
+        return None
+    # PyMuPDF není bezpečný pro souběh vláken - vykreslení v procesu jen po jednom
+    with pdf_lock:
+        doc = fitz.open(file_path)
+        try:
+            if len(doc) == 0:
+                return None
+            page = doc[0]
+            # PDF se vykreslí do stejné velikosti, jakou dřív dával 2x zoom po zmenšení
+            zoom = _fit(page.rect.width * 2, page.rect.height * 2, *size) * 2
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        finally:
+            doc.close()
+
+    buffer = pix.samples_mv
+    image = QImage(buffer, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
+    return image, (pix, buffer)
+
+
+def render_image(file_path, size=THUMBNAIL_SIZE):
+    """Obrázek dekódovaný rovnou ve zmenšené velikosti."""
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        scale = _fit(original.width(), original.height(), *size)
+        if scale < 1.0:
+            reader.setScaledSize(QSize(max(1, int(original.width() * scale)),
+                                       max(1, int(original.height() * scale))))
+    image = reader.read()
+    if image.isNull():
+        return None
+    return image, None
+
+
+def render_thumbnail(file_path, file_type, size=THUMBNAIL_SIZE):
+    """Náhled souboru podle typu; `(QImage, buffer)` nebo None."""
+    file_type = (file_type or "").lower()
+    if file_type == 'pdf':
+        return render_pdf(file_path, size)
+    if file_type in IMAGE_TYPES:
+        return render_image(file_path, size)
+    return None
+
+
+def thumbnail_file(folder, document_id, mtime_ns, size=THUMBNAIL_SIZE):
+    """Cesta k náhledu na disku pro danou verzi souboru."""
+    width, height = size
+    return os.path.join(folder, f"{document_id}_{mtime_ns}_{width}x{height}.png")
+
+
+def remove_thumbnails(folder, document_id, keep=None):
+    """Smaže náhledy dokumentu na disku (kromě `keep`)."""
+    for path in glob.glob(os.path.join(folder, f"{document_id}_*.png")):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def save_thumbnail(image, path):
+    """Uloží náhled atomicky - čtenář nikdy nenajde rozepsaný soubor."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if not image.save(temporary, "PNG"):
+        return False
+    os.replace(temporary, path)
+    return True
+
+
+class ThumbnailCache:
+    """Náhledy v paměti (LRU) a na disku, klíč = ID dokumentu + mtime souboru"""
+
+    def __init__(self, folder=THUMBNAIL_FOLDER, size=THUMBNAIL_SIZE, memory_items=MEMORY_ITEMS):
+        self.folder = folder
+        self.size = size
+        self.memory_items = memory_items
+        self._memory = OrderedDict()   # klíč -> (QImage, buffer)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'rendered': 0}
+
+    def _key(self, document_id, file_path):
+        return (document_id, os.stat(file_path).st_mtime_ns)
+
+    def _disk_path(self, key):
+        document_id, mtime = key
+        return thumbnail_file(self.folder, document_id, mtime, self.size)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def cached(self, document_id, file_path):
+        """Náhled z paměti nebo z disku, bez vykreslování (jinak None)."""
+        key = self._key(document_id, file_path)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            image = QImage(path)
+            if not image.isNull():
+                self._remember(key, (image, None))
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                return image
+        return None
+
+    def get(self, document_id, file_path, file_type):
+        """Náhled dokumentu; při chybějícím náhledu ho vykreslí a uloží."""
+        if (file_type or "").lower() not in THUMBNAIL_TYPES:
+            return None
+        image = self.cached(document_id, file_path)
+        if image is not None:
+            return image
+        return self.generate(document_id, file_path, file_type)
+
+    def generate(self, document_id, file_path, file_type):
+        """Vykreslí náhled a uloží ho do paměti i na disk."""
+        key = self._key(document_id, file_path)
+        rendered = render_thumbnail(file_path, file_type, self.size)
+        if rendered is None:
+            return None
+        image, buffer = rendered
+        self._remember(key, (image, buffer))
+        with self._lock:
+            self._stats['rendered'] += 1
+
+        path = self._disk_path(key)
+        remove_thumbnails(self.folder, document_id, keep=path)
+        save_thumbnail(image, path)
+        return image
+
+    def invalidate(self, document_id):
+        """Zahodí náhledy dokumentu (po smazání nebo nahrazení souboru)."""
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == document_id]:
+                del self._memory[key]
+        remove_thumbnails(self.folder, document_id)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, memory_items=len(self._memory))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Sdílená cache náhledů aplikace."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Generování náhledů dokumentů na pozadí.
+
+Po nahrání dokumentu (`DocumentManager.upload_document`) se náhled vytvoří
+ve vlákně (`schedule_thumbnail`). Okno dokumentů po načtení seznamu připraví
+náhledy zobrazených dokumentů (`prefetch_thumbnails`) - uložené se načtou
+z disku do paměti, chybějící se vykreslí. Výběr dokumentu pak náhled jen
+převezme z cache.
+
+Náhledy dokumentů evidovaných v tabulce `documents` vytvoří dávkově příkaz
+níže. Běží v procesech - vykreslení PDF zatěžuje CPU a PyMuPDF v jednom
+procesu nelze spouštět souběžně:
+
+    python thumbnail_worker.py [--workers N] [--force]
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt6.QtCore import QRunnable, QThreadPool
+
+from database import connect
+from thumbnail_cache import (
+    get_cache, render_thumbnail, save_thumbnail, remove_thumbnails, thumbnail_file,
+    THUMBNAIL_FOLDER, THUMBNAIL_TYPES
+)
+
+_thread_pool = None
+
+
+def _get_thread_pool():
+    """Vlastní pool pro náhledy - nezdržuje načítání dat v globálním poolu."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = QThreadPool()
+        _thread_pool.setMaxThreadCount(1)
+    return _thread_pool
+
+
+class ThumbnailTask(QRunnable):
+    """Připraví náhled jednoho dokumentu do cache"""
+
+    def __init__(self, document_id, file_path, file_type):
+        super().__init__()
+        self.document_id = document_id
+        self.file_path = file_path
+        self.file_type = file_type
+
+    def run(self):
+        try:
+            if os.path.exists(self.file_path):
+                get_cache().get(self.document_id, self.file_path, self.file_type)
+        except Exception as e:
+            print(f"⚠️ Náhled dokumentu {self.document_id} se nepodařilo vytvořit: {e}")
+
+
+def schedule_thumbnail(document_id, file_path, file_type):
+    """Vytvoří náhled nově nahraného dokumentu na pozadí."""
+    if (file_type or "").lower() in THUMBNAIL_TYPES:
+        _get_thread_pool().start(ThumbnailTask(document_id, file_path, file_type))
+
+
+def prefetch_thumbnails(documents):
+    """Připraví náhledy seznamu `(id, cesta, typ)` v pořadí zobrazení.
+
+    Čekající úlohy předchozího seznamu se zahodí.
+    """
+    pool = _get_thread_pool()
+    pool.clear()
+    for document_id, file_path, file_type in documents:
+        if (file_type or "").lower() in THUMBNAIL_TYPES:
+            pool.start(ThumbnailTask(document_id, file_path, file_type))
+
+
+# --- Dávkové vytvoření náhledů -----------------------------------------
+
+def _backfill_job(job):
+    """Náhled jednoho dokumentu v procesu poolu; vrací (id, chyba nebo None)."""
+    document_id, file_path, file_type, mtime_ns, folder = job
+    path = thumbnail_file(folder, document_id, mtime_ns)
+    try:
+        rendered = render_thumbnail(file_path, file_type)
+        if rendered is None or not save_thumbnail(rendered[0], path):
+            return document_id, "náhled nelze vytvořit"
+        remove_thumbnails(folder, document_id, keep=path)
+        return document_id, None
+    except Exception as e:
+        return document_id, str(e)
+
+
+def backfill(workers=None, force=False, folder=THUMBNAIL_FOLDER, progress=None):
+    """Vytvoří chybějící náhledy všech dokumentů v procesech.
+
+    `force` vytvoří i existující náhledy znovu. `progress(hotovo, celkem)`
+    se volá po každém dokumentu. Vrací slovník se statistikou.
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, file_path, file_type FROM documents ORDER BY id")
+    documents = cursor.fetchall()
+    conn.close()
+
+    stats = {'documents': len(documents), 'generated': 0, 'up_to_date': 0,
+             'unsupported': 0, 'missing': 0, 'errors': []}
+    jobs = []
+    for document_id, file_path, file_type in documents:
+        if (file_type or "").lower() not in THUMBNAIL_TYPES:
+            stats['unsupported'] += 1
+            continue
+        if not os.path.exists(file_path):
+            stats['missing'] += 1
+            continue
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        if not force and os.path.exists(thumbnail_file(folder, document_id, mtime_ns)):
+            stats['up_to_date'] += 1
+            continue
+        jobs.append((document_id, file_path, file_type, mtime_ns, folder))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for done, (document_id, error) in enumerate(pool.map(_backfill_job, jobs, chunksize=4), start=1):
+                if error:
+                    stats['errors'].append((document_id, error))
+                else:
+                    stats['generated'] += 1
+                if progress:
+                    progress(done, len(jobs))
+    return stats
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    workers = None
+    if "--workers" in argv:
+        try:
+            workers = int(argv[argv.index("--workers") + 1])
+        except (IndexError, ValueError):
+            print("Použití: python thumbnail_worker.py [--workers N] [--force]")
+            return 2
+
+    def progress(done, total):
+        if done == total or done % max(1, total // 10) == 0:
+            print(f"   {done}/{total}")
+
+    stats = backfill(workers, force="--force" in argv, progress=progress)
+    print(f"✅ Náhledy: vytvořeno {stats['generated']}, aktuálních {stats['up_to_date']}, "
+          f"bez náhledu {stats['unsupported']}, chybí soubor {stats['missing']}")
+    for document_id, error in stats['errors']:
+        print(f"❌ Dokument {document_id}: {error}")
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dávkové generování knih jízd celého vozového parku za rok.
+
+Každá dvojice (vozidlo, měsíc) je jedna úloha pro `ProcessPoolExecutor`.
+Destinace a řidiči se do procesů pošlou jednou (inicializace procesu),
+úloha nese jen tankování a spotřebu vozidla. Hotové knihy se ukládají
+po dávkách do tabulek `trips` (jízdy) a `trip_books` (otisk vstupů
+a souhrn knihy).
+
+Úloha, jejíž vstupy (tankování, spotřeba, destinace, řidiči) se od
+posledního běhu nezměnily, se přeskočí - porovnává se otisk vstupů
+uložený v `trip_books`.
+
+    python trip_batch.py ROK [--workers N] [--force]
+
+Modul neimportuje PyQt - procesy poolu ho načítají samostatně.
+"""
+
+import sys
+import json
+import hashlib
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import connect
+from fuel_summary import month_bounds
+from trip_generator import (
+    generate_trip_book, book_seed, TripGeneratorError, NUMPY_SUPPORT
+)
+
+# Verze generátoru v otisku - změna algoritmu vynutí nové knihy
+GENERATOR_VERSION = f"2-{'numpy' if NUMPY_SUPPORT else 'python'}"
+
+# Počet knih zapsaných v jedné transakci
+WRITE_BATCH = 24
+
+_INSERT_TRIP_SQL = """
+    INSERT INTO trips (vehicle, year, month, leg, trip_date, driver, start, destination, company, distance)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPSERT_BOOK_SQL = """
+    INSERT INTO trip_books (vehicle, year, month, input_hash, trip_count, total_km, available_km, note, generated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(vehicle, year, month) DO UPDATE SET
+        input_hash = excluded.input_hash, trip_count = excluded.trip_count,
+        total_km = excluded.total_km, available_km = excluded.available_km,
+        note = excluded.note, generated_at = excluded.generated_at
+"""
+
+# Sdílené vstupy procesu poolu (nastaví `_init_worker`)
+_shared = {}
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def load_fleet_inputs(conn, year, vehicles=None):
+    """Vstupy dávky: vozidla se spotřebou, destinace, řidiči a tankování roku.
+
+    Vrací `(vozidla, destinace, řidiči, palivo)`, kde palivo je slovník
+    `(vozidlo, měsíc) -> [litry]`.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT registration, consumption FROM cars ORDER BY id")
+    fleet = {}
+    for registration, consumption in cursor.fetchall():
+        if vehicles is None or registration in vehicles:
+            fleet.setdefault(registration, consumption)
+
+    cursor.execute("SELECT start, destination, company, distance FROM destinations ORDER BY id")
+    destinations = [tuple(row) for row in cursor.fetchall()]
+    cursor.execute("SELECT first_name, last_name FROM drivers ORDER BY id")
+    drivers = [tuple(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT vehicle, substr(date, 6, 2), fuel_amount FROM fuel_tankings
+        WHERE date >= ? AND date < ? ORDER BY date, id
+    """, (month_bounds(year, 1)[0], month_bounds(year, 12)[1]))
+    fuel = {}
+    for vehicle, month, amount in cursor.fetchall():
+        if vehicle in fleet:
+            fuel.setdefault((vehicle, int(month)), []).append(amount or 0)
+    return list(fleet.items()), destinations, drivers, fuel
+
+
+def plan_jobs(conn, year, vehicles=None, force=False):
+    """Úlohy (vozidlo, měsíc) s otiskem vstupů; vrací `(úlohy, sdílené vstupy, přeskočeno)`."""
+    fleet, destinations, drivers, fuel = load_fleet_inputs(conn, year, vehicles)
+    shared_hash = _digest(GENERATOR_VERSION, destinations, drivers)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT vehicle, month, input_hash FROM trip_books WHERE year = ?", (year,))
+    stored = {(vehicle, month): input_hash for vehicle, month, input_hash in cursor.fetchall()}
+
+    jobs = []
+    skipped = 0
+    for vehicle, consumption in fleet:
+        for month in range(1, 13):
+            tankings = fuel.get((vehicle, month), [])
+            input_hash = _digest(shared_hash, consumption, tankings)
+            if not force and stored.get((vehicle, month)) == input_hash:
+                skipped += 1
+                continue
+            jobs.append((vehicle, year, month, tankings, consumption, input_hash))
+    return jobs, (destinations, drivers), skipped
+
+
+def _init_worker(destinations, drivers):
+    _shared['destinations'] = destinations
+    _shared['drivers'] = drivers
+    _shared['distances'] = [row[3] or 0 for row in destinations]
+
+
+def _generate_job(job):
+    """Kniha jedné úlohy v procesu poolu; vrací `(úloha bez paliva, kniha nebo chyba)`."""
+    vehicle, year, month, tankings, consumption, input_hash = job
+    key = (vehicle, year, month, input_hash)
+    try:
+        book = generate_trip_book(
+            tankings, consumption, _shared['distances'], len(_shared['drivers']),
+            year, month, seed=book_seed(vehicle, year, month)
+        )
+    except TripGeneratorError as e:
+        return key, None, str(e)
+    rows = book.rows(_shared['destinations'], _shared['drivers'], date_format="%Y-%m-%d")
+    return key, (rows, book.total_distance, book.available_km), None
+
+
+def _write_books(conn, results):
+    """Uloží hotové knihy v jedné transakci (staré jízdy měsíce nahradí)."""
+    generated_at = datetime.now().isoformat(timespec='seconds')
+    cursor = conn.cursor()
+    try:
+        for (vehicle, year, month, input_hash), book, note in results:
+            cursor.execute("DELETE FROM trips WHERE vehicle = ? AND year = ? AND month = ?",
+                           (vehicle, year, month))
+            rows, total_km, available = book if book else ([], 0, 0)
+            cursor.executemany(_INSERT_TRIP_SQL, [
+                (vehicle, year, month, leg) + tuple(row) for leg, row in enumerate(rows, start=1)
+            ])
+            cursor.execute(_UPSERT_BOOK_SQL, (
+                vehicle, year, month, input_hash, len(rows), total_km, available, note, generated_at
+            ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def generate_fleet(conn, year, force=False, progress=None, workers=None, vehicles=None, cancelled=None):
+    """Vygeneruje a uloží knihy jízd všech vozidel za rok.
+
+    `progress(hotovo, celkem)` se volá po každé hotové úloze. Lze spustit
+    přes `AsyncLoader` (první argument je připojení). Vrací slovník se
+    statistikou: vygenerováno, prázdných (bez paliva apod.), přeskočeno.
+
+    `cancelled()` se kontroluje po každé hotové úloze - vrátí-li True,
+    čekající úlohy poolu se zruší a neuložené knihy zahodí (už uložené
+    dávky zůstanou, při dalším běhu se přeskočí).
+    """
+    jobs, (destinations, drivers), skipped = plan_jobs(conn, year, vehicles, force)
+    stats = {'jobs': len(jobs), 'generated': 0, 'empty': 0, 'skipped': skipped, 'trips': 0,
+             'cancelled': False}
+    if progress:
+        progress(0, len(jobs))
+    if not jobs:
+        return stats
+
+    pending = []
+    # spawn - pool se spouští i z vlákna aplikace, fork procesu s Qt vlákny není bezpečný
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(destinations, drivers)) as pool:
+        futures = [pool.submit(_generate_job, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            if cancelled is not None and cancelled():
+                # Pool dokončí jen rozběhnuté úlohy, čekající se nespustí
+                pool.shutdown(wait=False, cancel_futures=True)
+                stats['cancelled'] = True
+                return stats
+            key, book, note = future.result()
+            pending.append((key, book, note))
+            if book:
+                stats['generated'] += 1
+                stats['trips'] += len(book[0])
+            else:
+                stats['empty'] += 1
+            if len(pending) >= WRITE_BATCH:
+                _write_books(conn, pending)
+                pending = []
+            if progress:
+                progress(done, len(jobs))
+    if pending:
+        _write_books(conn, pending)
+    return stats
+
+
+def format_stats(stats):
+    return (f"Knih vygenerováno: {stats['generated']} ({stats['trips']} jízd), "
+            f"bez jízd: {stats['empty']}, beze změny přeskočeno: {stats['skipped']}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        year = int(argv[0])
+        workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else None
+    except (IndexError, ValueError):
+        print("Použití: python trip_batch.py ROK [--workers N] [--force]")
+        return 2
+
+    def progress(done, total):
+        if total and (done == total or done % max(1, total // 10) == 0):
+            print(f"   {done}/{total}")
+
+    conn = connect()
+    try:
+        stats = generate_fleet(conn, year, force="--force" in argv, progress=progress, workers=workers)
+    finally:
+        conn.close()
+    print(f"✅ {format_stats(stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,30 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QPushButton, QFormLayout, QLabel, QComboBox, QMessageBox, 
-                             QTableWidget, QTableWidgetItem, QScrollArea, QFrame, QDialog)
-from PyQt6.QtCore import QDate, Qt
+                             QTableWidget, QTableWidgetItem, QScrollArea, QFrame, QDialog,
+                             QFileDialog, QProgressDialog, QDateEdit, QDoubleSpinBox)
+from PyQt6.QtCore import QDate, Qt, QObject, pyqtSignal
 from database import connect
-import random
+from async_loader import AsyncLoader
+from trip_batch import generate_fleet, format_stats
+from xlsx_export import XlsxWorkbook, XlsxColumn
+from fuel_summary import month_fuel
+from fuel_analytics import (
+    fuel_analysis, analysis_totals, ANOMALY_LABELS, ANOMALY_HIGH, ANOMALY_LOW, ANOMALY_NO_TRIPS,
+    DEFAULT_ANOMALY_BAND, DEFAULT_FUEL_PRICE
+)
+from trip_generator import (
+    load_inputs, generate_from_inputs, book_seed, TripGeneratorError, TRIP_BOOK_COLUMNS,
+    CAR_CONSUMPTION_SQL
+)
+from datetime import datetime
+import csv
+import threading
+
+
+class _BatchProgress(QObject):
+    """Průběh dávky z vlákna AsyncLoaderu do hlavního vlákna"""
+    changed = pyqtSignal(int, int)
+
 
 class TripCalculationWindow(QMainWindow):
     def __init__(self):
@@ -11,6 +32,14 @@ class TripCalculationWindow(QMainWindow):
         self.setWindowTitle("📊 Výpočet knihy jízd")
         self.setGeometry(100, 100, 1200, 800)
         
+        # Dávkové generování běží na pozadí
+        self.loader = AsyncLoader(self)
+        self.batch_progress = _BatchProgress(self)
+        self.batch_progress.changed.connect(self.update_batch_progress)
+        # Zrušení dávky - kontroluje ji generate_fleet mezi hotovými úlohami poolu procesů
+        self.fleet_cancel = threading.Event()
+        self.progress_dialog = None
+        
         # Hlavní scroll area
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
@@ -68,6 +97,7 @@ class TripCalculationWindow(QMainWindow):
         # Karty akcí
         actions = [
             ("📋 Generovat knihu", "Vygenerovat knihu jízd", self.generate_trip_book),
+            ("🗂️ Knihy za rok", "Všechna vozidla za zvolený rok", self.generate_fleet_books),
             ("📊 Analýza dat", "Zobrazit analýzu a statistiky", self.show_analysis),
         ]
         
@@ -324,159 +354,95 @@ class TripCalculationWindow(QMainWindow):
 
     def generate_trip_book(self):
         """Vygeneruje Knihu jízd na základě paliva v databázi."""
-        self.trip_table = QTableWidget()  # Inicializace tabulky
-        self.trip_table.setColumnCount(6)
-        self.trip_table.setHorizontalHeaderLabels(["Datum", "Řidič", "Start", "Cíl", "Firma", "Vzdálenost (km)"])
-
-        month_name = self.month_box.currentText()
+        month = self.month_box.currentIndex() + 1
         year = int(self.year_box.currentText())
         selected_vehicle = self.vehicle_box.currentText()
 
-        # Převod měsíce na číslo
-        months = ["Leden", "Únor", "Březen", "Duben", "Květen", "Červen",
-                  "Červenec", "Srpen", "Září", "Říjen", "Listopad", "Prosinec"]
-        month = months.index(month_name) + 1
-
-        # Sečtení tankování pro dané vozidlo a měsíc
         conn = connect()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT SUM(fuel_amount) FROM fuel_tankings
-            WHERE vehicle=? AND substr(date, 4, 2)=? AND substr(date, 7, 4)=?
-        """, (selected_vehicle, f"{month:02}", str(year)))
-
-        fuel_quantity = cursor.fetchone()[0] or 0  # Pokud není tankování, nastavíme 0
-        
-        # Získání spotřeby vozidla
-        cursor.execute("SELECT consumption FROM cars WHERE registration=?", (selected_vehicle,))
-        consumption_result = cursor.fetchone()
-        consumption = consumption_result[0] if consumption_result else 0
-        
-        # Načtení destinací a řidičů z databáze
-        cursor.execute("SELECT start, destination, company, distance FROM destinations")
-        destinations = cursor.fetchall()
-
-        cursor.execute("SELECT first_name, last_name FROM drivers")
-        drivers = cursor.fetchall()
-        
-        conn.close()
-
-        if not drivers:
-            QMessageBox.warning(self, "Chyba", "V databázi nejsou žádní řidiči!")
-            return
-            
-        if not destinations:
-            QMessageBox.warning(self, "Chyba", "V databázi nejsou žádné destinace!")
-            return
+        try:
+            inputs = load_inputs(conn, selected_vehicle, year, month)
+        finally:
+            conn.close()
 
-        # Výpočet celkového počtu km z paliva
-        total_km = (fuel_quantity / consumption) * 100 if consumption > 0 else 0
-        
-        if total_km <= 0:
-            QMessageBox.warning(self, "Chyba", "Není dostatek paliva pro generování jízd!")
+        try:
+            book = generate_from_inputs(inputs, year, month, seed=book_seed(selected_vehicle, year, month))
+        except TripGeneratorError as e:
+            QMessageBox.warning(self, "Chyba", str(e))
             return
+        rows = book.rows(inputs.destinations, inputs.drivers)
 
-        trips = []
-        remaining_km = total_km
-        days_used = set()
-        days_in_month = QDate(year, month, 1).daysInMonth()
+        # Tabulka jízd - data se naplní před povolením řazení
+        self.trip_table = QTableWidget(len(rows), len(TRIP_BOOK_COLUMNS))
+        self.trip_table.setHorizontalHeaderLabels(TRIP_BOOK_COLUMNS)
+        for row_idx, row in enumerate(rows):
+            for col_idx, value in enumerate(row):
+                self.trip_table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
 
-        # Generování jízd - každá destinace tam a zpět
-        for destination in destinations:
-            if remaining_km <= 0 or len(days_used) >= days_in_month:
-                break
-                
-            driver = random.choice(drivers)
-            trip_distance = destination[3]  # Vzdálenost jedné cesty
-            round_trip_distance = trip_distance * 2  # Celková vzdálenost tam i zpět
-
-            if remaining_km < round_trip_distance:
-                # Pokud nezbylo dost km, použijeme zbývající km
-                trip_distance = remaining_km / 2
-
-            # Výběr volného dne
-            available_days = set(range(1, days_in_month + 1)) - days_used
-            if not available_days:
-                available_days = set(range(1, days_in_month + 1))  # Znovu použijeme dny
-                
-            trip_day = random.choice(list(available_days))
-            days_used.add(trip_day)
-            trip_date = QDate(year, month, trip_day).toString("dd.MM.yyyy")
-
-            # Jízda tam
-            trip_tam = {
-                "datum": trip_date,
-                "řidič": f"{driver[0]} {driver[1]}",
-                "start": destination[0],
-                "cíl": destination[1],
-                "firma": destination[2],
-                "vzdálenost": int(trip_distance),
-                "vozidlo": selected_vehicle,
-                "měsíc": month_name,
-                "rok": str(year)
-            }
-            trips.append(trip_tam)
-
-            # Jízda zpět (může být jiný řidič)
-            driver_zpet = random.choice(drivers)
-            trip_zpet = {
-                "datum": trip_date,
-                "řidič": f"{driver_zpet[0]} {driver_zpet[1]}",
-                "start": destination[1],  # Zpáteční cesta
-                "cíl": destination[0],
-                "firma": destination[2],
-                "vzdálenost": int(trip_distance),
-                "vozidlo": selected_vehicle,
-                "měsíc": month_name,
-                "rok": str(year)
-            }
-            trips.append(trip_zpet)
-
-            remaining_km -= round_trip_distance
-
-        # Výpis výsledků s datem
-        trip_summary = "\n".join([f"{trip['datum']} | {trip['řidič']} ({trip['vozidlo']}): {trip['start']} → {trip['cíl']} ({trip['vzdálenost']} km, Firma: {trip['firma']})" for trip in trips])
-
-        # Vytvoření tabulky
-        self.trip_table.setRowCount(len(trips))
-        self.trip_table.setHorizontalHeaderLabels(["Datum", "Řidič", "Start", "Cíl", "Firma", "Vzdálenost (km)"])
-        
-        # NEJPRVE naplníme tabulku daty, POTOM povolíme řazení
-        actual_row = 0
-        for trip in trips:
-            # Kontrola základních údajů (neměly by být None nebo prázdné stringy)
-            if not trip.get("datum") or not trip.get("řidič") or not trip.get("start") or not trip.get("cíl"):
-                continue
-
-            self.trip_table.setItem(actual_row, 0, QTableWidgetItem(str(trip["datum"])))
-            self.trip_table.setItem(actual_row, 1, QTableWidgetItem(str(trip["řidič"])))
-            self.trip_table.setItem(actual_row, 2, QTableWidgetItem(str(trip["start"])))
-            self.trip_table.setItem(actual_row, 3, QTableWidgetItem(str(trip["cíl"])))
-            self.trip_table.setItem(actual_row, 4, QTableWidgetItem(str(trip["firma"] or "")))
-            self.trip_table.setItem(actual_row, 5, QTableWidgetItem(str(trip["vzdálenost"])))
-            actual_row += 1
-
-        # Upravení počtu řádků tabulky na skutečný počet záznamů
-        self.trip_table.setRowCount(actual_row)
-        
-        # TEPRVE NYNÍ povolíme řazení a seřadíme podle data
-        self.trip_table.setSortingEnabled(True)  # Povolení řazení sloupců
-        self.trip_table.sortItems(0, Qt.SortOrder.AscendingOrder)  # Řazení podle data vzestupně
+        # Jízdy jsou seřazené podle dne, řazení podle sloupců povolíme až nyní
+        self.trip_table.setSortingEnabled(True)
 
         # Zobrazení tabulky v novém okně
         self.trip_window = QWidget()
-        self.trip_window.setWindowTitle("Vygenerovaná Kniha jízd")
+        self.trip_window.setWindowTitle(f"Vygenerovaná Kniha jízd - {selected_vehicle} {month:02}/{year}")
         layout = QVBoxLayout()
         layout.addWidget(self.trip_table)
         self.trip_window.setLayout(layout)
         self.trip_window.show()
         
         # Informace o vygenerovaných jízdách
-        total_generated_km = sum(trip['vzdálenost'] for trip in trips)
         QMessageBox.information(self, "Kniha jízd vygenerována", 
-                              f"Vygenerováno {len(trips)} jízd pro {len(set(trip['cíl'] for trip in trips))//2} destinací.\n"
-                              f"Celkový počet km: {total_generated_km} (z {int(total_km)} dostupných km)")
+                              f"Vygenerováno {len(book)} jízd pro {book.destination_count} destinací.\n"
+                              f"Celkový počet km: {book.total_distance} (z {int(book.available_km)} dostupných km)")
+
+    def generate_fleet_books(self):
+        """Vygeneruje a uloží knihy jízd všech vozidel za zvolený rok."""
+        if self.loader.is_loading("fleet"):
+            return
+        year = int(self.year_box.currentText())
+        reply = QMessageBox.question(
+            self, "Knihy jízd za rok",
+            f"Vygenerovat a uložit knihy jízd všech vozidel za rok {year}?\n\n"
+            f"Měsíce, u kterých se tankování, destinace ani řidiči nezměnili, se přeskočí.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.progress_dialog = QProgressDialog(f"Generuji knihy jízd za rok {year}...", None, 0, 0, self)
+        self.progress_dialog.setWindowTitle("Knihy jízd")
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.show()
+        self.fleet_cancel.clear()
+        self.loader.submit("fleet", generate_fleet, year, False, self.batch_progress.changed.emit,
+                           None, None, self.fleet_cancel.is_set,
+                           on_done=self.fleet_books_finished, on_error=self.show_fleet_error)
+
+    def update_batch_progress(self, done, total):
+        if self.progress_dialog is not None:
+            self.progress_dialog.setMaximum(total)
+            self.progress_dialog.setValue(done)
+
+    def close_progress_dialog(self):
+        if self.progress_dialog is not None:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
+    def fleet_books_finished(self, stats):
+        self.close_progress_dialog()
+        QMessageBox.information(self, "Knihy jízd za rok", f"✅ {format_stats(stats)}")
+
+    def show_fleet_error(self, error):
+        self.close_progress_dialog()
+        QMessageBox.critical(self, "Chyba", f"Chyba při generování knih jízd: {str(error)}")
+
+    def closeEvent(self, event):
+        """Zruší běžící dávku při zavření okna"""
+        # interrupt() zastaví jen SQL - procesy poolu zastaví až fleet_cancel
+        self.fleet_cancel.set()
+        self.loader.cancel_all()
+        self.close_progress_dialog()
+        event.accept()
 
     def show_analysis(self):
         """Zobrazí analýzu a statistiky."""
@@ -491,23 +457,13 @@ class TripCalculationWindow(QMainWindow):
         if not hasattr(self, 'month_box') or not hasattr(self, 'year_box') or not hasattr(self, 'vehicle_box'):
             return  # Pokud ještě nejsou inicializované komponenty
             
-        month_name = self.month_box.currentText()
+        month = self.month_box.currentIndex() + 1
         year = int(self.year_box.currentText())
         selected_vehicle = self.vehicle_box.currentText()
 
-        # Převod měsíce na číslo
-        months = ["Leden", "Únor", "Březen", "Duben", "Květen", "Červen",
-                "Červenec", "Srpen", "Září", "Říjen", "Listopad", "Prosinec"]
-        month = months.index(month_name) + 1
-
         # Sečtení tankování z databáze
         conn = connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT SUM(fuel_amount) FROM fuel_tankings
-            WHERE vehicle=? AND substr(date, 4, 2)=? AND substr(date, 7, 4)=?
-        """, (selected_vehicle, f"{month:02}", str(year)))
-        fuel_quantity = cursor.fetchone()[0] or 0
+        fuel_quantity = month_fuel(conn, selected_vehicle, year, month)
         conn.close()
 
         # Zobrazení množství paliva na stránce
@@ -518,7 +474,7 @@ class TripCalculationWindow(QMainWindow):
             # Získání spotřeby vozidla
             conn = connect()
             cursor = conn.cursor()
-            cursor.execute("SELECT consumption FROM cars WHERE registration=?", (selected_vehicle,))
+            cursor.execute(CAR_CONSUMPTION_SQL, (selected_vehicle,))
             consumption_result = cursor.fetchone()
             conn.close()
             
@@ -532,13 +488,22 @@ class TripCalculationWindow(QMainWindow):
             self.estimated_km_label.setText("Předpokládaný průměrný počet kilometrů: N/A")
 
 
+# Sloupce exportu analýzy jízd
+ANALYSIS_COLUMNS = [
+    XlsxColumn("Měsíc", width=10), XlsxColumn("Vozidlo", width=12), XlsxColumn("Počet jízd", 'int'),
+    XlsxColumn("Celkem km", 'int'), XlsxColumn("Spotřeba (l)", 'number'), XlsxColumn("Náklady (Kč)", 'money'),
+    XlsxColumn("Průměr l/100km", 'number'), XlsxColumn("Norma l/100km", 'number'),
+    XlsxColumn("Odchylka", width=20),
+]
+
+
 class AnalysisDialog(QDialog):
     """Dialog pro analýzu dat"""
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Analýza dat")
-        self.setFixedSize(900, 700)
+        self.setFixedSize(1050, 700)
         self.setStyleSheet("""
             QDialog {
                 background-color: #f5f6fa;
@@ -578,6 +543,8 @@ class AnalysisDialog(QDialog):
             }
         """)
         
+        self.analysis_rows = []
+        self.loader = AsyncLoader(self)
         self.setup_ui()
         self.load_analysis_data()
     
@@ -591,21 +558,64 @@ class AnalysisDialog(QDialog):
         header_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #3498db; margin-bottom: 20px;")
         layout.addWidget(header_label)
         
+        # Období, vozidlo a parametry analýzy
+        filter_layout = QHBoxLayout()
+        current_year = QDate.currentDate().year()
+
+        filter_layout.addWidget(self._filter_label("Od:"))
+        self.month_from = QDateEdit(QDate(current_year, 1, 1))
+        self.month_from.setDisplayFormat("MM.yyyy")
+        filter_layout.addWidget(self.month_from)
+
+        filter_layout.addWidget(self._filter_label("Do:"))
+        self.month_to = QDateEdit(QDate(current_year, 12, 1))
+        self.month_to.setDisplayFormat("MM.yyyy")
+        filter_layout.addWidget(self.month_to)
+
+        filter_layout.addWidget(self._filter_label("Vozidlo:"))
+        self.analysis_vehicle_box = QComboBox()
+        self.analysis_vehicle_box.addItem("Všechna vozidla", None)
+        for vehicle in self.load_vehicles():
+            self.analysis_vehicle_box.addItem(vehicle, vehicle)
+        filter_layout.addWidget(self.analysis_vehicle_box)
+
+        filter_layout.addWidget(self._filter_label("Tolerance:"))
+        self.band_spin = QDoubleSpinBox()
+        self.band_spin.setRange(1, 100)
+        self.band_spin.setDecimals(0)
+        self.band_spin.setSuffix(" %")
+        self.band_spin.setValue(DEFAULT_ANOMALY_BAND * 100)
+        filter_layout.addWidget(self.band_spin)
+
+        filter_layout.addWidget(self._filter_label("Cena:"))
+        self.price_spin = QDoubleSpinBox()
+        self.price_spin.setRange(0, 1000)
+        self.price_spin.setSuffix(" Kč/l")
+        self.price_spin.setValue(DEFAULT_FUEL_PRICE)
+        filter_layout.addWidget(self.price_spin)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
         # Statistiky
         stats_layout = QHBoxLayout()
-        
-        total_trips_label = QLabel("Celkem jízd: 156")
-        total_trips_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 15px; border-radius: 8px;")
-        stats_layout.addWidget(total_trips_label)
-        
-        total_km_label = QLabel("Celkem km: 23,450")
-        total_km_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 15px; border-radius: 8px;")
-        stats_layout.addWidget(total_km_label)
-        
-        avg_consumption_label = QLabel("Průměrná spotřeba: 8.2 l/100km")
-        avg_consumption_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 15px; border-radius: 8px;")
-        stats_layout.addWidget(avg_consumption_label)
-        
+        stats_style = "font-size: 14px; font-weight: bold; color: #2c3e50; background: #ecf0f1; padding: 15px; border-radius: 8px;"
+
+        self.total_trips_label = QLabel("Celkem jízd: -")
+        self.total_trips_label.setStyleSheet(stats_style)
+        stats_layout.addWidget(self.total_trips_label)
+
+        self.total_km_label = QLabel("Celkem km: -")
+        self.total_km_label.setStyleSheet(stats_style)
+        stats_layout.addWidget(self.total_km_label)
+
+        self.avg_consumption_label = QLabel("Průměrná spotřeba: -")
+        self.avg_consumption_label.setStyleSheet(stats_style)
+        stats_layout.addWidget(self.avg_consumption_label)
+
+        self.anomaly_label = QLabel("Odchylky: -")
+        self.anomaly_label.setStyleSheet(stats_style)
+        stats_layout.addWidget(self.anomaly_label)
+
         layout.addLayout(stats_layout)
         
         # Detailní tabulka
@@ -614,29 +624,25 @@ class AnalysisDialog(QDialog):
         layout.addWidget(table_label)
         
         self.analysis_table = QTableWidget()
-        self.analysis_table.setColumnCount(6)
-        self.analysis_table.setHorizontalHeaderLabels([
-            "Měsíc", "Počet jízd", "Celkem km", "Spotřeba (l)", "Náklady (Kč)", "Průměr l/100km"
-        ])
+        self.analysis_table.setColumnCount(len(ANALYSIS_COLUMNS))
+        self.analysis_table.setHorizontalHeaderLabels([column.title for column in ANALYSIS_COLUMNS])
         layout.addWidget(self.analysis_table)
         
-        # Graf informace
-        graph_info_label = QLabel("""
-📈 Grafické zobrazení:
-• Trend spotřeby v čase
-• Porovnání měsíčních nákladů  
-• Analýza nejčastějších tras
-• Výkonnost vozidel
-        """)
-        graph_info_label.setStyleSheet("""
+        # Vysvětlivky
+        legend_label = QLabel(
+            "Jízdy a km pocházejí z uložených knih jízd (🗂️ Knihy za rok), litry z tankování.\n"
+            "Odchylka: průměr mimo normu vozidla ± tolerance, nebo tankování v měsíci bez jízd."
+        )
+        legend_label.setStyleSheet("""
             font-size: 11px; 
+            font-weight: normal;
             color: #7f8c8d; 
             background: #ecf0f1; 
             padding: 15px; 
             border-radius: 8px;
             margin-top: 10px;
         """)
-        layout.addWidget(graph_info_label)
+        layout.addWidget(legend_label)
         
         # Tlačítka
         button_layout = QHBoxLayout()
@@ -658,41 +664,90 @@ class AnalysisDialog(QDialog):
         button_layout.addWidget(close_button)
         
         layout.addLayout(button_layout)
-    
+
+    def _filter_label(self, text):
+        label = QLabel(text)
+        label.setStyleSheet("font-size: 12px; margin-bottom: 0px;")
+        return label
+
+    def load_vehicles(self):
+        """Registrační značky vozidel pro výběr."""
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT registration FROM cars ORDER BY registration")
+        vehicles = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return vehicles
+
+    def selected_period(self):
+        """Zvolené období jako (první den, první den po posledním měsíci) YYYY-MM-DD."""
+        first = self.month_from.date()
+        last = self.month_to.date()
+        if last < first:
+            first, last = last, first
+        date_from = QDate(first.year(), first.month(), 1)
+        date_to = QDate(last.year(), last.month(), 1).addMonths(1)
+        return date_from.toString("yyyy-MM-dd"), date_to.toString("yyyy-MM-dd")
+
     def load_analysis_data(self):
-        """Načte data pro analýzu"""
+        """Spustí výpočet analýzy za zvolené období na pozadí"""
+        date_from, date_to = self.selected_period()
+        self.loader.submit(
+            "analysis", fuel_analysis, date_from, date_to,
+            self.analysis_vehicle_box.currentData(), self.band_spin.value() / 100, self.price_spin.value(),
+            on_done=self.show_analysis_data, on_error=self.show_analysis_error
+        )
+
+    def show_analysis_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při výpočtu analýzy: {str(error)}")
+
+    def show_analysis_data(self, rows):
+        """Zobrazí spočítanou analýzu"""
+        # Řádky pro tabulku i export - (měsíc, vozidlo, jízd, km, litrů, náklady, l/100km, norma, odchylka)
+        self.analysis_rows = [
+            (row.month, row.vehicle, row.trips, row.km, round(row.litres, 1), round(row.cost, 2),
+             round(row.consumption, 2) if row.consumption is not None else None,
+             row.nominal, ANOMALY_LABELS.get(row.anomaly, ""))
+            for row in rows
+        ]
+
+        totals = analysis_totals(rows)
+        self.total_trips_label.setText(f"Celkem jízd: {totals['trips']:,}")
+        self.total_km_label.setText(f"Celkem km: {totals['km']:,.0f}")
+        if totals['consumption'] is None:
+            self.avg_consumption_label.setText("Průměrná spotřeba: -")
+        else:
+            self.avg_consumption_label.setText(f"Průměrná spotřeba: {totals['consumption']:.2f} l/100km")
+        self.anomaly_label.setText(f"Odchylky: {totals['anomalies']}")
+
         # Blokujeme signály během aktualizace tabulky
         self.analysis_table.blockSignals(True)
-        
-        # Simulace dat pro analýzu
-        analysis_data = [
-            ("2024-01", "12", "1,890", "154.3", "6,890", "8.17"),
-            ("2024-02", "15", "2,340", "189.2", "8,460", "8.09"),
-            ("2024-03", "18", "2,780", "225.6", "10,080", "8.12"),
-            ("2024-04", "14", "2,150", "172.0", "7,680", "8.00"),
-            ("2024-05", "16", "2,450", "198.8", "8,890", "8.11"),
-            ("2024-06", "13", "1,980", "160.4", "7,170", "8.10"),
-        ]
-        
-        self.analysis_table.setRowCount(len(analysis_data))
-        
-        for row, data in enumerate(analysis_data):
-            for col, value in enumerate(data):
-                item = QTableWidgetItem(str(value))
-                if col == 5:  # Průměrná spotřeba
-                    consumption = float(value)
-                    if consumption < 8.0:
-                        item.setBackground(Qt.GlobalColor.green)
-                        item.setForeground(Qt.GlobalColor.white)
-                    elif consumption > 8.2:
+        self.analysis_table.setRowCount(len(rows))
+        
+        for row_index, (row, values) in enumerate(zip(rows, self.analysis_rows)):
+            month, vehicle, trips, km, litres, cost, consumption, nominal, anomaly = values
+            texts = [
+                month, vehicle, str(trips), f"{km:,.0f}", f"{litres:.1f}", f"{cost:,.0f}",
+                f"{consumption:.2f}" if consumption is not None else "-",
+                f"{nominal:.1f}" if nominal is not None else "-", anomaly,
+            ]
+            for col, value in enumerate(texts):
+                item = QTableWidgetItem(value)
+                if col in (6, 8):  # Průměrná spotřeba a odchylka
+                    if row.anomaly == ANOMALY_HIGH:
                         item.setBackground(Qt.GlobalColor.red)
                         item.setForeground(Qt.GlobalColor.white)
+                    elif row.anomaly == ANOMALY_LOW:
+                        item.setBackground(Qt.GlobalColor.green)
+                        item.setForeground(Qt.GlobalColor.white)
+                    elif row.anomaly == ANOMALY_NO_TRIPS:
+                        item.setForeground(Qt.GlobalColor.darkYellow)
                     else:
                         item.setForeground(Qt.GlobalColor.darkBlue)
-                elif col == 4:  # Náklady
+                elif col == 5:  # Náklady
                     item.setForeground(Qt.GlobalColor.darkMagenta)
                 
-                self.analysis_table.setItem(row, col, item)
+                self.analysis_table.setItem(row_index, col, item)
         
         # Obnovíme signály
         self.analysis_table.blockSignals(False)
@@ -700,15 +755,42 @@ class AnalysisDialog(QDialog):
         self.analysis_table.resizeColumnsToContents()
     
     def change_period(self):
-        """Změní období pro analýzu"""
-        QMessageBox.information(self, "Období", "Funkce změny období bude k dispozici v další verzi.")
+        """Přepočítá analýzu pro zvolené období, vozidlo a toleranci"""
+        self.load_analysis_data()
+
+    def done(self, result):
+        """Zruší rozpracovaný výpočet při zavření dialogu"""
+        self.loader.cancel_all()
+        super().done(result)
     
     def export_csv(self):
         """Export do CSV"""
-        QMessageBox.information(self, "Export", "Data byla exportována do CSV souboru.")
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export CSV", f"analyza_jizd_{datetime.now().strftime('%Y%m%d')}.csv", "CSV soubory (*.csv)"
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
+                writer = csv.writer(csvfile, delimiter=';')
+                writer.writerow([column.title for column in ANALYSIS_COLUMNS])
+                writer.writerows(self.analysis_rows)
+            QMessageBox.information(self, "Export", f"Data byla exportována do:\n{filename}")
+        except OSError as e:
+            QMessageBox.critical(self, "Chyba", f"Chyba při exportu: {str(e)}")
     
     def export_excel(self):
         """Export do Excel"""
-        QMessageBox.information(self, "Export", "Data byla exportována do Excel souboru.")
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export Excel", f"analyza_jizd_{datetime.now().strftime('%Y%m%d')}.xlsx", "Excel sešity (*.xlsx)"
+        )
+        if not filename:
+            return
+        try:
+            with XlsxWorkbook(filename) as workbook:
+                workbook.add_sheet("Analýza jízd", ANALYSIS_COLUMNS, self.analysis_rows)
+            QMessageBox.information(self, "Export", f"Data byla exportována do:\n{filename}")
+        except OSError as e:
+            QMessageBox.critical(self, "Chyba", f"Chyba při exportu: {str(e)}")
 
 
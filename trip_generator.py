@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Generátor knihy jízd nezávislý na oknech.
+
+Z natankovaného paliva a spotřeby vozidla se spočítá počet kilometrů,
+který se rozdělí na zpáteční jízdy do destinací. Pořadí destinací je
+náhodné (po vyčerpání všech se vylosuje znovu), každá jízda má vlastní
+den v měsíci a poslední jízda se zkrátí na zbývající kilometry (vyšel-li
+by její úsek na 0 km, vynechá se).
+Kilometry se přidělí najednou - kumulativní součet vzdáleností a binární
+hledání místa, kde dojde palivo.
+
+    book = generate_trip_book(fuel, consumption, distances, len(drivers), 2025, 3, seed=42)
+    for leg in book.records():
+        ...
+
+Stejné vstupy a `seed` dávají stejnou knihu. S NumPy se čísla losují
+generátorem `numpy.random.default_rng`, bez něj modulem `random` - kniha
+se stejným seedem se mezi oběma variantami liší.
+"""
+
+import zlib
+import random
+import calendar
+from collections import namedtuple
+from datetime import date
+
+from database import register_query
+from fuel_summary import month_tankings
+
+try:
+    import numpy as np
+    NUMPY_SUPPORT = True
+except ImportError:
+    NUMPY_SUPPORT = False
+
+# Jedna jízda knihy: den v měsíci, index řidiče, index destinace,
+# směr (False = tam, True = zpět) a vzdálenost v km
+Leg = namedtuple('Leg', 'day driver destination reverse distance')
+
+if NUMPY_SUPPORT:
+    LEG_DTYPE = np.dtype([
+        ('day', np.uint8), ('driver', np.uint16), ('destination', np.uint32),
+        ('reverse', np.bool_), ('distance', np.uint32),
+    ])
+
+TRIP_BOOK_COLUMNS = ["Datum", "Řidič", "Start", "Cíl", "Firma", "Vzdálenost (km)"]
+
+CAR_CONSUMPTION_SQL = register_query("trip.car_consumption", """
+    SELECT consumption FROM cars WHERE registration=?
+""")
+
+TripInputs = namedtuple('TripInputs', 'fuel consumption destinations drivers')
+
+
+class TripGeneratorError(ValueError):
+    """Knihu jízd nelze z daných vstupů vygenerovat"""
+
+
+class TripBook:
+    """Vygenerovaná kniha jízd jednoho vozidla za měsíc.
+
+    `legs` je strukturované pole NumPy (`LEG_DTYPE`), bez NumPy seznam `Leg`.
+    Jízdy jsou seřazené podle dne, jízda zpět následuje jízdu tam.
+    """
+
+    def __init__(self, year, month, available_km, legs):
+        self.year = year
+        self.month = month
+        self.available_km = available_km
+        self.legs = legs
+
+    def __len__(self):
+        return len(self.legs)
+
+    def records(self):
+        """Jízdy jako seznam `Leg`."""
+        if NUMPY_SUPPORT and isinstance(self.legs, np.ndarray):
+            return [Leg(*row) for row in self.legs.tolist()]
+        return list(self.legs)
+
+    @property
+    def total_distance(self):
+        if NUMPY_SUPPORT and isinstance(self.legs, np.ndarray):
+            return int(self.legs['distance'].sum())
+        return sum(leg.distance for leg in self.legs)
+
+    @property
+    def destination_count(self):
+        """Počet různých navštívených destinací."""
+        return len({leg.destination for leg in self.records()})
+
+    def rows(self, destinations, drivers, date_format="%d.%m.%Y"):
+        """Řádky pro tabulku a export (`TRIP_BOOK_COLUMNS`).
+
+        `destinations` jsou řádky `(start, cíl, firma, vzdálenost)`,
+        `drivers` řádky `(jméno, příjmení)` ve stejném pořadí jako při generování.
+        """
+        rows = []
+        for leg in self.records():
+            start, target, company = destinations[leg.destination][:3]
+            if leg.reverse:
+                start, target = target, start
+            first_name, last_name = drivers[leg.driver][:2]
+            rows.append((
+                date(self.year, self.month, leg.day).strftime(date_format),
+                f"{first_name} {last_name}", start, target, company or "", leg.distance,
+            ))
+        return rows
+
+
+def book_seed(vehicle, year, month):
+    """Stálý seed knihy vozidla za měsíc - opakované generování dá stejnou knihu."""
+    return zlib.crc32(f"{vehicle}|{year:04d}-{month:02d}".encode('utf-8'))
+
+
+def available_km(fuel, consumption):
+    """Kilometry, které odpovídají natankovanému palivu."""
+    return fuel / consumption * 100 if consumption > 0 else 0
+
+
+def _validate(fuel, consumption, distances, driver_count):
+    if driver_count <= 0:
+        raise TripGeneratorError("V databázi nejsou žádní řidiči!")
+    if len(distances) == 0:
+        raise TripGeneratorError("V databázi nejsou žádné destinace!")
+    if not any(distance > 0 for distance in distances):
+        raise TripGeneratorError("Destinace nemají zadanou vzdálenost!")
+    total_km = available_km(fuel, consumption)
+    if total_km <= 0:
+        raise TripGeneratorError("Není dostatek paliva pro generování jízd!")
+    return total_km
+
+
+def _generate_numpy(total_km, distances, driver_count, days_in_month, seed):
+    rng = np.random.default_rng(seed)
+    distances = np.asarray(distances, dtype=float)
+    candidates = np.flatnonzero(distances > 0)
+
+    # Pořadí destinací: náhodné permutace za sebou, nejvýš jedna jízda denně
+    blocks = -(-days_in_month // len(candidates))
+    order = np.concatenate([rng.permutation(candidates) for _ in range(blocks)])[:days_in_month]
+
+    # Kilometry do vyčerpání paliva - poslední jízda dostane zbytek
+    round_trips = distances[order] * 2
+    cumulative = np.cumsum(round_trips)
+    count = min(int(np.searchsorted(cumulative, total_km, side='left')) + 1, len(order))
+    order = order[:count]
+    round_trips = round_trips[:count].copy()
+    previous = cumulative[count - 2] if count > 1 else 0.0
+    round_trips[-1] = min(round_trips[-1], total_km - previous)
+
+    # Jízda, jejíž úsek se zaokrouhlí na 0 km (zbytek paliva pod 2 km), se vynechá
+    legs_km = np.floor(round_trips / 2)
+    keep = legs_km > 0
+    order, legs_km = order[keep], legs_km[keep]
+    count = len(order)
+    if count == 0:
+        raise TripGeneratorError("Není dostatek paliva pro generování jízd!")
+
+    days = np.sort(rng.choice(days_in_month, size=count, replace=False)) + 1
+    trip_drivers = rng.integers(0, driver_count, size=(count, 2))
+
+    legs = np.empty(count * 2, dtype=LEG_DTYPE)
+    legs['day'] = np.repeat(days, 2)
+    legs['driver'] = trip_drivers.ravel()
+    legs['destination'] = np.repeat(order, 2)
+    legs['reverse'] = np.tile([False, True], count)
+    legs['distance'] = np.repeat(legs_km, 2)
+    return legs
+
+
+def _generate_python(total_km, distances, driver_count, days_in_month, seed):
+    rng = random.Random(seed)
+    candidates = [i for i, distance in enumerate(distances) if distance > 0]
+
+    order = []
+    while len(order) < days_in_month:
+        block = candidates[:]
+        rng.shuffle(block)
+        order.extend(block)
+
+    trips = []
+    remaining = total_km
+    for destination in order[:days_in_month]:
+        if remaining <= 0:
+            break
+        round_trip = min(distances[destination] * 2, remaining)
+        remaining -= round_trip
+        # Jízda, jejíž úsek se zaokrouhlí na 0 km (zbytek paliva pod 2 km), se vynechá
+        if int(round_trip / 2) > 0:
+            trips.append((destination, int(round_trip / 2)))
+    if not trips:
+        raise TripGeneratorError("Není dostatek paliva pro generování jízd!")
+
+    days = sorted(rng.sample(range(1, days_in_month + 1), len(trips)))
+    legs = []
+    for day, (destination, distance) in zip(days, trips):
+        legs.append(Leg(day, rng.randrange(driver_count), destination, False, distance))
+        legs.append(Leg(day, rng.randrange(driver_count), destination, True, distance))
+    return legs
+
+
+def generate_trip_book(fuel, consumption, distances, driver_count, year, month, seed=None):
+    """Vygeneruje knihu jízd jednoho vozidla za měsíc.
+
+    `fuel` jsou litry (číslo nebo pole jednotlivých tankování), `consumption`
+    spotřeba v l/100 km, `distances` jednosměrné vzdálenosti destinací v km.
+    Vyvolá `TripGeneratorError`, pokud chybí řidiči, destinace nebo palivo.
+    """
+    if NUMPY_SUPPORT:
+        fuel = float(np.sum(fuel))
+        distances = np.asarray(distances, dtype=float)
+    else:
+        fuel = float(fuel if isinstance(fuel, (int, float)) else sum(fuel))
+        distances = [float(distance) for distance in distances]
+
+    total_km = _validate(fuel, consumption or 0, distances, driver_count)
+    days_in_month = calendar.monthrange(year, month)[1]
+    generate = _generate_numpy if NUMPY_SUPPORT else _generate_python
+    legs = generate(total_km, distances, driver_count, days_in_month, seed)
+    return TripBook(year, month, total_km, legs)
+
+
+def load_inputs(conn, vehicle, year, month):
+    """Vstupy generátoru z databáze: tankování, spotřeba, destinace a řidiči."""
+    fuel = month_tankings(conn, vehicle, year, month)
+
+    cursor = conn.cursor()
+    cursor.execute(CAR_CONSUMPTION_SQL, (vehicle,))
+    row = cursor.fetchone()
+    consumption = row[0] if row else 0
+
+    cursor.execute("SELECT start, destination, company, distance FROM destinations ORDER BY id")
+    destinations = cursor.fetchall()
+
+    cursor.execute("SELECT first_name, last_name FROM drivers ORDER BY id")
+    drivers = cursor.fetchall()
+    return TripInputs(fuel, consumption, destinations, drivers)
+
+
+def generate_from_inputs(inputs, year, month, seed=None):
+    """Kniha jízd z `TripInputs` (viz `load_inputs`)."""
+    return generate_trip_book(
+        inputs.fuel, inputs.consumption, [row[3] or 0 for row in inputs.destinations],
+        len(inputs.drivers), year, month, seed
+    )
@@ -40,6 +40,10 @@ class UserManager:
         if user:
             # Aktualizace posledního přihlášení
             UserManager.update_last_login(user[0])
+            
+            # Nové přihlášení - oprávnění se načtou znovu
+            from role_management import RoleManager
+            RoleManager.invalidate_permission_cache()
             return {
                 'id': user[0],
                 'username': user[1], 
@@ -202,14 +206,14 @@ class UserManager:
     @staticmethod
     def has_permission(user_role, required_permission):
         """Kontrola oprávnění podle role pomocí role_management"""
-        from role_management import RoleManager
-        
-        # Načtení oprávnění uživatele podle role
-        permissions = RoleManager.get_user_permissions(user_role)
-        
         # Admin má přístup ke všemu
         if user_role == 'admin':
             return True
+        
+        from role_management import RoleManager
+        
+        # Oprávnění role z cache (načtená jednou za přihlášení)
+        permissions = RoleManager.get_cached_permissions(user_role)
             
         # Kontrola konkrétního oprávnění
         if required_permission in permissions:
@@ -7,8 +7,22 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont
 from database import connect
+from async_loader import AsyncLoader, bind_loading_indicator
 from inventory_dialog import InventoryDialog
 
+
+def query_inventory(conn):
+    """Aktuální stav skladu (běží ve vlákně AsyncLoaderu)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, name, category, current_stock, unit, min_stock, price,
+               (current_stock * price) as total_value
+        FROM warehouse_products 
+        ORDER BY name
+    """)
+    return cursor.fetchall()
+
+
 class WarehouseManagementWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -44,8 +58,11 @@ class WarehouseManagementWindow(QMainWindow):
         # Aplikace stylů
         self.apply_modern_styles()
         
-        # Vytvoření tabulky a načtení dat
-        self.create_warehouse_tables()
+        # Načítání dat na pozadí
+        self.loader = AsyncLoader(self)
+        bind_loading_indicator(self.loader, self, [self.table])
+
+        # Načtení dat (tabulky vytváří migrace v database.py)
         self.load_inventory()
 
     def create_header(self, layout):
@@ -363,58 +380,17 @@ class WarehouseManagementWindow(QMainWindow):
             }
         """)
 
-    def create_warehouse_tables(self):
-        """Vytvoří tabulky pro skladové hospodářství"""
-        try:
-            cursor = self.db.cursor()
-            
-            # Tabulka produktů
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS warehouse_products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    category TEXT,
-                    description TEXT,
-                    unit TEXT,
-                    price REAL,
-                    min_stock INTEGER DEFAULT 0,
-                    current_stock INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabulka skladových pohybů
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS warehouse_movements (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER,
-                    movement_type TEXT,
-                    quantity INTEGER,
-                    price REAL,
-                    date TEXT,
-                    description TEXT,
-                    user_id TEXT,
-                    FOREIGN KEY (product_id) REFERENCES warehouse_products (id)
-                )
-            """)
-            
-            self.db.commit()
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při vytváření tabulek: {str(e)}")
-
     def load_inventory(self):
-        """Načte aktuální stav skladu"""
-        try:
-            cursor = self.db.cursor()
-            cursor.execute("""
-                SELECT id, name, category, current_stock, unit, min_stock, price,
-                       (current_stock * price) as total_value
-                FROM warehouse_products 
-                ORDER BY name
-            """)
-            rows = cursor.fetchall()
+        """Spustí načtení stavu skladu na pozadí"""
+        self.loader.submit("inventory", query_inventory,
+                           on_done=self.show_inventory, on_error=self.show_load_error)
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "Chyba", f"Chyba při načítání skladu: {str(error)}")
 
+    def show_inventory(self, rows):
+        """Zobrazí aktuální stav skladu"""
+        try:
             self.table.setRowCount(len(rows))
             
             total_products = len(rows)
@@ -634,7 +610,8 @@ class WarehouseManagementWindow(QMainWindow):
                 QMessageBox.critical(self, "Chyba", f"Chyba při inventuře: {str(e)}")
 
     def closeEvent(self, event):
-        """Uzavře databázové připojení při zavření okna"""
+        """Zruší načítání a uzavře databázové připojení při zavření okna"""
+        self.loader.cancel_all()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
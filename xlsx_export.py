@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Export do XLSX (Office Open XML) bez externích knihoven.
+
+Sešit je ZIP se SpreadsheetML. Řádky listu se zapisují rovnou do
+komprimovaného souboru v archivu - iterátor řádků (např. `stream_rows`
+nad kurzorem) se čte průběžně, takže paměť nezávisí na počtu řádků.
+Texty se ukládají jako inline řetězce (bez tabulky sdílených řetězců,
+kterou by bylo nutné držet v paměti). List s více než `MAX_ROWS` řádky
+pokračuje na dalším listu.
+
+    with XlsxWorkbook(filename) as workbook:
+        workbook.add_sheet("Faktury", [
+            XlsxColumn("Číslo"),
+            XlsxColumn("Datum", 'date'),
+            XlsxColumn("Celkem", 'money'),
+        ], stream_rows(conn, "SELECT invoice_number, issue_date, total FROM invoices"))
+
+Typy sloupců: 'text', 'int', 'number', 'money', 'percent', 'date'
+(text YYYY-MM-DD nebo date), 'datetime'. Hotové exporty tabulek jsou
+v `TABLE_EXPORTS`:
+
+    python xlsx_export.py export.xlsx invoices cash_journal [--from 2025-01-01] [--to 2025-12-31]
+"""
+
+import os
+import re
+import sys
+import itertools
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from database import connect, stream_rows
+from cash_balance import journal_query
+
+# Maximum řádků listu v Excelu (včetně záhlaví)
+MAX_ROWS = 1048576
+
+# Počet řádků načtených z databáze najednou
+FETCH_SIZE = 2000
+
+# Styly buněk - index do cellXfs ve styles.xml
+_STYLE = {
+    'text': 0,
+    'header': 1,
+    'int': 2,
+    'number': 3,
+    'money': 4,
+    'percent': 5,
+    'date': 6,
+    'datetime': 7,
+}
+
+_DEFAULT_WIDTH = {
+    'text': 24, 'int': 10, 'number': 14, 'money': 16, 'percent': 10, 'date': 12, 'datetime': 18,
+}
+
+_EPOCH = datetime(1899, 12, 30)
+
+# Znaky, které XML 1.0 nepovoluje
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Znaky nepovolené v názvu listu
+_INVALID_SHEET_NAME = re.compile(r'[\[\]:*?/\\]')
+
+_STYLES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="3">
+<numFmt numFmtId="164" formatCode="#,##0.00\\ &quot;Kč&quot;"/>
+<numFmt numFmtId="165" formatCode="d\\.m\\.yyyy"/>
+<numFmt numFmtId="166" formatCode="d\\.m\\.yyyy\\ h:mm"/>
+</numFmts>
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="8">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="1" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="10" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+class XlsxColumn:
+    """Sloupec listu - typ určuje formát buněk, šířka je ve znacích"""
+
+    def __init__(self, title, kind='text', width=None):
+        if kind not in _STYLE or kind == 'header':
+            raise ValueError(f"Neznámý typ sloupce '{kind}'")
+        self.title = title
+        self.kind = kind
+        self.width = width or max(_DEFAULT_WIDTH[kind], len(title) + 2)
+
+
+def _column_letter(index):
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _serial_date(value, with_time=False):
+    """Datum jako pořadové číslo Excelu; None, pokud hodnota není datum."""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            if with_time and len(text) > 10:
+                value = datetime.fromisoformat(text)
+            else:
+                value = datetime.strptime(text[:10], "%Y-%m-%d")
+        except ValueError:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif not isinstance(value, datetime):
+        return None
+    delta = value - _EPOCH
+    return delta.days + delta.seconds / 86400
+
+
+def _text_cell(ref, text, style=0):
+    text = _INVALID_XML.sub("", str(text))
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _cell(ref, value, kind):
+    if value is None or value == "":
+        return ""
+    if kind in ('date', 'datetime'):
+        serial = _serial_date(value, kind == 'datetime')
+        if serial is not None:
+            return f'<c r="{ref}" s="{_STYLE[kind]}"><v>{serial!r}</v></c>'
+        return _text_cell(ref, value)
+    if kind != 'text' and isinstance(value, (int, float)) and not isinstance(value, bool):
+        if kind == 'percent':
+            value = value / 100
+        return f'<c r="{ref}" s="{_STYLE[kind]}"><v>{value!r}</v></c>'
+    if kind == 'text' and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    return _text_cell(ref, value)
+
+
+class XlsxWorkbook:
+    """Sešit zapisovaný proudově - listy se přidávají postupně"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._zip = zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._sheets = []
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            try:
+                self.close()
+            except Exception:
+                self._discard()
+                raise
+        else:
+            # Chyba nebo zrušený export - rozepsaný sešit nenecháme na disku
+            self._discard()
+        return False
+
+    def _discard(self):
+        self._zip.close()
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def _sheet_name(self, name):
+        name = _INVALID_SHEET_NAME.sub("_", name).strip("'")[:31] or "List"
+        used = {sheet.lower() for sheet in self._sheets}
+        candidate = name
+        counter = 2
+        while candidate.lower() in used:
+            suffix = f" ({counter})"
+            candidate = name[:31 - len(suffix)] + suffix
+            counter += 1
+        return candidate
+
+    def add_sheet(self, name, columns, rows):
+        """Zapíše list se záhlavím a řádky z iterátoru. Vrací počet datových řádků."""
+        rows = iter(rows)
+        written = 0
+        while rows is not None:
+            count, rows = self._write_sheet(self._sheet_name(name), columns, rows)
+            written += count
+        return written
+
+    def _write_sheet(self, name, columns, rows):
+        """Jeden list; vrací (počet řádků, zbylé řádky pro další list nebo None)."""
+        self._sheets.append(name)
+        path = f"xl/worksheets/sheet{len(self._sheets)}.xml"
+        letters = [_column_letter(index) for index in range(len(columns))]
+        kinds = [column.kind for column in columns]
+        count = 0
+        full = False
+
+        with self._zip.open(path, 'w', force_zip64=True) as raw:
+            def write(text):
+                raw.write(text.encode('utf-8'))
+
+            write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                  '<sheetViews><sheetView workbookViewId="0">'
+                  '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                  '</sheetView></sheetViews><cols>')
+            write("".join(
+                f'<col min="{index + 1}" max="{index + 1}" width="{column.width}" customWidth="1"/>'
+                for index, column in enumerate(columns)
+            ))
+            write('</cols><sheetData><row r="1">')
+            write("".join(_text_cell(f"{letter}1", column.title, _STYLE['header'])
+                          for letter, column in zip(letters, columns)))
+            write('</row>')
+
+            buffer = []
+            for row in rows:
+                number = count + 2
+                cells = "".join(_cell(f"{letter}{number}", value, kind)
+                                for letter, kind, value in zip(letters, kinds, row))
+                buffer.append(f'<row r="{number}">{cells}</row>')
+                count += 1
+                if len(buffer) >= 1000:
+                    write("".join(buffer))
+                    buffer = []
+                if count + 1 >= MAX_ROWS:
+                    full = True
+                    break
+            write("".join(buffer))
+
+            write('</sheetData>')
+            if columns:
+                write(f'<autoFilter ref="A1:{letters[-1]}{count + 1}"/>')
+            write('</worksheet>')
+
+        self.rows_written += count
+        if full:
+            # Další list jen pokud řádky opravdu pokračují
+            first = next(rows, None)
+            if first is not None:
+                return count, itertools.chain([first], rows)
+        return count, None
+
+    def close(self):
+        """Dopíše sešit, styly a obsah archivu."""
+        if not self._sheets:
+            self.add_sheet("List1", [], [])
+        sheets = "".join(
+            f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, name in enumerate(self._sheets, start=1)
+        )
+        self._zip.writestr("xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>')
+
+        relationships = "".join(
+            f'<Relationship Id="rId{index}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(self._sheets) + 1)
+        )
+        styles_id = len(self._sheets) + 1
+        self._zip.writestr("xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}<Relationship Id="rId{styles_id}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>')
+        self._zip.writestr("xl/styles.xml", _STYLES_XML)
+
+        self._zip.writestr("_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>')
+
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, len(self._sheets) + 1)
+        )
+        self._zip.writestr("[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>')
+        self._zip.close()
+
+
+# --- Exporty tabulek ----------------------------------------------------
+
+# název -> (list, sloupce, SQL, sloupec s datem pro filtr období); místo SQL může být
+# funkce (kurzor, od, do) -> (SQL, parametry), která sestaví dotaz i s filtrem
+TABLE_EXPORTS = {
+    'invoices': (
+        "Faktury",
+        [XlsxColumn("Číslo faktury", width=16), XlsxColumn("Typ", width=10), XlsxColumn("Příjemce", width=32),
+         XlsxColumn("Výdejce", width=32), XlsxColumn("Vystaveno", 'date'), XlsxColumn("DUZP", 'date'),
+         XlsxColumn("Splatnost", 'date'), XlsxColumn("Bez DPH", 'money'), XlsxColumn("DPH", 'money'),
+         XlsxColumn("Celkem", 'money'), XlsxColumn("Stav", width=16), XlsxColumn("Poznámka", width=40)],
+        """SELECT invoice_number, type, recipient, issuer, issue_date, tax_date, due_date,
+                  amount_no_tax, tax, total, status, note
+           FROM invoices {where} ORDER BY issue_date, id""",
+        "issue_date",
+    ),
+    'cash_journal': (
+        "Pokladní deník",
+        [XlsxColumn("Datum", 'date'), XlsxColumn("Typ", width=14), XlsxColumn("Osoba", width=28),
+         XlsxColumn("Částka", 'money'), XlsxColumn("Zůstatek", 'money'), XlsxColumn("Poznámka", width=40)],
+        # Zůstatek se odvozuje při čtení z kontrolního bodu měsíce a součtu v okně
+        lambda cursor, date_from, date_to: journal_query(
+            cursor, date_from, date_to, "date, type, person, amount, balance, note"
+        ),
+        "date",
+    ),
+    'warehouse_movements': (
+        "Skladové pohyby",
+        [XlsxColumn("Datum", 'date'), XlsxColumn("Produkt", width=30), XlsxColumn("Pohyb", width=12),
+         XlsxColumn("Množství", 'int'), XlsxColumn("Cena", 'money'), XlsxColumn("Popis", width=40),
+         XlsxColumn("Uživatel", width=16)],
+        """SELECT m.date, p.name, m.movement_type, m.quantity, m.price, m.description, m.user_id
+           FROM warehouse_movements m LEFT JOIN warehouse_products p ON p.id = m.product_id
+           {where} ORDER BY m.date, m.id""",
+        "m.date",
+    ),
+    'service_records': (
+        "Servisní záznamy",
+        [XlsxColumn("Datum", 'date'), XlsxColumn("Typ majetku", width=14), XlsxColumn("Název", width=28),
+         XlsxColumn("Typ servisu", width=18), XlsxColumn("Popis", width=40), XlsxColumn("Technik", width=18),
+         XlsxColumn("Náklady", 'money'), XlsxColumn("Stav", width=14), XlsxColumn("Další servis", 'date')],
+        """SELECT date, asset_type, asset_name, service_type, description, technician, cost,
+                  status, next_service_date
+           FROM service_records {where} ORDER BY date, id""",
+        "date",
+    ),
+}
+
+
+def table_rows(conn, name, date_from=None, date_to=None):
+    """Řádky exportu tabulky `name` za období (proudově z kurzoru)."""
+    _, _, sql, date_column = TABLE_EXPORTS[name]
+    if callable(sql):
+        query, params = sql(conn.cursor(), date_from, date_to)
+        return stream_rows(conn, query, params, FETCH_SIZE)
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append(f"{date_column} >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append(f"{date_column} <= ?")
+        params.append(date_to)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return stream_rows(conn, sql.format(where=where), params, FETCH_SIZE)
+
+
+def export_tables(conn, filename, names, date_from=None, date_to=None):
+    """Exportuje tabulky do sešitu, každou na vlastní list (lze spustit v AsyncLoaderu).
+
+    Vrací slovník se souborem a počty řádků podle tabulek.
+    """
+    counts = {}
+    with XlsxWorkbook(filename) as workbook:
+        for name in names:
+            sheet, columns, _, _ = TABLE_EXPORTS[name]
+            counts[name] = workbook.add_sheet(sheet, columns, table_rows(conn, name, date_from, date_to))
+    return {'filename': filename, 'rows': counts}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options = {}
+    args = []
+    iterator = iter(argv)
+    for arg in iterator:
+        if arg in ("--from", "--to"):
+            options[arg] = next(iterator, None)
+        else:
+            args.append(arg)
+
+    if len(args) < 2 or any(name not in TABLE_EXPORTS for name in args[1:]):
+        print("Použití: python xlsx_export.py EXPORT.xlsx TABULKA [TABULKA...] [--from OD] [--to DO]")
+        print(f"Tabulky: {', '.join(TABLE_EXPORTS)}")
+        return 2
+
+    conn = connect()
+    try:
+        stats = export_tables(conn, args[0], args[1:], options.get("--from"), options.get("--to"))
+    except OSError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        conn.close()
+    for name, count in stats['rows'].items():
+        print(f"✅ {TABLE_EXPORTS[name][0]}: {count} řádků")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())